@@ -0,0 +1,74 @@
+"""add user_id to bank transaction rule
+
+Revision ID: 3f6b8d2a4c91
+Revises: e7a9b3d5c812
+Create Date: 2026-10-18 14:26:08.517330
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f6b8d2a4c91"
+down_revision: Union[str, None] = "e7a9b3d5c812"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        insp = sa.inspect(conn)
+        if "user_id" not in [
+            column["name"] for column in insp.get_columns("bank_transaction_rule")
+        ]:
+            op.add_column(
+                "bank_transaction_rule",
+                sa.Column("user_id", sa.UUID(), nullable=True),
+            )
+            # Filters belong to the owner of their subcategory
+            op.execute(
+                """
+                UPDATE bank_transaction_rule r
+                JOIN budget_subcategory s ON r.subcategory_id = s.id
+                JOIN budget_category c ON s.category_id = c.id
+                SET r.user_id = c.user_id
+                """
+            )
+            # Filters without a subcategory can't be attributed in SQL: the
+            # transactions they matched are encrypted with their owner's key.
+            # They keep a NULL user_id, so they are no longer applied or
+            # returned to anyone, and are left for an explicit cleanup, e.g.
+            #   DELETE m FROM bank_transaction_rule_match m
+            #   JOIN bank_transaction_rule r ON m.filter_id = r.id
+            #   WHERE r.user_id IS NULL;
+            #   DELETE FROM bank_transaction_rule WHERE user_id IS NULL;
+            op.create_foreign_key(
+                "fk_bank_transaction_rule_user_id",
+                "bank_transaction_rule",
+                "user",
+                ["user_id"],
+                ["id"],
+                ondelete="CASCADE",
+            )
+            op.create_index(
+                "ix_bank_transaction_rule_user_id",
+                "bank_transaction_rule",
+                ["user_id"],
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(
+        "fk_bank_transaction_rule_user_id", "bank_transaction_rule", type_="foreignkey"
+    )
+    op.drop_index(
+        "ix_bank_transaction_rule_user_id", table_name="bank_transaction_rule"
+    )
+    op.drop_column("bank_transaction_rule", "user_id")
@@ -0,0 +1,55 @@
+"""add t212 export job
+
+Revision ID: 5b1e7c3a9f20
+Revises: 2628905c520c
+Create Date: 2026-10-18 10:12:31.418207
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b1e7c3a9f20"
+down_revision: Union[str, None] = "2628905c520c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        insp = sa.inspect(conn)
+        if not insp.has_table("t212_export_job"):
+            op.create_table(
+                "t212_export_job",
+                sa.Column("id", sa.UUID(), primary_key=True),
+                sa.Column(
+                    "account_id",
+                    sa.UUID(),
+                    sa.ForeignKey("bank_account.id", ondelete="CASCADE"),
+                    nullable=False,
+                ),
+                sa.Column("status", sa.String(16), nullable=False),
+                sa.Column("report_id", sa.Integer(), nullable=True),
+                sa.Column("from_date", sa.DateTime(), nullable=False),
+                sa.Column("to_date", sa.DateTime(), nullable=False),
+                sa.Column("attempts", sa.Integer(), nullable=False),
+                sa.Column("next_poll_at", sa.DateTime(), nullable=False),
+                sa.Column("error", sa.String(255), nullable=True),
+                sa.Column("created_at", sa.DateTime(), nullable=False),
+                sa.Column("updated_at", sa.DateTime(), nullable=False),
+            )
+            op.create_index(
+                "ix_t212_export_job_account_id", "t212_export_job", ["account_id"]
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_t212_export_job_account_id", table_name="t212_export_job")
+    op.drop_table("t212_export_job")
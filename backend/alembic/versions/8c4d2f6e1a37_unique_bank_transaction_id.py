@@ -0,0 +1,59 @@
+"""unique bank transaction id per account
+
+Revision ID: 8c4d2f6e1a37
+Revises: 5b1e7c3a9f20
+Create Date: 2026-10-18 11:03:52.904415
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c4d2f6e1a37"
+down_revision: Union[str, None] = "5b1e7c3a9f20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = "ix_bank_transaction_account_transaction"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        insp = sa.inspect(conn)
+        if INDEX_NAME not in [
+            index["name"] for index in insp.get_indexes("bank_transaction")
+        ]:
+            # Remove duplicates left by previous syncs before adding the index
+            # Per (account_id, transaction_id), keep a categorized row if there
+            # is one, then the one with the lowest id
+            op.execute(
+                """
+                DELETE t1 FROM bank_transaction t1
+                JOIN bank_transaction t2
+                    ON t1.account_id = t2.account_id
+                    AND t1.transaction_id = t2.transaction_id
+                    AND t1.id <> t2.id
+                WHERE (t1.subcategory_id IS NULL AND t2.subcategory_id IS NOT NULL)
+                    OR (
+                        (t1.subcategory_id IS NULL) = (t2.subcategory_id IS NULL)
+                        AND t1.id > t2.id
+                    )
+                """
+            )
+            op.create_index(
+                INDEX_NAME,
+                "bank_transaction",
+                ["account_id", "transaction_id"],
+                unique=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(INDEX_NAME, table_name="bank_transaction")
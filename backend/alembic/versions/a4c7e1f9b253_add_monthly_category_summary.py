@@ -0,0 +1,45 @@
+"""add monthly category summary
+
+Revision ID: a4c7e1f9b253
+Revises: 3f6b8d2a4c91
+Create Date: 2026-10-18 15:48:12.093664
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a4c7e1f9b253"
+down_revision: Union[str, None] = "3f6b8d2a4c91"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        insp = sa.inspect(conn)
+        if not insp.has_table("monthly_category_summary"):
+            op.create_table(
+                "monthly_category_summary",
+                sa.Column(
+                    "subcategory_id",
+                    sa.UUID(),
+                    sa.ForeignKey("budget_subcategory.id", ondelete="CASCADE"),
+                    primary_key=True,
+                ),
+                sa.Column("year", sa.Integer(), primary_key=True),
+                sa.Column("month", sa.Integer(), primary_key=True),
+                # EncryptedDataType(64)
+                sa.Column("balance", sa.VARBINARY(1 + 12 + 64 + 16), nullable=False),
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("monthly_category_summary")
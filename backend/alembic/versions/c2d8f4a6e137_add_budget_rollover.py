@@ -0,0 +1,45 @@
+"""add budget rollover
+
+Revision ID: c2d8f4a6e137
+Revises: a4c7e1f9b253
+Create Date: 2026-10-18 17:02:41.558210
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c2d8f4a6e137"
+down_revision: Union[str, None] = "a4c7e1f9b253"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        insp = sa.inspect(conn)
+        if not insp.has_table("budget_rollover"):
+            op.create_table(
+                "budget_rollover",
+                sa.Column(
+                    "subcategory_id",
+                    sa.UUID(),
+                    sa.ForeignKey("budget_subcategory.id", ondelete="CASCADE"),
+                    primary_key=True,
+                ),
+                sa.Column("year", sa.Integer(), primary_key=True),
+                sa.Column("month", sa.Integer(), primary_key=True),
+                # EncryptedDataType(64)
+                sa.Column("balance", sa.VARBINARY(1 + 12 + 64 + 16), nullable=False),
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("budget_rollover")
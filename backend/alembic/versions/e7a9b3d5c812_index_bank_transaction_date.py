@@ -0,0 +1,37 @@
+"""index bank transaction date per account
+
+Revision ID: e7a9b3d5c812
+Revises: 8c4d2f6e1a37
+Create Date: 2026-10-18 12:21:07.551380
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e7a9b3d5c812"
+down_revision: Union[str, None] = "8c4d2f6e1a37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = "ix_bank_transaction_account_date"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        insp = sa.inspect(conn)
+        if INDEX_NAME not in [
+            index["name"] for index in insp.get_indexes("bank_transaction")
+        ]:
+            op.create_index(INDEX_NAME, "bank_transaction", ["account_id", "date"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(INDEX_NAME, table_name="bank_transaction")
@@ -1,4 +1,8 @@
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
+
 import uvicorn
+from anyio import to_thread
 from fastapi import APIRouter, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -6,6 +10,8 @@ from fastapi.responses import JSONResponse
 from lifehub.config.checks import pre_run_setup
 from lifehub.config.constants import cfg
 from lifehub.core.admin.router import router as admin_router
+from lifehub.core.common.base.http_transport import transport
+from lifehub.core.common.database_service import close_databases
 from lifehub.core.common.exceptions import ServiceException
 from lifehub.core.provider.api.router import router as providers_router
 from lifehub.core.user.api.router import router as user_router
@@ -13,8 +19,21 @@ from lifehub.core.user.api.user_providers.router import router as user_providers
 from lifehub.modules.finance.router import router as finance_router
 from lifehub.modules.routine.router import router as routine_router
 
+
+#### Lifespan ####
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    # Routes are sync and run in the threadpool, so its size bounds
+    # how many requests can wait on the database or a provider at once
+    to_thread.current_default_thread_limiter().total_tokens = cfg.API_THREADPOOL_SIZE
+    yield
+    transport.close()
+    close_databases()
+
+
 #### Config ####
 app = FastAPI(
+    lifespan=lifespan,
     title="LifeHub API",
     description="API for LifeHub",
     version="0.1.0",
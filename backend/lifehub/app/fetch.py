@@ -0,0 +1,151 @@
+import datetime as dt
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+
+from lifehub.config.checks import pre_run_checks
+from lifehub.config.constants import cfg
+from lifehub.config.providers import PROVIDER_CLIENTS
+from lifehub.core.common.base.http_transport import transport
+from lifehub.core.common.database_service import close_databases, session_scope
+from lifehub.core.provider.repository.provider_token import ProviderTokenRepository
+from lifehub.core.user.repository.user import UserRepository
+from lifehub.modules.finance.repository import (
+    BankAccountRepository,
+    BankAccountSyncRepository,
+)
+from lifehub.modules.finance.service.finance_service import FinanceService
+
+
+class Fetcher:
+    """
+    Background daemon that keeps bank data in the database up to date.
+
+    Every FETCH_POLL_INTERVAL seconds, accounts whose transactions or balance
+    are due are scheduled on a pool of FETCH_CONCURRENCY workers. Each account
+    is synced in its own unit of work, so a failing account doesn't affect
+    the others. At most FETCH_PROVIDER_CONCURRENCY accounts of the same
+    provider are synced at once, and failed accounts back off exponentially
+    (up to the sync interval) to stay within the provider rate limits.
+
+    Provider tokens expiring within TOKEN_REFRESH_MARGIN seconds are refreshed
+    ahead of time, so API requests don't wait on the provider's token endpoint.
+    """
+
+    def __init__(self) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=cfg.FETCH_CONCURRENCY, thread_name_prefix="fetch"
+        )
+        self._provider_limits = {
+            provider: threading.BoundedSemaphore(cfg.FETCH_PROVIDER_CONCURRENCY)
+            for provider in ("gocardless", "trading212")
+        }
+        self._in_flight: dict[uuid.UUID, Future[None]] = {}
+        # account_id -> (consecutive failures, monotonic time of the next attempt)
+        self._backoff: dict[uuid.UUID, tuple[int, float]] = {}
+        self._stopped = threading.Event()
+
+    def _sync_account(self, user_id: uuid.UUID, account_id: uuid.UUID) -> None:
+        with session_scope() as session:
+            user = UserRepository(session).get_by_id(user_id)
+            if user is None:
+                return
+            account = BankAccountRepository(user, session).get_by_id(account_id)
+            if account is None:
+                return
+            finance_service = FinanceService(session, user)
+            provider = finance_service.get_account_provider(account)
+            with self._provider_limits[provider]:
+                finance_service.sync_account(account)
+
+    def _on_done(self, account_id: uuid.UUID, future: Future[None]) -> None:
+        self._in_flight.pop(account_id, None)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            self._backoff.pop(account_id, None)
+            return
+        failures = self._backoff.get(account_id, (0, 0.0))[0] + 1
+        delay = min(
+            cfg.FETCH_POLL_INTERVAL * 2**failures, cfg.FETCH_TRANSACTIONS_INTERVAL
+        )
+        self._backoff[account_id] = (failures, time.monotonic() + delay)
+        print(f"Failed to sync account {account_id}, retrying in {delay}s: {error}")
+
+    def refresh_tokens(self) -> None:
+        """
+        Refresh the provider tokens that are about to expire.
+        """
+        margin = dt.timedelta(seconds=cfg.TOKEN_REFRESH_MARGIN)
+        with session_scope() as session:
+            expiring = ProviderTokenRepository(session).get_expiring(
+                dt.datetime.now() + margin
+            )
+
+        for user_id, provider_id in expiring:
+            client_class = PROVIDER_CLIENTS.get(provider_id)
+            if client_class is None:
+                continue
+            try:
+                with session_scope() as session:
+                    user = UserRepository(session).get_by_id(user_id)
+                    if user is None:
+                        continue
+                    client_class.for_session(user, session).ensure_fresh_token(margin)
+            except Exception as e:
+                print(f"Failed to refresh {provider_id} token of user {user_id}: {e}")
+
+    def schedule(self) -> None:
+        """
+        Schedule a sync for every account that is due and not already syncing.
+        """
+        now = dt.datetime.now()
+        with session_scope() as session:
+            due = BankAccountSyncRepository(session).get_due(
+                transactions_before=now
+                - dt.timedelta(seconds=cfg.FETCH_TRANSACTIONS_INTERVAL),
+                balances_before=now - dt.timedelta(seconds=cfg.FETCH_BALANCE_INTERVAL),
+            )
+
+        for user_id, account_id in due:
+            if account_id in self._in_flight:
+                continue
+            backoff = self._backoff.get(account_id)
+            if backoff is not None and backoff[1] > time.monotonic():
+                continue
+            future = self._executor.submit(self._sync_account, user_id, account_id)
+            self._in_flight[account_id] = future
+            future.add_done_callback(partial(self._on_done, account_id))
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.refresh_tokens()
+                self.schedule()
+            except Exception as e:
+                print(f"Failed to schedule syncs: {e}")
+            self._stopped.wait(cfg.FETCH_POLL_INTERVAL)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def run() -> None:
+    pre_run_checks()
+    fetcher = Fetcher()
+    try:
+        fetcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fetcher.stop()
+        transport.close()
+        close_databases()
+
+
+if __name__ == "__main__":
+    run()
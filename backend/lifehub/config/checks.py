@@ -7,7 +7,11 @@ from lifehub.config.constants import cfg
 from lifehub.config.providers import setup_providers
 from lifehub.config.util.schemas import *  # noqa: F401,F403
 from lifehub.core.common.base.db_model import BaseModel
-from lifehub.core.common.database_service import get_engine, get_session
+from lifehub.core.common.database_service import (
+    close_databases,
+    get_engine,
+    get_session,
+)
 from lifehub.core.provider.repository.provider import ProviderRepository
 from lifehub.core.user.service.user import UserService, UserServiceException
 from lifehub.providers.gocardless.api_client import GoCardlessAPIClient
@@ -129,3 +133,5 @@ def pre_run_setup() -> None:
     setup_providers()
     setup_admin_user()
     setup_admin_tokens()
+    # The API runs in a separate process with its own engines
+    close_databases()
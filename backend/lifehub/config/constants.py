@@ -55,6 +55,54 @@ class Config:
     YNAB_CLIENT_ID: str
     YNAB_CLIENT_SECRET: str
 
+    # Tunables (read from the environment, see _load_tunables)
+    DB_POOL_SIZE: int
+    DB_MAX_OVERFLOW: int
+    DB_POOL_TIMEOUT: int
+    DB_POOL_RECYCLE: int
+    DB_LEASE_MIN_TTL: int
+    DEK_CACHE_SIZE: int
+    DEK_CACHE_TTL: int
+    API_THREADPOOL_SIZE: int
+    FETCH_CONCURRENCY: int
+    FETCH_PROVIDER_CONCURRENCY: int
+    FETCH_TRANSACTIONS_INTERVAL: int
+    FETCH_BALANCE_INTERVAL: int
+    FETCH_POLL_INTERVAL: int
+    INGEST_BATCH_SIZE: int
+    TOKEN_REFRESH_MARGIN: int
+    INSTITUTIONS_CACHE_TTL: int
+    INSTITUTIONS_STALE_TTL: int
+    ROUTINE_FETCH_CONCURRENCY: int
+    ROUTINE_FETCH_TIMEOUT: int
+
+    __tunables: dict[str, int] = {
+        "DB_POOL_SIZE": 10,
+        "DB_MAX_OVERFLOW": 20,
+        "DB_POOL_TIMEOUT": 30,
+        "DB_POOL_RECYCLE": 1800,
+        "DB_LEASE_MIN_TTL": 300,
+        "DEK_CACHE_SIZE": 1024,
+        "DEK_CACHE_TTL": 900,
+        "API_THREADPOOL_SIZE": 40,
+        "FETCH_CONCURRENCY": 4,
+        "FETCH_PROVIDER_CONCURRENCY": 2,
+        # GoCardless allows 4 calls per account and endpoint per day
+        "FETCH_TRANSACTIONS_INTERVAL": 6 * 3600,
+        "FETCH_BALANCE_INTERVAL": 6 * 3600,
+        "FETCH_POLL_INTERVAL": 60,
+        "INGEST_BATCH_SIZE": 500,
+        # Tokens expiring within this many seconds are refreshed by the fetcher
+        "TOKEN_REFRESH_MARGIN": 600,
+        # Institution lists are served stale while they refresh in the background
+        "INSTITUTIONS_CACHE_TTL": 24 * 3600,
+        "INSTITUTIONS_STALE_TTL": 7 * 24 * 3600,
+        # Calendars and task lists fetched at once per request, and how long
+        # to wait for them before answering with what arrived
+        "ROUTINE_FETCH_CONCURRENCY": 8,
+        "ROUTINE_FETCH_TIMEOUT": 10,
+    }
+
     # Dynamic Secrets
     @property
     def VAULT_TOKEN(self) -> str:
@@ -74,6 +122,7 @@ class Config:
                 password=redis_password,
             )
             cls.__instance._load_from_redis()
+            cls.__instance._load_tunables()
         return cls.__instance
 
     def _getenv(self, key: str) -> str:
@@ -93,6 +142,14 @@ class Config:
         for key, value in config_data.items():  # type: ignore
             setattr(self, key, value)
 
+    def _load_tunables(self) -> None:
+        """
+        Load performance tunables from the environment, falling back to defaults.
+        These are per-process settings, so they aren't stored in Redis.
+        """
+        for key, default in self.__tunables.items():
+            setattr(self, key, int(os.getenv(key, default)))
+
 
 # Instantiate and load config once
 cfg = Config()
@@ -7,7 +7,7 @@ router = APIRouter(dependencies=[Depends(user_is_admin)])
 
 
 @router.get("/users")
-async def get_users(
+def get_users(
     admin_service: AdminServiceDep,
 ) -> list[UserResponse]:
     """
@@ -17,7 +17,7 @@ async def get_users(
 
 
 @router.post("/users/{user_id}/verify")
-async def verify_user(
+def verify_user(
     admin_service: AdminServiceDep,
     user_id: str,
 ) -> None:
@@ -22,13 +22,16 @@ class AdminService(BaseService):
         users = self.user_repository.get_all()
         user_list = []
         for user in users:
-            encryption_service = EncryptionService(self.session, user)
+            # Every user has their own data key, so each user is a batch
+            email, name = EncryptionService(self.session, user).decrypt_many(
+                [user.email, user.name]
+            )
             user_list.append(
                 UserResponse(
                     id=str(user.id),
                     username=user.username,
-                    email=encryption_service.decrypt_data(user.email),
-                    name=encryption_service.decrypt_data(user.name),
+                    email=email,
+                    name=name,
                     created_at=user.created_at,
                     verified=user.verified,
                     is_admin=user.is_admin,
@@ -43,4 +46,3 @@ class AdminService(BaseService):
         if user is None:
             raise AdminServiceException(404, "User not found")
         user.verified = True
-        self.session.commit()
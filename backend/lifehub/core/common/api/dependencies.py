@@ -3,6 +3,6 @@ from typing import Annotated
 from fastapi import Depends
 from sqlalchemy.orm import Session
 
-from lifehub.core.common.database_service import get_session
+from lifehub.core.common.database_service import get_db_session
 
-SessionDep = Annotated[Session, Depends(get_session)]
+SessionDep = Annotated[Session, Depends(get_db_session)]
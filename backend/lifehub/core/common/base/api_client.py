@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import copy
 import datetime as dt
 import time
+import uuid
 from abc import ABC, abstractmethod
 from dataclasses import asdict, is_dataclass
 from enum import Enum
@@ -11,7 +13,21 @@ from typing import TYPE_CHECKING, Any, Callable, Optional, TypeIs, TypeVar, cast
 
 import requests
 from sqlalchemy.orm import Session as SessionType
-
+from sqlalchemy.orm.attributes import set_committed_value
+
+from lifehub.core.common.base.http_transport import (
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_TIMEOUT,
+    Timeout,
+    transport,
+)
+from lifehub.core.common.base.retry import RetryPolicy
+from lifehub.core.common.base.token_refresh import (
+    RefreshedToken,
+    TokenKey,
+    token_refresher,
+)
+from lifehub.core.common.database_service import session_scope
 from lifehub.core.provider.repository.provider import ProviderRepository
 from lifehub.core.provider.repository.provider_token import ProviderTokenRepository
 from lifehub.core.provider.schema import Provider, ProviderToken, is_oauth_config
@@ -25,6 +41,10 @@ if TYPE_CHECKING:
     RequestParams = DataclassInstance
 
 T = TypeVar("T", bound=Callable[..., Any])
+C = TypeVar("C", bound="APIClient")
+
+# session.info key of the clients shared by a session, see APIClient.for_session
+API_CLIENTS = "api_clients"
 
 
 class AuthType(Enum):
@@ -55,8 +75,8 @@ def auth_override(auth_type: AuthType) -> Callable[[T], T]:
 def request_handler(func: T) -> T:
     """
     A wrapper for request functions
-    Handles retries and rate limiting (with exponential backoff if a Retry-After header isn't provided)
-    Raises an APIException if the status code is not 200
+    Handles retries according to the client's retry policy (see RetryPolicy)
+    Raises an APIException if the status code is not 2xx
     """
 
     @wraps(func)
@@ -64,9 +84,9 @@ def request_handler(func: T) -> T:
         self: "APIClient", method: str, endpoint: str, *args: Any, **kwargs: Any
     ) -> Any:
         url = f"{self.base_url}/{endpoint}"
-        max_retries = 5
-        backoff_factor = 2
-        delay = 1
+        policy = self.retry_policy
+        deadline = time.monotonic() + policy.deadline
+        delay = policy.base_delay
 
         def is_dataclass_obj(obj: Any) -> TypeIs[RequestParams]:
             return is_dataclass(obj) and not isinstance(obj, type)
@@ -80,37 +100,43 @@ def request_handler(func: T) -> T:
                 kwargs["json"] = asdict(kwargs["json"])
             return kwargs
 
-        def exponential_backoff(retry_count: int, retry_after: Optional[int]) -> None:
-            wait_time = (
-                retry_after
-                if retry_after is not None
-                else delay * (backoff_factor**retry_count)
-            )
-            time.sleep(wait_time)
-
         kwargs = prepare_kwargs(kwargs)
+        policy.budget.record_request()
 
-        for attempt in range(max_retries):
+        attempt = 0
+        while True:
+            attempt += 1
+            res: Optional[requests.Response] = None
             try:
-                res = func(self, method, url, *args, **kwargs)
-                if res.status_code == 429:
-                    retry_after = int(res.headers.get("Retry-After", delay))
-                    exponential_backoff(attempt, retry_after)
-                    res.raise_for_status()
-                if not (200 <= res.status_code < 300):
-                    res.raise_for_status()
-                if res.status_code == 204:
+                res = response = func(self, method, url, *args, **kwargs)
+                response.raise_for_status()
+                if response.status_code == 204:
                     return None
-                return res.json()
+                return response.json()
             except requests.exceptions.RequestException as e:
-                if attempt == max_retries - 1:
-                    raise APIException(
-                        type(self).__name__, url, res.status_code, str(e)
-                    )
+                # res is None if the request itself failed (connection error, timeout)
+                wait = policy.next_wait(method, res, attempt, delay, deadline)
+                if wait is None:
+                    status_code = res.status_code if res is not None else 0
+                    raise APIException(type(self).__name__, url, status_code, str(e))
+            time.sleep(wait)
+            delay = wait
 
     return cast(T, wrapper)
 
 
+def invalidate_api_clients(session: SessionType, provider_name: str) -> None:
+    """
+    Drops the session's clients of a provider, e.g. after its token changed.
+    Clients of every user are dropped, since some providers share a token.
+    """
+    clients: dict[tuple[type[APIClient], uuid.UUID], APIClient] = session.info.get(
+        API_CLIENTS, {}
+    )
+    for key in [key for key in clients if key[0].provider_name == provider_name]:
+        del clients[key]
+
+
 class APIException(Exception):
     def __init__(self, api: str, url: str, status_code: int, msg: str) -> None:
         self.api = api
@@ -127,6 +153,10 @@ class APIClient(ABC):
     base_url: str
     headers: Optional[dict[str, str]] = None
     cookies: Optional[dict[str, str]] = None
+    # Per-provider transport settings, see HTTPTransport
+    timeout: Timeout = DEFAULT_TIMEOUT
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE
+    retry_policy: RetryPolicy = RetryPolicy()
 
     @property
     @abstractmethod
@@ -162,55 +192,123 @@ class APIClient(ABC):
         self.provider: Provider = provider
 
         # Get user token
-        tokenRepo: ProviderTokenRepository = ProviderTokenRepository(session)
-        token: ProviderToken | None = tokenRepo.get(token_user, self.provider)
+        token: ProviderToken | None = ProviderTokenRepository(session).get(
+            token_user, self.provider
+        )
         if token is None:
             raise Exception(f"Token not found for {self.provider_name} provider")
         self.token: ProviderToken = token
         session.merge(self.token)
+        self.session = session
 
         # If necessary, refresh token
-        if self.token.expires_at < dt.datetime.now():
-            self._refresh_token(tokenRepo)
-            session.commit()
+        self.ensure_fresh_token()
+        self._set_auth_headers()
 
+    def _set_auth_headers(self) -> None:
         match self.auth_type:
             case AuthType.BASIC:
                 pass
             case AuthType.HEADERS:
                 pass
             case AuthType.TOKEN_HEADERS:
-                self.headers = {
-                    "Authorization": self.encryption_service.decrypt_data(
-                        self.token.token
-                    )
-                }
+                self.headers = {"Authorization": self._decrypted_token()}
             case AuthType.TOKEN_BEARER_HEADERS:
-                self.headers = {
-                    "Authorization": f"Bearer {self.encryption_service.decrypt_data(self.token.token)}"
-                }
+                self.headers = {"Authorization": f"Bearer {self._decrypted_token()}"}
             case AuthType.COOKIES:
                 pass
 
-    def _refresh_token(self, tokenRepo: ProviderTokenRepository) -> None:
+    @classmethod
+    def for_session(cls: type[C], user: User, session: SessionType) -> C:
+        """
+        Returns the user's client for this provider, shared by everything using
+        the session. The provider and token are loaded and decrypted once per
+        session, and the token is refreshed when the shared client is reused
+        after it expired. invalidate_api_clients() drops the shared clients.
+        """
+        clients: dict[tuple[type[APIClient], uuid.UUID], APIClient] = (
+            session.info.setdefault(API_CLIENTS, {})
+        )
+        client = clients.get((cls, user.id))
+        if client is None:
+            client = clients[(cls, user.id)] = cls(user, session)
+        else:
+            client.ensure_fresh_token()
+        return cast(C, client)
+
+    def detached(self: C) -> C:
+        """
+        Returns a copy of the client for making requests from other threads,
+        e.g. through fan_out(). The token is refreshed and the auth headers
+        are resolved here, on the calling thread. The copy has no database
+        session, user, token or encryption service, so it can only make HTTP
+        calls, which go through the thread-safe shared transport.
+        """
+        self.ensure_fresh_token()
+        client = copy.copy(self)
+        client.headers = dict(self.headers) if self.headers is not None else None
+        for attribute in ("session", "user", "token", "provider", "encryption_service"):
+            delattr(client, attribute)
+        return client
+
+    @property
+    def _token_key(self) -> TokenKey:
+        return (self.token.user_id, self.provider.id)
+
+    def _decrypted_token(self) -> str:
+        return token_refresher.plaintext(
+            self._token_key, self.token.token, self.encryption_service.decrypt_data
+        )
+
+    def ensure_fresh_token(self, margin: dt.timedelta = dt.timedelta(0)) -> None:
+        """
+        Refreshes the token if it expires within `margin`.
+        Refreshes are single-flight per token, see TokenRefresher.
+        """
+        expires_after = dt.datetime.now() + margin
+        if self.token.expires_at > expires_after:
+            return
+
+        refreshed = token_refresher.refresh(
+            self._token_key, expires_after, self._refresh_token
+        )
+        # Stored in its own transaction, so a rotated refresh token isn't
+        # lost if the caller's transaction rolls back
+        with session_scope() as session:
+            ProviderTokenRepository(session).save_refreshed(self._token_key, refreshed)
+        # Already stored, so the caller's session mustn't write it again
+        for column, value in refreshed.values().items():
+            set_committed_value(self.token, column, value)  # type: ignore
+        self._set_auth_headers()
+
+    def _refresh_token(self) -> RefreshedToken:
+        """
+        Requests a new token from the provider, returning it encrypted.
+        Only called through ensure_fresh_token().
+        """
         config = self.provider.config
         if not is_oauth_config(config):
             raise Exception("Attempting to refresh token for non-OAuth provider")
         url = config.build_refresh_token_url(
             self.encryption_service.decrypt_data(self.token.refresh_token)
         )
-        res = requests.post(url)
+        res = transport.request("POST", url, timeout=self.timeout)
         if res.status_code != 200:
             raise APIException(
                 type(self).__name__, url, res.status_code, "Error refreshing token"
             )
         data = res.json()
 
-        self.token.token = data["access_token"]
-        self.token.expires_at = dt.datetime.now() + dt.timedelta(
-            seconds=data["expires_in"]
+        refresh_token = data.get("refresh_token")
+        return RefreshedToken(
+            token=self.encryption_service.encrypt_data(data["access_token"]),
+            expires_at=dt.datetime.now() + dt.timedelta(seconds=data["expires_in"]),
+            refresh_token=(
+                self.encryption_service.encrypt_data(refresh_token)
+                if refresh_token
+                else None
+            ),
         )
-        tokenRepo.update(self.token)
 
     @request_handler
     def _request(
@@ -232,9 +330,16 @@ class APIClient(ABC):
         elif self.headers is not None:
             headers = {**self.headers, **headers}
 
-        request_method = getattr(requests, method.lower())
-        return request_method(
-            url, params=params, data=data, headers=headers, json=json, cookies=cookies
+        return transport.request(
+            method,
+            url,
+            timeout=self.timeout,
+            pool_maxsize=self.pool_maxsize,
+            params=params,
+            data=data,
+            headers=headers,
+            json=json,
+            cookies=cookies,
         )
 
     def _get(self, endpoint: str, params: Optional[RequestParams] = None) -> Any:
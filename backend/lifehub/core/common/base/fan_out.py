@@ -0,0 +1,41 @@
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Callable, Iterator, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def fan_out(
+    fn: Callable[[T], R], items: Sequence[T], max_workers: int, timeout: float
+) -> Iterator[tuple[T, R | BaseException]]:
+    """
+    Calls fn on each item on up to max_workers threads, yielding
+    (item, result) as the calls complete.
+
+    A failed call yields its exception instead of a result, so one failing
+    item doesn't lose the others. Calls still running `timeout` seconds
+    after the first one started yield a TimeoutError and are abandoned;
+    they finish in the background without being waited for.
+    """
+    if not items:
+        return
+    executor = ThreadPoolExecutor(
+        max_workers=min(max_workers, len(items)), thread_name_prefix="fan-out"
+    )
+    futures: dict[Future[R], T] = {executor.submit(fn, item): item for item in items}
+    pending = set(futures)
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            pending.discard(future)
+            error = future.exception()
+            yield futures[future], future.result() if error is None else error
+    except TimeoutError:
+        for future in pending:
+            error = (
+                future.exception()
+                if future.done()
+                else TimeoutError(f"No result after {timeout}s")
+            )
+            yield futures[future], future.result() if error is None else error
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) timeout in seconds
+Timeout = tuple[float, float]
+
+DEFAULT_TIMEOUT: Timeout = (5, 30)
+DEFAULT_POOL_MAXSIZE = 10
+
+
+class HTTPTransport:
+    """
+    Shared HTTP transport for provider API clients.
+
+    Keeps one requests.Session per host, so keep-alive connections are reused
+    across API client instances, users and requests instead of opening a new
+    TCP/TLS connection for every call. Sessions never store cookies, since they
+    are shared between users; cookies must be passed with each request.
+    Without cookies a session keeps no per-request state, and its connection
+    pools are thread-safe, so the transport can be used from any thread.
+    """
+
+    def __init__(self) -> None:
+        self._sessions: dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def session(
+        self, url: str, pool_maxsize: int = DEFAULT_POOL_MAXSIZE
+    ) -> requests.Session:
+        """
+        Get the pooled session for the host of the given URL.
+        The pool size is set by the first client to reach that host.
+        """
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        if host not in self._sessions:
+            with self._lock:
+                if host not in self._sessions:
+                    self._sessions[host] = self._create_session(host, pool_maxsize)
+        return self._sessions[host]
+
+    def _create_session(self, host: str, pool_maxsize: int) -> requests.Session:
+        session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        # Retries are handled by the API client's retry policy
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0
+        )
+        session.mount(host, adapter)
+        return session
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        timeout: Timeout = DEFAULT_TIMEOUT,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        **kwargs: Any,
+    ) -> requests.Response:
+        return self.session(url, pool_maxsize).request(
+            method, url, timeout=timeout, **kwargs
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+transport = HTTPTransport()
@@ -1,23 +1,43 @@
 from __future__ import annotations
 
+import base64
+import datetime as dt
+import decimal
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Generic, List, Sequence, TypeVar
+from typing import Any, Generic, List, Optional, Sequence, TypeVar
 
 from pydantic import BaseModel, Field
-from sqlalchemy import Select, func, select
-from sqlalchemy.orm import Session
+from sqlalchemy import ColumnElement, Select, and_, func, or_, select
+from sqlalchemy.orm import QueryableAttribute, Session
 
 T = TypeVar("T")
 
+# A column of the unique ordering used for keyset pagination
+KeysetColumn = ColumnElement[Any] | QueryableAttribute[Any]
+
 
 class PaginatedRequest(BaseModel):
     """Base class for paginated requests.
 
     This class can be extended by other request models to add pagination parameters.
+    Repositories that paginate over a keyset use `cursor` instead of `page`.
     """
 
     page: int = Field(1, ge=1)
     page_size: int = Field(20, ge=1, le=100)
+    cursor: Optional[str] = Field(
+        None,
+        description="next_cursor of the previous page, omitted for the first page.",
+    )
+    include_total: bool = Field(
+        True,
+        description="Whether to count all matching items.",
+    )
 
     @property
     def offset(self) -> int:
@@ -36,24 +56,38 @@ class PaginationInfo:
 
     page: int
     page_size: int
-    total_items: int
-    total_pages: int
+    total_items: Optional[int]
+    total_pages: Optional[int]
+    has_next: bool
+    has_prev: bool
+    next_cursor: Optional[str] = None
 
     @classmethod
     def from_request(
-        cls, request: PaginatedRequest, total_items: int
+        cls,
+        request: PaginatedRequest,
+        total_items: Optional[int],
+        has_next: Optional[bool] = None,
+        next_cursor: Optional[str] = None,
     ) -> PaginationInfo:
         """Create pagination info from a request and total items count."""
-        total_pages = (
-            (total_items + request.page_size - 1) // request.page_size
-            if total_items > 0
-            else 1
-        )
+        total_pages = None
+        if total_items is not None:
+            total_pages = (
+                (total_items + request.page_size - 1) // request.page_size
+                if total_items > 0
+                else 1
+            )
+            if has_next is None:
+                has_next = request.page < total_pages
         return cls(
             page=request.page,
             page_size=request.page_size,
             total_items=total_items,
             total_pages=total_pages,
+            has_next=bool(has_next),
+            has_prev=request.cursor is not None or request.page > 1,
+            next_cursor=next_cursor,
         )
 
 
@@ -66,23 +100,178 @@ class PaginatedResponse(Generic[T]):
 
     @classmethod
     def from_request(
-        cls, request: PaginatedRequest, items: List[T], total_items: int
+        cls,
+        request: PaginatedRequest,
+        items: List[T],
+        total_items: Optional[int],
+        has_next: Optional[bool] = None,
+        next_cursor: Optional[str] = None,
     ) -> PaginatedResponse[T]:
         """Create a paginated response from a request, items, and total count."""
         return cls(
-            items=items, pagination=PaginationInfo.from_request(request, total_items)
+            items=items,
+            pagination=PaginationInfo.from_request(
+                request, total_items, has_next, next_cursor
+            ),
         )
 
 
+class InvalidCursorError(ValueError):
+    pass
+
+
+_CURSOR_TYPES: dict[str, Any] = {
+    "datetime": dt.datetime.fromisoformat,
+    "date": dt.date.fromisoformat,
+    "uuid": uuid.UUID,
+    "decimal": decimal.Decimal,
+    "int": int,
+    "float": float,
+    "str": str,
+}
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the key values of the last item of a page as an opaque cursor."""
+    encoded: list[list[Any]] = []
+    for value in values:
+        match value:
+            case dt.datetime():
+                encoded.append(["datetime", value.isoformat()])
+            case dt.date():
+                encoded.append(["date", value.isoformat()])
+            case uuid.UUID():
+                encoded.append(["uuid", str(value)])
+            case decimal.Decimal():
+                encoded.append(["decimal", str(value)])
+            case bool() | int():
+                encoded.append(["int", int(value)])
+            case float():
+                encoded.append(["float", value])
+            case _:
+                encoded.append(["str", str(value)])
+    return base64.urlsafe_b64encode(json.dumps(encoded).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    try:
+        encoded = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return [_CURSOR_TYPES[type_](value) for type_, value in encoded]
+    except (ValueError, TypeError, KeyError, decimal.InvalidOperation):
+        raise InvalidCursorError("Invalid cursor")
+
+
+class CountCache:
+    """
+    Short-lived cache of COUNT(*) results, keyed by the compiled count query.
+    Totals may be up to `ttl` seconds stale; callers that change the counted
+    rows can clear() it.
+    """
+
+    def __init__(self, ttl: int = 60, max_size: int = 1024) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(query: Select[Any]) -> str:
+        compiled = query.compile()
+        return f"{compiled}|{sorted(compiled.params.items())!r}"
+
+    def get(self, key: str) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: str, total: int) -> None:
+        with self._lock:
+            self._entries[key] = (total, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def count_total(
+    session: Session, query: Select[Any], count_cache: Optional[CountCache] = None
+) -> int:
+    """Count the rows of a query, using the cache if one is given."""
+    count_query = select(func.count()).select_from(query.order_by(None).subquery())
+    if count_cache is None:
+        return session.execute(count_query).scalar() or 0
+
+    key = CountCache.key(count_query)
+    total = count_cache.get(key)
+    if total is None:
+        total = session.execute(count_query).scalar() or 0
+        count_cache.put(key, total)
+    return total
+
+
+def _keyset_condition(
+    keyset: Sequence[KeysetColumn], values: Sequence[Any], descending: bool
+) -> ColumnElement[bool]:
+    """Rows strictly after `values` in the (keyset) order."""
+    conditions = []
+    for i, column in enumerate(keyset):
+        after = column < values[i] if descending else column > values[i]
+        conditions.append(and_(*(keyset[j] == values[j] for j in range(i)), after))
+    return or_(*conditions)
+
+
 def paginate_query(
-    session: Session, query: Select[Any], request: PaginatedRequest
-) -> tuple[Sequence[Any], int]:
-    # Execute count query
-    count_query = select(func.count()).select_from(query.subquery())
-    total = session.execute(count_query).scalar() or 0
+    session: Session,
+    query: Select[Any],
+    request: PaginatedRequest,
+    keyset: Optional[Sequence[KeysetColumn]] = None,
+    descending: bool = False,
+    count_cache: Optional[CountCache] = None,
+) -> tuple[Sequence[Any], PaginationInfo]:
+    """
+    Paginate a query, fetching one extra row to know if there is a next page.
+
+    Without a keyset, pages are selected with OFFSET/LIMIT from request.page.
+    With a keyset (columns that uniquely order the rows, e.g. (date, id)),
+    pages start after request.cursor instead, so deep pages cost the same
+    as the first one. The keyset is then the only ordering of the rows, any
+    ORDER BY already on the query is replaced by it.
+    The total is only counted if request.include_total.
+    """
+    if keyset is None:
+        paginated_query = query.offset(request.offset)
+    else:
+        # The key values are selected after the items to build the next cursor
+        paginated_query = (
+            query.add_columns(*keyset)
+            .order_by(None)
+            .order_by(
+                *(column.desc() if descending else column.asc() for column in keyset)
+            )
+        )
+        if request.cursor is not None:
+            values = decode_cursor(request.cursor)
+            if len(values) != len(keyset):
+                raise InvalidCursorError("Invalid cursor")
+            paginated_query = paginated_query.where(
+                _keyset_condition(keyset, values, descending)
+            )
+
+    rows = session.execute(paginated_query.limit(request.limit + 1)).all()
+    has_next = len(rows) > request.limit
+    rows = rows[: request.limit]
+
+    next_cursor = None
+    if keyset is not None and has_next:
+        next_cursor = encode_cursor(rows[-1][-len(keyset) :])
 
-    # Apply pagination
-    paginated_query = query.offset(request.offset).limit(request.limit)
-    results = session.execute(paginated_query).scalars().all()
+    results = [row[0] for row in rows]
+    total = count_total(session, query, count_cache) if request.include_total else None
 
-    return results, total
+    return results, PaginationInfo.from_request(request, total, has_next, next_cursor)
@@ -4,6 +4,8 @@ from sqlalchemy import Select, select
 from sqlalchemy.orm import Session
 
 from lifehub.core.common.base.pagination import (
+    CountCache,
+    KeysetColumn,
     PaginatedRequest,
     PaginatedResponse,
     paginate_query,
@@ -25,13 +27,22 @@ class BaseRepository(Generic[BaseModelType]):
         return result.scalars().all()
 
     def get_paginated(
-        self, request: PaginatedRequest, query: Optional[Select[Any]] = None
+        self,
+        request: PaginatedRequest,
+        query: Optional[Select[Any]] = None,
+        keyset: Optional[Sequence[KeysetColumn]] = None,
+        descending: bool = False,
+        count_cache: Optional[CountCache] = None,
     ) -> PaginatedResponse[BaseModelType]:
         """Get paginated results.
 
         Args:
             request: Pagination parameters
             query: Optional custom query. If not provided, selects all records from the model.
+            keyset: Optional columns that uniquely order the results (e.g. date, id).
+                If provided, pages are selected with request.cursor instead of an offset.
+            descending: Whether the keyset is ordered in descending order
+            count_cache: Optional cache for the total count
 
         Returns:
             Paginated response with items and pagination metadata
@@ -39,9 +50,11 @@ class BaseRepository(Generic[BaseModelType]):
         if query is None:
             query = select(self.model)
 
-        items, total = paginate_query(self.session, query, request)
+        items, pagination = paginate_query(
+            self.session, query, request, keyset, descending, count_cache
+        )
 
-        return PaginatedResponse.from_request(request, list(items), total)
+        return PaginatedResponse(items=list(items), pagination=pagination)
 
     def update(self, obj: BaseModelType) -> None:
         self.session.add(obj)
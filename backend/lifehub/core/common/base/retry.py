@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import datetime as dt
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import requests
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries across all API clients in the process.
+    Every request deposits `ratio` tokens and every retry spends one, so retries
+    can't exceed a fraction of the traffic when a provider is failing.
+    A small number of retries per second is always allowed for low traffic.
+    """
+
+    def __init__(
+        self, ratio: float = 0.2, min_per_second: float = 1, max_tokens: float = 50
+    ) -> None:
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, tokens: float) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(
+            self.max_tokens, self._tokens + tokens + elapsed * self.min_per_second
+        )
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._refill(self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            self._refill(0)
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+retry_budget = RetryBudget()
+
+
+def parse_retry_after(res: requests.Response) -> Optional[float]:
+    """
+    Parse the Retry-After header, given either in seconds or as an HTTP date.
+    """
+    value = res.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=dt.timezone.utc)
+    return max((retry_at - dt.datetime.now(dt.timezone.utc)).total_seconds(), 0)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Decides whether and when a failed request is retried.
+
+    Only idempotent methods are retried, and only on connection errors,
+    429 or 5xx responses. Waits use decorrelated jitter unless the provider
+    sends a Retry-After header. A request gives up instead of waiting past
+    its deadline, or when the shared retry budget is exhausted.
+
+    next_wait() only computes the wait, so callers decide how to sleep.
+    """
+
+    max_attempts: int = 5
+    base_delay: float = 0.5
+    max_delay: float = 10
+    deadline: float = 30  # seconds, for the request including its retries
+    budget: RetryBudget = field(default=retry_budget)
+
+    def backoff(self, previous_delay: float) -> float:
+        return min(
+            self.max_delay,
+            random.uniform(self.base_delay, max(previous_delay, self.base_delay) * 3),
+        )
+
+    def is_retryable(self, method: str, res: Optional[requests.Response]) -> bool:
+        if method.upper() not in IDEMPOTENT_METHODS:
+            return False
+        return res is None or res.status_code in RETRYABLE_STATUS_CODES
+
+    def next_wait(
+        self,
+        method: str,
+        res: Optional[requests.Response],
+        attempt: int,
+        previous_delay: float,
+        deadline: float,
+    ) -> Optional[float]:
+        """
+        Returns how long to wait before the next attempt, or None to give up.
+
+        :param res: The failed response, or None if the request didn't complete.
+        :param attempt: Number of attempts made so far.
+        :param previous_delay: The previous wait, used for the jitter.
+        :param deadline: time.monotonic() value after which no retry may start.
+        """
+        if attempt >= self.max_attempts or not self.is_retryable(method, res):
+            return None
+
+        wait = parse_retry_after(res) if res is not None else None
+        if wait is None:
+            wait = self.backoff(previous_delay)
+
+        if time.monotonic() + wait > deadline:
+            return None
+        if not self.budget.try_spend():
+            return None
+        return wait
@@ -0,0 +1,82 @@
+import datetime as dt
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+# (token owner id, provider id)
+TokenKey = tuple[uuid.UUID, str]
+
+
+@dataclass
+class RefreshedToken:
+    """The encrypted result of a token refresh."""
+
+    token: bytes
+    expires_at: dt.datetime
+    # Only set if the provider rotated the refresh token
+    refresh_token: Optional[bytes] = None
+
+    def values(self) -> dict[str, Any]:
+        """The ProviderToken columns to update."""
+        values: dict[str, Any] = {"token": self.token, "expires_at": self.expires_at}
+        if self.refresh_token is not None:
+            values["refresh_token"] = self.refresh_token
+        return values
+
+
+class TokenRefresher:
+    """
+    Coordinates provider token refreshes between the threads of the process.
+
+    Refreshes are single-flight per (user, provider): callers that find the
+    token expired while a refresh is in flight wait for it and reuse its
+    result, instead of each calling the provider's token endpoint (which can
+    also revoke the refresh token the others are using).
+    Decrypted tokens are cached per ciphertext, so clients built for a token
+    that didn't change don't decrypt it again.
+    """
+
+    def __init__(self) -> None:
+        self._locks: dict[TokenKey, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self._refreshed: dict[TokenKey, RefreshedToken] = {}
+        self._plaintexts: dict[TokenKey, tuple[bytes, str]] = {}
+
+    def _lock(self, key: TokenKey) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def refresh(
+        self,
+        key: TokenKey,
+        expires_after: dt.datetime,
+        refresh: Callable[[], RefreshedToken],
+    ) -> RefreshedToken:
+        """
+        Returns a token valid past `expires_after`, only calling refresh()
+        if no other thread has already refreshed one.
+        """
+        with self._lock(key):
+            token = self._refreshed.get(key)
+            if token is None or token.expires_at <= expires_after:
+                token = self._refreshed[key] = refresh()
+            return token
+
+    def plaintext(
+        self, key: TokenKey, token: bytes, decrypt: Callable[[bytes], str]
+    ) -> str:
+        cached = self._plaintexts.get(key)
+        if cached is not None and cached[0] == token:
+            return cached[1]
+        plaintext = decrypt(token)
+        self._plaintexts[key] = (token, plaintext)
+        return plaintext
+
+    def invalidate(self, key: TokenKey) -> None:
+        """Forget the refreshed and decrypted token, e.g. after it was replaced."""
+        self._refreshed.pop(key, None)
+        self._plaintexts.pop(key, None)
+
+
+token_refresher = TokenRefresher()
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Generator
 
 import hvac
 from sqlalchemy import create_engine
@@ -13,7 +16,7 @@ if TYPE_CHECKING:
     from sqlalchemy.orm import Session
 
 
-def get_db_credentials(admin: bool = False) -> dict[str, str]:
+def get_db_credentials(admin: bool = False) -> dict[str, Any]:
     """
     Fetch dynamic credentials from Vault.
     """
@@ -27,21 +30,166 @@ def get_db_credentials(admin: bool = False) -> dict[str, str]:
     return {
         "username": creds["data"]["username"],
         "password": creds["data"]["password"],
+        "lease_id": creds["lease_id"],
+        "lease_duration": creds["lease_duration"],
+        "renewable": creds["renewable"],
     }
 
 
+class DatabaseEngine:
+    """
+    Process-wide SQLAlchemy engine backed by Vault dynamic credentials.
+
+    A single pooled engine is shared by every session in the process.
+    A background thread renews the Vault lease of the credentials and,
+    once the lease can no longer be extended, swaps in a new engine with
+    fresh credentials. Sessions that are already open keep their connection
+    until they are closed; new sessions use the new engine.
+    """
+
+    def __init__(self, admin: bool = False) -> None:
+        self.admin = admin
+        self._stopped = threading.Event()
+        self._sessionmaker = sessionmaker()
+        self._engine, self._lease = self._create_engine()
+        threading.Thread(target=self._manage_lease, daemon=True).start()
+
+    @property
+    def engine(self) -> Engine:
+        return self._engine
+
+    def session(self) -> Session:
+        return self._sessionmaker(bind=self._engine)
+
+    def _create_engine(self) -> tuple[Engine, dict[str, Any]]:
+        creds = get_db_credentials(self.admin)
+        db_url = f"mariadb+mariadbconnector://{creds['username']}:{creds['password']}@{cfg.DB_HOST}:3306/{cfg.DB_NAME}"
+        engine = create_engine(
+            db_url,
+            pool_size=cfg.DB_POOL_SIZE,
+            max_overflow=cfg.DB_MAX_OVERFLOW,
+            pool_timeout=cfg.DB_POOL_TIMEOUT,
+            pool_recycle=cfg.DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+        lease = {
+            "lease_id": creds["lease_id"],
+            "renewable": creds["renewable"],
+            "expires_at": time.monotonic() + creds["lease_duration"],
+        }
+        return engine, lease
+
+    def _rotate_credentials(self) -> None:
+        """
+        Replace the engine with one using new credentials.
+        Connections checked out from the old pool are closed when returned.
+        """
+        old_engine = self._engine
+        self._engine, self._lease = self._create_engine()
+        old_engine.dispose()
+
+    def _renew_lease(self) -> bool:
+        """
+        Try to extend the current lease.
+        Returns False if the lease can't be extended past DB_LEASE_MIN_TTL.
+        """
+        if not self._lease["renewable"]:
+            return False
+        client = hvac.Client(url=cfg.VAULT_ADDR, token=cfg.VAULT_TOKEN)
+        try:
+            res = client.sys.renew_lease(lease_id=self._lease["lease_id"])
+        except hvac.exceptions.VaultError:
+            return False
+        lease_duration: int = res["lease_duration"]
+        self._lease["expires_at"] = time.monotonic() + lease_duration
+        return lease_duration > cfg.DB_LEASE_MIN_TTL
+
+    def _manage_lease(self) -> None:
+        """Renew the lease at half its remaining time, rotating when needed."""
+        while not self._stopped.is_set():
+            remaining = self._lease["expires_at"] - time.monotonic()
+            if self._stopped.wait(max(remaining / 2, 1)):
+                break
+            try:
+                if not self._renew_lease():
+                    self._rotate_credentials()
+            except Exception as e:
+                # Keep the current engine; it's retried on the next iteration
+                print(f"Database lease renewal failed: {e}")
+
+    def close(self) -> None:
+        """Stop the lease manager, close the pool and revoke the credentials."""
+        self._stopped.set()
+        self._engine.dispose()
+        client = hvac.Client(url=cfg.VAULT_ADDR, token=cfg.VAULT_TOKEN)
+        try:
+            client.sys.revoke_lease(lease_id=self._lease["lease_id"])  # type: ignore
+        except hvac.exceptions.VaultError:
+            pass
+
+
+_databases: dict[bool, DatabaseEngine] = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(admin: bool = False) -> DatabaseEngine:
+    """
+    Get the process-wide database engine, creating it on first use.
+    """
+    if admin not in _databases:
+        with _databases_lock:
+            if admin not in _databases:
+                _databases[admin] = DatabaseEngine(admin)
+    return _databases[admin]
+
+
+def close_databases() -> None:
+    """
+    Close every database engine created by this process.
+    """
+    with _databases_lock:
+        for database in _databases.values():
+            database.close()
+        _databases.clear()
+
+
 def get_engine(admin: bool = False) -> Engine:
     """
-    Create a SQLAlchemy engine with dynamic credentials.
+    Get the shared SQLAlchemy engine.
     """
-    creds = get_db_credentials(admin)
-    db_url = f"mariadb+mariadbconnector://{creds['username']}:{creds['password']}@{cfg.DB_HOST}:3306/{cfg.DB_NAME}"
-    return create_engine(db_url)
+    return get_database(admin).engine
 
 
 def get_session() -> Session:
     """
-    Create a new database session dynamically.
+    Create a new database session from the shared connection pool.
+    The caller is responsible for closing it.
+    """
+    return get_database().session()
+
+
+@contextmanager
+def session_scope() -> Generator[Session, None, None]:
+    """
+    Provide a session wrapping a single unit of work.
+    Changes are committed if the block succeeds and rolled back if it raises.
+    The session is always closed, returning its connection to the pool.
+    """
+    session = get_session()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def get_db_session() -> Generator[Session, None, None]:
+    """
+    FastAPI dependency that provides one unit of work per request.
+    Services should flush rather than commit; the request commits once at the end.
     """
-    engine = get_engine()
-    return sessionmaker(bind=engine)()
+    with session_scope() as session:
+        yield session
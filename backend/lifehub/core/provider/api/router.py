@@ -10,14 +10,14 @@ router = APIRouter(
 
 
 @router.get("")
-async def get_providers(
+def get_providers(
     provider_service: ProviderServiceDep,
 ) -> list[ProviderResponse]:
     return provider_service.get_providers()
 
 
 @router.get("/{provider_id}/oauth_url")
-async def oauth_authorization_url(
+def oauth_authorization_url(
     provider: ProviderDep,
     provider_service: ProviderServiceDep,
 ) -> str:
@@ -1,7 +1,11 @@
-from sqlalchemy import select
+import datetime as dt
+import uuid
+
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
 from lifehub.core.common.base.repository.base import BaseRepository
+from lifehub.core.common.base.token_refresh import RefreshedToken, TokenKey
 from lifehub.core.provider.schema import Provider, ProviderToken
 from lifehub.core.user.schema import User
 
@@ -15,3 +19,28 @@ class ProviderTokenRepository(BaseRepository[ProviderToken]):
             ProviderToken.user_id == user.id, ProviderToken.provider_id == provider.id
         )
         return self.session.execute(stmt).scalar_one_or_none()
+
+    def get_expiring(self, before: dt.datetime) -> list[tuple[uuid.UUID, str]]:
+        """
+        Returns the (user_id, provider_id) of refreshable tokens expiring before
+        the given time.
+        """
+        stmt = select(ProviderToken.user_id, ProviderToken.provider_id).where(
+            ProviderToken.expires_at < before,
+            ProviderToken.refresh_token.is_not(None),
+        )
+        return [(row.user_id, row.provider_id) for row in self.session.execute(stmt)]
+
+    def save_refreshed(self, key: TokenKey, refreshed: RefreshedToken) -> None:
+        """
+        Stores a refreshed token, keeping the refresh token unless it rotated.
+        """
+        user_id, provider_id = key
+        self.session.execute(
+            update(ProviderToken)
+            .where(
+                ProviderToken.user_id == user_id,
+                ProviderToken.provider_id == provider_id,
+            )
+            .values(refreshed.values())
+        )
@@ -1,10 +1,10 @@
 import base64 as b64
 import datetime as dt
 
-import requests
 from sqlalchemy.orm import Session
 
 from lifehub.config.constants import cfg
+from lifehub.core.common.base.http_transport import transport
 from lifehub.core.common.base.service.base import BaseService
 from lifehub.core.common.exceptions import ServiceException
 from lifehub.core.provider.models import ProviderResponse
@@ -113,7 +113,7 @@ class ProviderService(BaseService):
                 "redirect_uri": cfg.OAUTH_REDIRECT_URI,
             }
 
-        res = requests.post(url, data=data, params=params, headers=headers)
+        res = transport.request("POST", url, data=data, params=params, headers=headers)
         if res.status_code != 200:
             raise ProviderServiceException(res.status_code, res.text)
 
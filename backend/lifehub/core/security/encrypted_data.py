@@ -1,11 +1,89 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Generic, Protocol, TypeVar, cast, overload
 
+from sqlalchemy.orm import object_session
 from sqlalchemy.types import VARBINARY, TypeDecorator
 
 if TYPE_CHECKING:
-    pass
+    from sqlalchemy.orm import Session
+
+T = TypeVar("T", bound=str | None)
+
+# session.info keys, see bind_key_context
+KEY_CONTEXT = "encryption_key_context"
+PLAINTEXT_CACHE = "encryption_plaintext_cache"
+
+
+class KeyContext(Protocol):
+    """The encryption interface of EncryptionService used by Plaintext."""
+
+    def encrypt_data(self, data: str) -> bytes: ...
+
+    def decrypt_data(self, data: bytes) -> str: ...
+
+
+def bind_key_context(session: Session, key_context: KeyContext) -> None:
+    """
+    Bind a user's key context to the session, enabling Plaintext attributes
+    on the rows loaded by it. Plaintexts are memoized for the session's lifetime.
+    """
+    session.info[KEY_CONTEXT] = key_context
+    session.info.setdefault(PLAINTEXT_CACHE, {})
+
+
+class Plaintext(Generic[T]):
+    """
+    Lazy, memoized access to the plaintext of an encrypted column.
+
+    Declared on a model next to the column, e.g.
+    description_text = Plaintext[str | None]("description"). The column is
+    only decrypted the first time the attribute is read, using the key context
+    bound to the row's session (see bind_key_context). The plaintext is memoized per
+    ciphertext, so repeated reads in the same session are free and a changed
+    column is never served stale. Assigning a string encrypts it into the column.
+    """
+
+    def __init__(self, column: str) -> None:
+        self.column = column
+
+    def _session_context(self, obj: Any) -> tuple[KeyContext, dict[bytes, str]]:
+        session = object_session(obj)
+        if session is None or KEY_CONTEXT not in session.info:
+            raise RuntimeError(
+                f"{type(obj).__name__}.{self.column} needs a session with a bound key context"
+            )
+        return session.info[KEY_CONTEXT], session.info[PLAINTEXT_CACHE]
+
+    @overload
+    def __get__(self, obj: None, objtype: Any = None) -> Plaintext[T]: ...
+
+    @overload
+    def __get__(self, obj: object, objtype: Any = None) -> T: ...
+
+    def __get__(self, obj: object | None, objtype: Any = None) -> Plaintext[T] | T:
+        if obj is None:
+            return self
+        ciphertext: bytes | None = getattr(obj, self.column)
+        if ciphertext is None:
+            return cast(T, None)
+
+        key_context, cache = self._session_context(obj)
+        plaintext = cache.get(ciphertext)
+        if plaintext is None:
+            plaintext = key_context.decrypt_data(ciphertext)
+            cache[ciphertext] = plaintext
+        return cast(T, plaintext)
+
+    def __set__(self, obj: object, value: str | None) -> None:
+        if value is None:
+            setattr(obj, self.column, None)
+            return
+
+        key_context, cache = self._session_context(obj)
+        ciphertext = key_context.encrypt_data(value)
+        cache[ciphertext] = value
+        setattr(obj, self.column, ciphertext)
 
 
 class EncryptedDataType(TypeDecorator[bytes]):
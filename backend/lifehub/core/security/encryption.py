@@ -2,13 +2,15 @@ import base64
 import hashlib
 import hmac
 import os
-from typing import overload
+from typing import Any, Sequence, overload
 
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from sqlalchemy.orm import Session
 
 from lifehub.core.common.base.service.user import BaseUserService
 from lifehub.core.common.exceptions import ServiceException
+from lifehub.core.security.encrypted_data import bind_key_context
+from lifehub.core.security.key_cache import data_key_cache
 from lifehub.core.security.vault import VaultService
 from lifehub.core.user.schema import User
 
@@ -20,25 +22,43 @@ class EncryptionServiceException(ServiceException):
 
 class EncryptionService(BaseUserService):
     # Lazy load
-    _user_data_key: str | None = None
+    _vault: VaultService | None = None
     _aesgcm: AESGCM | None = None
 
     def __init__(self, session: Session, user: User) -> None:
         super().__init__(session, user)
-        self.vault = VaultService(session, user)
 
     @property
-    def user_data_key(self) -> str:
-        if self._user_data_key is None:
-            self._user_data_key = self.vault.decrypt_user_dek(self.user.data_key)
-        return self._user_data_key
+    def vault(self) -> VaultService:
+        if self._vault is None:
+            self._vault = VaultService(self.session, self.user)
+        return self._vault
+
+    @property
+    def user_data_key(self) -> bytes:
+        """
+        The user's decrypted DEK.
+        Served from the shared key cache, so Vault is only called on a miss.
+        """
+        key = data_key_cache.get(self.user.id, self.user.data_key)
+        if key is None:
+            key = base64.b64decode(self.vault.decrypt_user_dek(self.user.data_key))
+            data_key_cache.put(self.user.id, self.user.data_key, key)
+        return key
 
     @property
     def aesgcm(self) -> AESGCM:
         if self._aesgcm is None:
-            self._aesgcm = AESGCM(base64.b64decode(self.user_data_key))
+            self._aesgcm = AESGCM(self.user_data_key)
         return self._aesgcm
 
+    def bind_to_session(self) -> None:
+        """
+        Opt in to lazy decryption: Plaintext attributes of rows in this
+        service's session decrypt with this user's key (see Plaintext).
+        """
+        bind_key_context(self.session, self)
+
     def _bytes_to_str(self, data: bytes) -> str:
         return base64.b64encode(data).decode("utf-8")
 
@@ -66,6 +86,9 @@ class EncryptionService(BaseUserService):
         using the user's key encryption key (KEK).
         """
         data_key: str = self._bytes_to_str(self._generate_aes_key())
+        # Any cached key belongs to the previous DEK
+        data_key_cache.invalidate(self.user.id)
+        self._aesgcm = None
         return self.vault.encrypt_user_dek(data_key)
 
     @overload
@@ -110,6 +133,77 @@ class EncryptionService(BaseUserService):
             None,
         ).decode("utf-8")
 
+    @overload
+    def encrypt_many(self, data: Sequence[str]) -> Sequence[bytes]: ...
+
+    @overload
+    def encrypt_many(self, data: Sequence[str | None]) -> Sequence[bytes | None]: ...
+
+    def encrypt_many(self, data: Sequence[str | None]) -> Sequence[bytes | None]:
+        """
+        Encrypt a batch of values, equivalent to calling encrypt_data on each.
+        The nonces come from a single urandom call and the cipher is looked up
+        once for the whole batch.
+        """
+        aesgcm = self.aesgcm
+        header = bytes([1])  # key_version, see encrypt_data
+        nonces = self._generate_random_bytes(12 * len(data))
+
+        result: list[bytes | None] = [None] * len(data)
+        for i, value in enumerate(data):
+            if value is None:
+                continue
+            nonce = nonces[12 * i : 12 * i + 12]
+            result[i] = (
+                header + nonce + aesgcm.encrypt(nonce, value.encode("utf-8"), None)
+            )
+        return result
+
+    @overload
+    def decrypt_many(self, data: Sequence[bytes]) -> Sequence[str]: ...
+
+    @overload
+    def decrypt_many(self, data: Sequence[bytes | None]) -> Sequence[str | None]: ...
+
+    def decrypt_many(self, data: Sequence[bytes | None]) -> Sequence[str | None]:
+        """
+        Decrypt a batch of values, equivalent to calling decrypt_data on each.
+        """
+        decrypt = self.aesgcm.decrypt
+
+        result: list[str | None] = [None] * len(data)
+        for i, value in enumerate(data):
+            if value is None:
+                continue
+            result[i] = decrypt(value[1:13], value[13:], None).decode("utf-8")
+        return result
+
+    def encrypt_columns(
+        self, rows: Sequence[dict[str, Any]], fields: Sequence[str]
+    ) -> None:
+        """
+        Encrypt the given fields of each row in place, one column at a time.
+        """
+        for field in fields:
+            values = self.encrypt_many([row[field] for row in rows])
+            for row, value in zip(rows, values):
+                row[field] = value
+
+    def decrypt_columns(
+        self, rows: Sequence[Any], fields: Sequence[str]
+    ) -> list[dict[str, str | None]]:
+        """
+        Decrypt the given encrypted attributes of a sequence of ORM rows.
+        Returns one dict of plaintext values per row.
+        """
+        columns = [
+            self.decrypt_many([getattr(row, field) for row in rows]) for field in fields
+        ]
+        return [
+            {field: column[i] for field, column in zip(fields, columns)}
+            for i in range(len(rows))
+        ]
+
     @staticmethod
     def hmac(text: str, secret_key: str) -> str:
         """
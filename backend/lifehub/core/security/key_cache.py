@@ -0,0 +1,71 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from lifehub.config.constants import cfg
+
+
+@dataclass
+class CachedDataKey:
+    key: bytearray
+    expires_at: float
+
+    def wipe(self) -> None:
+        """Overwrite the key material in place."""
+        self.key[:] = bytes(len(self.key))
+
+
+class DataKeyCache:
+    """
+    In-process cache of decrypted user data encryption keys (DEKs).
+    Entries are keyed by user ID and the encrypted DEK, so a rotated key
+    never matches a stale entry. The cache is bounded both by a TTL and
+    by a maximum size (least recently used entries are evicted first).
+    Evicted keys are wiped from memory.
+    """
+
+    def __init__(self, max_size: int, ttl: int) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[uuid.UUID, str], CachedDataKey] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: uuid.UUID, encrypted_key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get((user_id, encrypted_key))
+            if entry is None:
+                return None
+            if entry.expires_at < time.monotonic():
+                self._evict((user_id, encrypted_key))
+                return None
+            self._entries.move_to_end((user_id, encrypted_key))
+            return bytes(entry.key)
+
+    def put(self, user_id: uuid.UUID, encrypted_key: str, key: bytes) -> None:
+        with self._lock:
+            if (user_id, encrypted_key) in self._entries:
+                self._evict((user_id, encrypted_key))
+            self._entries[(user_id, encrypted_key)] = CachedDataKey(
+                key=bytearray(key), expires_at=time.monotonic() + self.ttl
+            )
+            while len(self._entries) > self.max_size:
+                self._evict(next(iter(self._entries)))
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        """Remove every cached key of a user, e.g. after a key rotation."""
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] == user_id]:
+                self._evict(cache_key)
+
+    def clear(self) -> None:
+        with self._lock:
+            for cache_key in list(self._entries):
+                self._evict(cache_key)
+
+    def _evict(self, cache_key: tuple[uuid.UUID, str]) -> None:
+        self._entries.pop(cache_key).wipe()
+
+
+data_key_cache = DataKeyCache(cfg.DEK_CACHE_SIZE, cfg.DEK_CACHE_TTL)
@@ -18,7 +18,7 @@ router = APIRouter()
 
 # Used to login in the Swagger UI
 @router.post("/api-login")
-async def user_api_login(
+def user_api_login(
     user_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     user_service: UserServiceDep,
 ) -> UserTokenResponse:
@@ -29,7 +29,7 @@ async def user_api_login(
 
 # Used to login in the frontend
 @router.post("/login")
-async def user_login(
+def user_login(
     user_data: LoginUserRequest,
     user_service: UserServiceDep,
 ) -> UserTokenResponse:
@@ -39,7 +39,7 @@ async def user_login(
 
 
 @router.post("/signup")
-async def user_signup(
+def user_signup(
     user_data: CreateUserRequest,
     user_service: UserServiceDep,
 ) -> None:
@@ -49,12 +49,12 @@ async def user_signup(
 
 
 @router.get("/me")
-async def get_user(user: UserDep, user_service: UserServiceDep) -> UserResponse:
+def get_user(user: UserDep, user_service: UserServiceDep) -> UserResponse:
     return user_service.get_user_data(user)
 
 
 @router.patch("/me")
-async def update_user(
+def update_user(
     user: UserDep,
     user_service: UserServiceDep,
     user_data: UpdateUserRequest,
@@ -65,12 +65,12 @@ async def update_user(
 
 
 @router.delete("/me")
-async def delete_user(user: UserDep, user_service: UserServiceDep) -> None:
+def delete_user(user: UserDep, user_service: UserServiceDep) -> None:
     user_service.delete_user(user)
 
 
 @router.post("/verify-email")
-async def verify_user(
+def verify_user(
     token: VerifyUserRequest,
     user_service: UserServiceDep,
 ) -> UserTokenResponse:
@@ -18,21 +18,21 @@ router = APIRouter(
 
 
 @router.get("")
-async def get_user_providers(
+def get_user_providers(
     user: UserDep, user_service: UserServiceDep
 ) -> list[ProviderResponse]:
     return user_service.get_user_providers(user)
 
 
 @router.get("/missing")
-async def get_missing_providers(
+def get_missing_providers(
     user: UserDep, user_service: UserServiceDep
 ) -> list[ProviderResponse]:
     return user_service.get_missing_providers(user)
 
 
 @router.delete("/{provider_id}")
-async def remove_user_provider(
+def remove_user_provider(
     user: UserDep,
     provider: ProviderDep,
     user_service: UserServiceDep,
@@ -41,7 +41,7 @@ async def remove_user_provider(
 
 
 @router.post("/{provider_id}/oauth_token")
-async def add_oauth_provider(
+def add_oauth_provider(
     provider: ProviderDep,
     user: UserDep,
     user_service: UserServiceDep,
@@ -63,7 +63,7 @@ async def add_oauth_provider(
 
 
 @router.post("/{provider_id}/basic_token")
-async def add_token_provider(
+def add_token_provider(
     provider: ProviderDep,
     user: UserDep,
     user_service: UserServiceDep,
@@ -77,7 +77,7 @@ async def add_token_provider(
 
 
 @router.patch("/{provider_id}/basic_token")
-async def update_basic_token(
+def update_basic_token(
     provider: ProviderDep,
     user: UserDep,
     user_service: UserServiceDep,
@@ -89,7 +89,7 @@ async def update_basic_token(
 
 
 @router.post("/{provider_id}/basic_login")
-async def add_basic_provider(
+def add_basic_provider(
     provider: ProviderDep,
     user: UserDep,
     user_service: UserServiceDep,
@@ -109,7 +109,7 @@ async def add_basic_provider(
 
 
 @router.patch("/{provider_id}/basic_login")
-async def update_basic_login(
+def update_basic_login(
     provider: ProviderDep,
     user: UserDep,
     user_service: UserServiceDep,
@@ -121,7 +121,7 @@ async def update_basic_login(
 
 
 @router.post("/{provider_id}/test")
-async def test_user_provider_connection(
+def test_user_provider_connection(
     provider: ProviderDep, user: UserDep, user_service: UserServiceDep
 ) -> None:
     user_service.test_provider_token(user, provider)
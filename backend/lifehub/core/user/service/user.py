@@ -7,14 +7,16 @@ from sqlalchemy.orm import Session
 
 from lifehub.config.constants import cfg
 from lifehub.config.providers import PROVIDER_CLIENTS
-from lifehub.core.common.base.api_client import APIClient
+from lifehub.core.common.base.api_client import APIClient, invalidate_api_clients
 from lifehub.core.common.base.service.base import BaseService
+from lifehub.core.common.base.token_refresh import token_refresher
 from lifehub.core.common.exceptions import ServiceException
 from lifehub.core.provider.models import ProviderResponse
 from lifehub.core.provider.repository.provider import ProviderRepository
 from lifehub.core.provider.repository.provider_token import ProviderTokenRepository
 from lifehub.core.provider.schema import Provider, ProviderToken
 from lifehub.core.security.encryption import EncryptionService
+from lifehub.core.security.key_cache import data_key_cache
 from lifehub.core.user.models import UserResponse, UserTokenResponse
 from lifehub.core.user.repository.user import UserRepository
 from lifehub.core.user.schema import User
@@ -59,16 +61,12 @@ class UserService(BaseService):
             encryption_service = EncryptionService(self.session, new_user)
             user_dek = encryption_service.generate_encrypted_data_key()
         except VaultError:
-            self.user_repository.delete(new_user)
-            self.user_repository.commit()
             raise UserServiceException(500, "Failed to create user")
 
         new_user.data_key = user_dek
         new_user.email = encryption_service.encrypt_data(email)
         new_user.name = encryption_service.encrypt_data(name)
 
-        self.session.commit()
-
         return new_user
 
     def create_access_token(self, user: User) -> UserTokenResponse:
@@ -147,7 +145,6 @@ class UserService(BaseService):
         user = self.authenticate_user(token)
 
         user.verified = True
-        self.user_repository.commit()
 
         return user
 
@@ -191,7 +188,6 @@ class UserService(BaseService):
     def update_user_verification(self, user: User) -> None:
         """Update a user's verification status. For admin use only."""
         self.user_repository.update(user)
-        self.user_repository.commit()
 
     def update_user(
         self, user: User, name: str | None, email: str | None, password: str | None
@@ -207,8 +203,6 @@ class UserService(BaseService):
         if password is not None:
             user.password = self.hash_password(password)
 
-        self.session.commit()
-
         return UserResponse(
             id=str(user.id),
             username=user.username,
@@ -221,7 +215,7 @@ class UserService(BaseService):
 
     def delete_user(self, user: User) -> None:
         self.user_repository.delete(user)
-        self.user_repository.commit()
+        data_key_cache.invalidate(user.id)
 
     def get_user_providers(self, user: User) -> list[ProviderResponse]:
         return [
@@ -257,7 +251,6 @@ class UserService(BaseService):
         if token is None:
             raise UserServiceException(404, "Token not found")
         self.provider_token_repository.delete(token)
-        self.user_repository.commit()
 
     def add_provider_token_to_user(
         self,
@@ -298,7 +291,6 @@ class UserService(BaseService):
         self.user_repository.add(user)
         if not skip_test:
             self.test_provider_token(user, provider)
-        self.session.commit()
         return provider_token
 
     def update_provider_token(
@@ -328,9 +320,10 @@ class UserService(BaseService):
             provider_token.expires_at = expires_at
         if custom_url is not None:
             provider_token.custom_url = custom_url
+        invalidate_api_clients(self.session, provider.id)
+        token_refresher.invalidate((user.id, provider.id))
 
         self.test_provider_token(user, provider)
-        self.provider_token_repository.commit()
         return provider_token
 
     def test_provider_token(self, user: User, provider: Provider) -> None:
@@ -340,6 +333,3 @@ class UserService(BaseService):
         api_client: APIClient = PROVIDER_CLIENTS[provider.id](user, self.session)  # type: ignore
         if not api_client.test_connection():
             raise UserServiceException(400, "Token is invalid")
-
-    def __del__(self) -> None:
-        self.user_repository.close()
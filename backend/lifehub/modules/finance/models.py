@@ -2,11 +2,13 @@ from __future__ import annotations
 
 import datetime as dt
 from typing import Optional
-from lifehub.modules.finance.schema import BudgetSubCategoryType
 
 from pydantic import BaseModel, Field
 from pydantic.dataclasses import dataclass
 
+from lifehub.core.common.base.pagination import PaginatedRequest
+from lifehub.modules.finance.schema import BudgetSubCategoryType
+
 
 @dataclass
 class T212BalanceResponse:
@@ -48,6 +50,19 @@ class BankTransactionResponse:
     subcategory_id: Optional[str]
 
 
+@dataclass
+class T212ExportJobResponse:
+    id: str
+    account_id: str
+    status: str
+    from_date: dt.datetime
+    to_date: dt.datetime
+    attempts: int
+    next_poll_at: dt.datetime
+    error: Optional[str]
+    updated_at: dt.datetime
+
+
 @dataclass
 class CountryResponse:
     code: str
@@ -70,8 +85,11 @@ class BankMonthlySummaryCategoryResponse:
 
 @dataclass
 class BankMonthlySummaryResponse:
+    year: int
+    month: int
     income: float
     expenses: float
+    balance: float
     categories: list[BankMonthlySummaryCategoryResponse]
 
 
@@ -123,7 +141,7 @@ class UpdateBankTransactionRequest:
     amount: Optional[float]
 
 
-class GetBankTransactionsRequest(BaseModel):
+class GetBankTransactionsRequest(PaginatedRequest):
     start_date: Optional[str] = Field(
         None,
         description="Start date in ISO format (YYYY-MM-DD).",
@@ -134,12 +152,16 @@ class GetBankTransactionsRequest(BaseModel):
     )
     subcategory_id: Optional[str] = None
     description: Optional[str] = None
+    page_size: int = Field(50, ge=1, le=100)
+    include_total: bool = False
 
 
 @dataclass
 class CreateBankTransactionFilterRequest:
     description: Optional[str]
     subcategory_id: Optional[str]
+    # Replaces the filter's match strings if given
+    matches: Optional[list[str]] = None
 
 
 @dataclass
@@ -150,6 +172,17 @@ class BankTransactionFilterResponse:
     description: Optional[str]
 
 
+@dataclass
+class RecategorizationStatusResponse:
+    status: str
+    total: int
+    scanned: int
+    updated: int
+    error: Optional[str]
+    started_at: dt.datetime
+    finished_at: Optional[dt.datetime]
+
+
 class T212ExportTransaction(BaseModel):
     action: str = Field(
         ...,
@@ -1,22 +1,50 @@
 import datetime as dt
 import uuid
-from typing import Optional
+from typing import Any, Iterator, Optional, Sequence
 
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    ColumnElement,
+    Row,
+    Select,
+    and_,
+    delete,
+    func,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.orm import Session, selectinload
 
+from lifehub.core.common.base.pagination import (
+    CountCache,
+    PaginatedRequest,
+    PaginatedResponse,
+)
 from lifehub.core.common.base.repository.base import BaseRepository
 from lifehub.core.common.base.repository.user_base import UserBaseRepository
 from lifehub.core.user.schema import User
 
 from .schema import (
+    AccountBalance,
     BankAccount,
     BankTransaction,
     BankTransactionFilter,
     BankTransactionFilterMatch,
+    BudgetAssignment,
     BudgetCategory,
+    BudgetRollover,
     BudgetSubCategory,
+    MonthlyCategorySummary,
+    MonthlySummary,
+    T212ExportJob,
+    T212ExportJobStatus,
 )
 
+# Transaction totals may lag new syncs by up to a minute
+transaction_counts = CountCache(ttl=60)
+
 
 class BankAccountRepository(UserBaseRepository[BankAccount]):
     def __init__(self, user: User, session: Session) -> None:
@@ -30,6 +58,35 @@ class BankAccountRepository(UserBaseRepository[BankAccount]):
         )
 
 
+class BankAccountSyncRepository(BaseRepository[BankAccount]):
+    """
+    Bank accounts of every user, used by the fetch daemon.
+    """
+
+    def __init__(self, session: Session) -> None:
+        super().__init__(BankAccount, session=session)
+
+    def get_due(
+        self, transactions_before: dt.datetime, balances_before: dt.datetime
+    ) -> list[tuple[uuid.UUID, uuid.UUID]]:
+        """
+        Get the (user_id, account_id) of accounts whose transactions or balance
+        were last synced before the given dates.
+        """
+        query = (
+            select(BankAccount.user_id, BankAccount.id)
+            .outerjoin(AccountBalance)
+            .where(
+                or_(
+                    BankAccount.last_synced < transactions_before,
+                    AccountBalance.last_synced < balances_before,
+                )
+            )
+            .order_by(BankAccount.last_synced)
+        )
+        return [(row.user_id, row.id) for row in self.session.execute(query)]
+
+
 class BankTransactionRepository(BaseRepository[BankTransaction]):
     def __init__(self, session: Session):
         super().__init__(BankTransaction, session=session)
@@ -43,6 +100,114 @@ class BankTransactionRepository(BaseRepository[BankTransaction]):
             .one_or_none()
         )
 
+    def insert_many(self, rows: list[dict[str, Any]]) -> None:
+        """
+        Insert a batch of transactions in a single executemany round trip,
+        without loading them into the session.
+        Transactions that already exist for the account (same transaction_id)
+        are left untouched, so re-syncing overlapping ranges is a no-op.
+        """
+        if rows:
+            statement = insert(BankTransaction)
+            statement = statement.on_duplicate_key_update(
+                transaction_id=statement.inserted.transaction_id
+            )
+            self.session.execute(statement, rows)
+
+    def update_many(self, rows: list[dict[str, Any]]) -> None:
+        """
+        Update a batch of transactions by id in a single executemany round trip.
+        Every row must have the id and the same set of columns.
+        Transactions already loaded in the session aren't refreshed.
+        """
+        if rows:
+            self.session.execute(update(BankTransaction), rows)
+
+    def get_categorization_chunk(
+        self, user: User, after_id: Optional[uuid.UUID], limit: int
+    ) -> Sequence[
+        Row[
+            tuple[
+                uuid.UUID,
+                Optional[bytes],
+                Optional[bytes],
+                Optional[bytes],
+                Optional[uuid.UUID],
+                dt.datetime,
+                bytes,
+            ]
+        ]
+    ]:
+        """
+        Get the columns used by filters for the next `limit` transactions of
+        the user, in id order, after `after_id`.
+        """
+        query = (
+            select(
+                BankTransaction.id,
+                BankTransaction.description,
+                BankTransaction.counterparty,
+                BankTransaction.user_description,
+                BankTransaction.subcategory_id,
+                BankTransaction.date,
+                BankTransaction.amount,
+            )
+            .join(BankTransaction.account)
+            .where(BankAccount.user_id == user.id)
+        )
+        if after_id is not None:
+            query = query.where(BankTransaction.id > after_id)
+        return self.session.execute(
+            query.order_by(BankTransaction.id).limit(limit)
+        ).all()
+
+    def count_for_user(self, user: User) -> int:
+        query = (
+            select(func.count())
+            .select_from(BankTransaction)
+            .join(BankTransaction.account)
+            .where(BankAccount.user_id == user.id)
+        )
+        return self.session.execute(query).scalar() or 0
+
+    def get_existing_transaction_ids(
+        self, account: BankAccount, transaction_ids: list[str]
+    ) -> set[str]:
+        """
+        Get which of the given bank transaction IDs are already stored for the account.
+        """
+        if not transaction_ids:
+            return set()
+        query = select(BankTransaction.transaction_id).where(
+            BankTransaction.account_id == account.id,
+            BankTransaction.transaction_id.in_(transaction_ids),
+        )
+        return set(self.session.execute(query).scalars().all())
+
+    def get_summary_rows(
+        self, accounts: list[BankAccount], batch_size: int
+    ) -> Iterator[
+        Sequence[Row[tuple[uuid.UUID, dt.datetime, bytes, Optional[uuid.UUID]]]]
+    ]:
+        """
+        Stream the columns monthly summaries are built from, in partitions of
+        batch_size rows.
+        """
+        query = select(
+            BankTransaction.account_id,
+            BankTransaction.date,
+            BankTransaction.amount,
+            BankTransaction.subcategory_id,
+        ).where(BankTransaction.account_id.in_([account.id for account in accounts]))
+        result = self.session.execute(query.execution_options(yield_per=batch_size))
+        return result.partitions()
+
+    def has_transactions(self, account: BankAccount) -> bool:
+        query = select(BankTransaction.id).where(
+            BankTransaction.account_id == account.id
+        )
+        return self.session.execute(query.limit(1)).first() is not None
+
     def get_by_original_id(self, original_id: str) -> BankTransaction | None:
         """
         Get a transaction by its original ID (the ID assigned by the bank).
@@ -58,6 +223,29 @@ class BankTransactionRepository(BaseRepository[BankTransaction]):
             self.session.query(BankTransaction).filter_by(account_id=account.id).all()
         )
 
+    def _filter_conditions(
+        self,
+        accounts: list[BankAccount],
+        start_date: Optional[dt.datetime] = None,
+        end_date: Optional[dt.datetime] = None,
+        subcategory_id: Optional[uuid.UUID] = None,
+        description: Optional[str] = None,
+    ) -> list[ColumnElement[bool]]:
+        account_ids = [account.id for account in accounts]
+
+        conditions: list[ColumnElement[bool]] = [
+            BankTransaction.account_id.in_(account_ids)
+        ]
+        if start_date:
+            conditions.append(BankTransaction.date >= start_date)
+        if end_date:
+            conditions.append(BankTransaction.date <= end_date)
+        if subcategory_id:
+            conditions.append(BankTransaction.subcategory_id == subcategory_id)
+        if description:
+            conditions.append(BankTransaction.user_description == description)
+        return conditions
+
     def get_filtered_transactions(
         self,
         accounts: list[BankAccount],
@@ -78,22 +266,38 @@ class BankTransactionRepository(BaseRepository[BankTransaction]):
         Returns:
             List of filtered BankTransaction objects
         """
-        account_ids = [account.id for account in accounts]
-
-        query = self.session.query(BankTransaction).filter(
-            BankTransaction.account_id.in_(account_ids),
+        query = select(BankTransaction).where(
+            *self._filter_conditions(
+                accounts, start_date, end_date, subcategory_id, description
+            )
         )
+        return list(self.session.execute(query).scalars().all())
 
-        if start_date:
-            query = query.filter(BankTransaction.date >= start_date)
-        if end_date:
-            query = query.filter(BankTransaction.date <= end_date)
-        if subcategory_id:
-            query = query.filter(BankTransaction.subcategory_id == subcategory_id)
-        if description:
-            query = query.filter(BankTransaction.user_description == description)
-
-        return query.all()
+    def get_filtered_page(
+        self,
+        request: PaginatedRequest,
+        accounts: list[BankAccount],
+        start_date: Optional[dt.datetime] = None,
+        end_date: Optional[dt.datetime] = None,
+        subcategory_id: Optional[uuid.UUID] = None,
+        description: Optional[str] = None,
+    ) -> PaginatedResponse[BankTransaction]:
+        """
+        Get a page of filtered transactions, newest first.
+        Pages are selected with a keyset on (date, id) rather than an offset.
+        """
+        query = select(BankTransaction).where(
+            *self._filter_conditions(
+                accounts, start_date, end_date, subcategory_id, description
+            )
+        )
+        return self.get_paginated(
+            request,
+            query,
+            keyset=[BankTransaction.date, BankTransaction.id],
+            descending=True,
+            count_cache=transaction_counts,
+        )
 
 
 class BudgetCategoryRepository(UserBaseRepository[BudgetCategory]):
@@ -107,6 +311,20 @@ class BudgetCategoryRepository(UserBaseRepository[BudgetCategory]):
             .one_or_none()
         )
 
+    def get_tree(self) -> list[BudgetCategory]:
+        """
+        Get the user's categories with their subcategories loaded.
+        """
+        return list(
+            self.session.execute(
+                select(BudgetCategory)
+                .where(BudgetCategory.user_id == self.user.id)
+                .options(selectinload(BudgetCategory.subcategories))
+            )
+            .scalars()
+            .all()
+        )
+
 
 class BudgetSubCategoryRepository(BaseRepository[BudgetSubCategory]):
     def __init__(self, session: Session):
@@ -120,14 +338,45 @@ class BudgetSubCategoryRepository(BaseRepository[BudgetSubCategory]):
         )
 
 
-class BankTransactionFilterRepository(BaseRepository[BankTransactionFilter]):
+class BudgetAssignmentRepository(BaseRepository[BudgetAssignment]):
     def __init__(self, session: Session):
+        super().__init__(BudgetAssignment, session=session)
+
+    def get_between(
+        self, subcategory_ids: list[uuid.UUID], first_year: int, last_year: int
+    ) -> list[BudgetAssignment]:
+        """
+        Get the assignments of the subcategories for the given years.
+        """
+        if not subcategory_ids:
+            return []
+        query = select(BudgetAssignment).where(
+            BudgetAssignment.subcategory_id.in_(subcategory_ids),
+            BudgetAssignment.year.between(first_year, last_year),
+        )
+        return list(self.session.execute(query).scalars().all())
+
+
+class BankTransactionFilterRepository(BaseRepository[BankTransactionFilter]):
+    def __init__(self, user: User, session: Session):
         super().__init__(BankTransactionFilter, session=session)
+        self.user = user
+
+    def get_all(self) -> list[BankTransactionFilter]:
+        return list(
+            self.session.execute(
+                select(BankTransactionFilter)
+                .where(BankTransactionFilter.user_id == self.user.id)
+                .options(selectinload(BankTransactionFilter.matches))
+            )
+            .scalars()
+            .all()
+        )
 
     def get_by_id(self, filter_id: uuid.UUID) -> BankTransactionFilter | None:
         return (
             self.session.query(BankTransactionFilter)
-            .filter_by(id=filter_id)
+            .filter_by(user_id=self.user.id, id=filter_id)
             .one_or_none()
         )
 
@@ -142,3 +391,281 @@ class BankTransactionFilterMatchRepository(BaseRepository[BankTransactionFilterM
             .filter_by(id=filter_id)
             .one_or_none()
         )
+
+
+class T212ExportJobRepository(BaseRepository[T212ExportJob]):
+    def __init__(self, session: Session):
+        super().__init__(T212ExportJob, session=session)
+
+    def get_latest(self, account: BankAccount) -> T212ExportJob | None:
+        return (
+            self.session.query(T212ExportJob)
+            .filter_by(account_id=account.id)
+            .order_by(T212ExportJob.created_at.desc())
+            .first()
+        )
+
+    def get_active(self, account: BankAccount) -> T212ExportJob | None:
+        """
+        Get the export job of the account that hasn't finished yet, if any.
+        """
+        return (
+            self.session.query(T212ExportJob)
+            .filter(
+                T212ExportJob.account_id == account.id,
+                T212ExportJob.status.in_(
+                    [T212ExportJobStatus.PENDING, T212ExportJobStatus.EXPORTING]
+                ),
+            )
+            .order_by(T212ExportJob.created_at.desc())
+            .first()
+        )
+
+    def count_consecutive_failures(self, account: BankAccount, limit: int) -> int:
+        """
+        Get how many of the account's latest export jobs failed in a row,
+        counting up to `limit`.
+        """
+        statuses = self.session.execute(
+            select(T212ExportJob.status)
+            .where(T212ExportJob.account_id == account.id)
+            .order_by(T212ExportJob.created_at.desc())
+            .limit(limit)
+        ).scalars()
+        failures = 0
+        for status in statuses:
+            if status != T212ExportJobStatus.FAILED:
+                break
+            failures += 1
+        return failures
+
+
+class MonthlySummaryRepository(BaseRepository[MonthlySummary]):
+    def __init__(self, session: Session):
+        super().__init__(MonthlySummary, session=session)
+
+    def get_for_update(
+        self, keys: list[tuple[uuid.UUID, int, int]]
+    ) -> list[MonthlySummary]:
+        """
+        Get and lock the summaries of the given (account_id, year, month),
+        refreshing any already loaded in the session.
+        """
+        if not keys:
+            return []
+        query = (
+            select(MonthlySummary)
+            .where(
+                tuple_(
+                    MonthlySummary.account_id, MonthlySummary.year, MonthlySummary.month
+                ).in_(keys)
+            )
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return list(self.session.execute(query).scalars().all())
+
+    def get_since(
+        self, accounts: list[BankAccount], year: int, month: int
+    ) -> list[MonthlySummary]:
+        query = select(MonthlySummary).where(
+            MonthlySummary.account_id.in_([account.id for account in accounts]),
+            tuple_(MonthlySummary.year, MonthlySummary.month) >= (year, month),
+        )
+        return list(self.session.execute(query).scalars().all())
+
+    def insert_missing(self, rows: list[dict[str, Any]]) -> None:
+        """
+        Insert the summaries that don't exist yet, leaving existing ones
+        untouched.
+        """
+        if rows:
+            statement = insert(MonthlySummary)
+            statement = statement.on_duplicate_key_update(
+                account_id=statement.inserted.account_id
+            )
+            self.session.execute(statement, rows)
+
+
+class MonthlyCategorySummaryRepository(BaseRepository[MonthlyCategorySummary]):
+    def __init__(self, session: Session):
+        super().__init__(MonthlyCategorySummary, session=session)
+
+    def get_for_update(
+        self, keys: list[tuple[uuid.UUID, int, int]]
+    ) -> list[MonthlyCategorySummary]:
+        """
+        Get and lock the summaries of the given (subcategory_id, year, month),
+        refreshing any already loaded in the session.
+        """
+        if not keys:
+            return []
+        query = (
+            select(MonthlyCategorySummary)
+            .where(
+                tuple_(
+                    MonthlyCategorySummary.subcategory_id,
+                    MonthlyCategorySummary.year,
+                    MonthlyCategorySummary.month,
+                ).in_(keys)
+            )
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return list(self.session.execute(query).scalars().all())
+
+    def _user_subcategory_ids(self, user: User) -> Select[tuple[uuid.UUID]]:
+        return (
+            select(BudgetSubCategory.id)
+            .join(BudgetSubCategory.category)
+            .where(BudgetCategory.user_id == user.id)
+        )
+
+    def get_since(
+        self, user: User, year: int, month: int
+    ) -> list[MonthlyCategorySummary]:
+        query = select(MonthlyCategorySummary).where(
+            MonthlyCategorySummary.subcategory_id.in_(self._user_subcategory_ids(user)),
+            tuple_(MonthlyCategorySummary.year, MonthlyCategorySummary.month)
+            >= (year, month),
+        )
+        return list(self.session.execute(query).scalars().all())
+
+    def get_for_month(
+        self, subcategory_ids: list[uuid.UUID], year: int, month: int
+    ) -> list[MonthlyCategorySummary]:
+        if not subcategory_ids:
+            return []
+        query = select(MonthlyCategorySummary).where(
+            MonthlyCategorySummary.subcategory_id.in_(subcategory_ids),
+            MonthlyCategorySummary.year == year,
+            MonthlyCategorySummary.month == month,
+        )
+        return list(self.session.execute(query).scalars().all())
+
+    def get_until_for_share(
+        self, subcategory_ids: list[uuid.UUID], year: int, month: int
+    ) -> list[MonthlyCategorySummary]:
+        """
+        Get the summaries of the subcategories up to the given month with a
+        shared lock, waiting for concurrent writers and reading what they
+        committed, and refreshing any already loaded in the session.
+        """
+        if not subcategory_ids:
+            return []
+        query = (
+            select(MonthlyCategorySummary)
+            .where(
+                MonthlyCategorySummary.subcategory_id.in_(subcategory_ids),
+                tuple_(MonthlyCategorySummary.year, MonthlyCategorySummary.month)
+                <= (year, month),
+            )
+            .with_for_update(read=True)
+            .execution_options(populate_existing=True)
+        )
+        return list(self.session.execute(query).scalars().all())
+
+    def insert_missing(self, rows: list[dict[str, Any]]) -> None:
+        """
+        Insert the summaries that don't exist yet, leaving existing ones
+        untouched.
+        """
+        if rows:
+            statement = insert(MonthlyCategorySummary)
+            statement = statement.on_duplicate_key_update(
+                subcategory_id=statement.inserted.subcategory_id
+            )
+            self.session.execute(statement, rows)
+
+
+class BudgetRolloverRepository(BaseRepository[BudgetRollover]):
+    def __init__(self, session: Session):
+        super().__init__(BudgetRollover, session=session)
+
+    def get_for_month(
+        self, subcategory_ids: list[uuid.UUID], year: int, month: int
+    ) -> list[BudgetRollover]:
+        if not subcategory_ids:
+            return []
+        query = select(BudgetRollover).where(
+            BudgetRollover.subcategory_id.in_(subcategory_ids),
+            BudgetRollover.year == year,
+            BudgetRollover.month == month,
+        )
+        return list(self.session.execute(query).scalars().all())
+
+    def get_latest_before_for_update(
+        self, subcategory_ids: list[uuid.UUID], year: int, month: int
+    ) -> list[BudgetRollover]:
+        """
+        Get and lock the latest checkpoint of each subcategory before the
+        given month, so it can't be invalidated until the transaction ends.
+        """
+        if not subcategory_ids:
+            return []
+        period = BudgetRollover.year * 12 + BudgetRollover.month
+        latest = (
+            select(
+                BudgetRollover.subcategory_id,
+                func.max(period).label("period"),
+            )
+            .where(
+                BudgetRollover.subcategory_id.in_(subcategory_ids),
+                tuple_(BudgetRollover.year, BudgetRollover.month) < (year, month),
+            )
+            .group_by(BudgetRollover.subcategory_id)
+            .subquery()
+        )
+        query = (
+            select(BudgetRollover)
+            .join(
+                latest,
+                and_(
+                    BudgetRollover.subcategory_id == latest.c.subcategory_id,
+                    period == latest.c.period,
+                ),
+            )
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return list(self.session.execute(query).scalars().all())
+
+    def upsert_many(self, rows: list[dict[str, Any]]) -> None:
+        """
+        Insert or replace a batch of checkpoints. Concurrent readers can
+        compute the same checkpoint, the last one written wins.
+        """
+        if rows:
+            statement = insert(BudgetRollover)
+            statement = statement.on_duplicate_key_update(
+                balance=statement.inserted.balance
+            )
+            self.session.execute(statement, rows)
+
+    def delete_from(self, starts: dict[uuid.UUID, tuple[int, int]]) -> None:
+        """
+        Delete the checkpoints of each subcategory from the given
+        (year, month) on.
+        """
+        if starts:
+            self.session.execute(
+                delete(BudgetRollover).where(
+                    or_(
+                        *(
+                            and_(
+                                BudgetRollover.subcategory_id == subcategory_id,
+                                tuple_(BudgetRollover.year, BudgetRollover.month)
+                                >= start,
+                            )
+                            for subcategory_id, start in starts.items()
+                        )
+                    )
+                )
+            )
+
+    def delete_for_subcategory(self, subcategory_id: uuid.UUID) -> None:
+        self.session.execute(
+            delete(BudgetRollover).where(
+                BudgetRollover.subcategory_id == subcategory_id
+            )
+        )
@@ -1,14 +1,16 @@
 import uuid
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, Response
 
+from lifehub.core.common.base.pagination import PaginatedResponse
 from lifehub.core.user.api.dependencies import user_is_authenticated
 
 from .dependencies import BudgetServiceDep, FilterServiceDep, FinanceServiceDep
 from .models import (
     BankBalanceResponse,
     BankInstitutionResponse,
+    BankMonthlySummaryResponse,
     BankTransactionFilterResponse,
     BankTransactionResponse,
     BudgetCategoryResponse,
@@ -18,9 +20,12 @@ from .models import (
     CreateBudgetCategoryRequest,
     CreateBudgetSubCategoryRequest,
     GetBankTransactionsRequest,
+    RecategorizationStatusResponse,
+    T212ExportJobResponse,
     UpdateBankTransactionRequest,
     UpdateBudgetSubCategoryRequest,
 )
+from .service.filter_service import recategorization_jobs
 
 router = APIRouter(
     dependencies=[Depends(user_is_authenticated)],
@@ -28,7 +33,7 @@ router = APIRouter(
 
 
 @router.get("/bank/login")
-async def get_bank_login(
+def get_bank_login(
     finance_service: FinanceServiceDep,
     bank_id: str,
 ) -> str:
@@ -36,7 +41,7 @@ async def get_bank_login(
 
 
 @router.post("/bank/add")
-async def add_bank_account(
+def add_bank_account(
     finance_service: FinanceServiceDep,
     bank_id: str,
 ) -> None:
@@ -44,7 +49,7 @@ async def add_bank_account(
 
 
 @router.post("/bank/callback")
-async def confirm_bank_login(
+def confirm_bank_login(
     finance_service: FinanceServiceDep,
     ref: str,
 ) -> None:
@@ -52,45 +57,83 @@ async def confirm_bank_login(
 
 
 @router.get("/bank/balances")
-async def get_bank_balances(
+def get_bank_balances(
     finance_service: FinanceServiceDep,
 ) -> list[BankBalanceResponse]:
     return finance_service.get_bank_balances()
 
 
+@router.get("/bank/{account_id}/export")
+def get_export_status(
+    finance_service: FinanceServiceDep,
+    account_id: str,
+) -> T212ExportJobResponse:
+    return finance_service.get_export_status(uuid.UUID(account_id))
+
+
+@router.get("/summary")
+def get_summary(
+    finance_service: FinanceServiceDep,
+    months: int = Query(12, ge=1, le=120),
+) -> list[BankMonthlySummaryResponse]:
+    return finance_service.get_summary(months)
+
+
 @router.get("/bank/transactions")
-async def get_bank_transactions(
+def get_bank_transactions(
     finance_service: FinanceServiceDep,
     request: Annotated[GetBankTransactionsRequest, Query()],
-) -> list[BankTransactionResponse]:
+) -> PaginatedResponse[BankTransactionResponse]:
     return finance_service.get_bank_transactions(request)
 
 
 @router.get("/bank/transactions/filters")
-async def get_bank_transactions_filters(
+def get_bank_transactions_filters(
     filter_service: FilterServiceDep,
 ) -> list[BankTransactionFilterResponse]:
     return filter_service.get_bank_transactions_filters()
 
 
 @router.post("/bank/transactions/filters")
-async def create_bank_transactions_filter(
-    filter_service: FilterServiceDep, data: CreateBankTransactionFilterRequest
+def create_bank_transactions_filter(
+    filter_service: FilterServiceDep,
+    data: CreateBankTransactionFilterRequest,
+    background_tasks: BackgroundTasks,
 ) -> BankTransactionFilterResponse:
-    return filter_service.create_bank_transactions_filter(data)
+    res = filter_service.create_bank_transactions_filter(data)
+    # Runs once the request is committed, so the job sees the new filter
+    background_tasks.add_task(recategorization_jobs.start, filter_service.user.id)
+    return res
 
 
 @router.put("/bank/transactions/filters/{filter_id}")
-async def update_bank_transactions_filter(
+def update_bank_transactions_filter(
     filter_service: FilterServiceDep,
     filter_id: str,
     data: CreateBankTransactionFilterRequest,
+    background_tasks: BackgroundTasks,
 ) -> BankTransactionFilterResponse:
-    return filter_service.update_bank_transactions_filter(uuid.UUID(filter_id), data)
+    res = filter_service.update_bank_transactions_filter(uuid.UUID(filter_id), data)
+    background_tasks.add_task(recategorization_jobs.start, filter_service.user.id)
+    return res
+
+
+@router.post("/bank/transactions/filters/apply")
+def apply_bank_transactions_filters(
+    filter_service: FilterServiceDep,
+) -> RecategorizationStatusResponse:
+    return filter_service.start_recategorization()
+
+
+@router.get("/bank/transactions/filters/apply")
+def get_bank_transactions_filters_apply_status(
+    filter_service: FilterServiceDep,
+) -> RecategorizationStatusResponse:
+    return filter_service.get_recategorization_status()
 
 
 @router.put("/bank/{account_id}/transactions/{transaction_id}")
-async def update_bank_transaction(
+def update_bank_transaction(
     finance_service: FinanceServiceDep,
     account_id: str,
     transaction_id: str,
@@ -106,29 +149,42 @@ async def update_bank_transaction(
 
 
 @router.get("/bank/countries")
-async def get_countries(
+def get_countries(
     finance_service: FinanceServiceDep,
 ) -> list[CountryResponse]:
     return finance_service.get_countries()
 
 
-@router.get("/bank/banks")
-async def get_banks(
+@router.get("/bank/banks", response_model=list[BankInstitutionResponse])
+def get_banks(
     finance_service: FinanceServiceDep,
     country: str = "PT",  # Default to Portugal
+) -> Response:
+    # Served pre-serialized from the institution catalogue
+    return Response(
+        finance_service.get_institutions(country), media_type="application/json"
+    )
+
+
+@router.get("/bank/banks/search")
+def search_banks(
+    finance_service: FinanceServiceDep,
+    q: str = Query(min_length=1),
+    country: str = "PT",
+    limit: int = Query(20, ge=1, le=100),
 ) -> list[BankInstitutionResponse]:
-    return finance_service.get_institutions(country)
+    return finance_service.search_institutions(q, country, limit)
 
 
 @router.get("/budget/categories")
-async def get_budget_categories(
+def get_budget_categories(
     budget_service: BudgetServiceDep,
 ) -> list[BudgetCategoryResponse]:
     return budget_service.get_budget_categories()
 
 
 @router.post("/budget/categories")
-async def create_budget_category(
+def create_budget_category(
     budget_service: BudgetServiceDep,
     budget_category: CreateBudgetCategoryRequest,
 ) -> BudgetCategoryResponse:
@@ -136,7 +192,7 @@ async def create_budget_category(
 
 
 @router.get("/budget/categories/{category_id}")
-async def get_budget_category(
+def get_budget_category(
     budget_service: BudgetServiceDep,
     category_id: str,
 ) -> BudgetCategoryResponse:
@@ -144,7 +200,7 @@ async def get_budget_category(
 
 
 @router.put("/budget/categories/{category_id}")
-async def update_budget_category(
+def update_budget_category(
     budget_service: BudgetServiceDep,
     category_id: str,
     name: str,
@@ -153,7 +209,7 @@ async def update_budget_category(
 
 
 @router.delete("/budget/categories/{category_id}")
-async def delete_budget_category(
+def delete_budget_category(
     budget_service: BudgetServiceDep,
     category_id: str,
 ) -> None:
@@ -161,7 +217,7 @@ async def delete_budget_category(
 
 
 @router.get("/budget/categories/{category_id}/subcategories")
-async def get_budget_subcategories(
+def get_budget_subcategories(
     budget_service: BudgetServiceDep,
     category_id: str,
 ) -> list[BudgetSubCategoryResponse]:
@@ -169,7 +225,7 @@ async def get_budget_subcategories(
 
 
 @router.post("/budget/categories/{category_id}/subcategories")
-async def create_budget_subcategory(
+def create_budget_subcategory(
     budget_service: BudgetServiceDep,
     category_id: str,
     data: CreateBudgetSubCategoryRequest,
@@ -180,7 +236,7 @@ async def create_budget_subcategory(
 
 
 @router.put("/budget/subcategories/{subcategory_id}")
-async def update_budget_subcategory(
+def update_budget_subcategory(
     budget_service: BudgetServiceDep,
     subcategory_id: str,
     data: UpdateBudgetSubCategoryRequest,
@@ -191,7 +247,7 @@ async def update_budget_subcategory(
 
 
 @router.delete("/budget/subcategories/{subcategory_id}")
-async def delete_budget_subcategory(
+def delete_budget_subcategory(
     budget_service: BudgetServiceDep,
     subcategory_id: str,
 ) -> None:
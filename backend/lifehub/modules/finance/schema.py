@@ -1,15 +1,15 @@
 from __future__ import annotations
 
-import enum
 import datetime as dt
+import enum
 import uuid
 from typing import Optional
 
-from sqlalchemy import UUID, ForeignKey, String, Integer
+from sqlalchemy import UUID, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from lifehub.core.common.base.db_model import BaseModel, UserBaseModel
-from lifehub.core.security.encrypted_data import EncryptedDataType
+from lifehub.core.security.encrypted_data import EncryptedDataType, Plaintext
 
 
 class BankAccount(UserBaseModel):
@@ -36,6 +36,9 @@ class BankAccount(UserBaseModel):
     monthly_summaries: Mapped[list[MonthlySummary]] = relationship(
         back_populates="account", cascade="all, delete-orphan", passive_deletes=True
     )
+    export_jobs: Mapped[list[T212ExportJob]] = relationship(
+        back_populates="account", cascade="all, delete-orphan", passive_deletes=True
+    )
 
     def synced_before(
         self,
@@ -108,8 +111,46 @@ class MonthlySummary(BaseModel):
     account: Mapped[BankAccount] = relationship(single_parent=True)
 
 
+class MonthlyCategorySummary(BaseModel):
+    __tablename__ = "monthly_category_summary"
+
+    subcategory_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("budget_subcategory.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    year: Mapped[int] = mapped_column(primary_key=True)
+    month: Mapped[int] = mapped_column(primary_key=True)
+    balance: Mapped[bytes] = mapped_column(EncryptedDataType(64))  # float / Decimal
+
+
+# What is left of an ACCUMULATED subcategory's budget at the end of a month,
+# including what was carried over from previous months
+class BudgetRollover(BaseModel):
+    __tablename__ = "budget_rollover"
+
+    subcategory_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("budget_subcategory.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    year: Mapped[int] = mapped_column(primary_key=True)
+    month: Mapped[int] = mapped_column(primary_key=True)
+    balance: Mapped[bytes] = mapped_column(EncryptedDataType(64))  # float / Decimal
+
+
 class BankTransaction(BaseModel):
     __tablename__ = "bank_transaction"
+    __table_args__ = (
+        Index(
+            "ix_bank_transaction_account_transaction",
+            "account_id",
+            "transaction_id",
+            unique=True,
+        ),
+        # Keyset pagination, newest first
+        Index("ix_bank_transaction_account_date", "account_id", "date"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -140,6 +181,45 @@ class BankTransaction(BaseModel):
     )
     subcategory: Mapped[BudgetSubCategory] = relationship(single_parent=True)
 
+    # Lazy plaintext access, see Plaintext
+    amount_text = Plaintext[str]("amount")
+    description_text = Plaintext[str | None]("description")
+    user_description_text = Plaintext[str | None]("user_description")
+    counterparty_text = Plaintext[str | None]("counterparty")
+
+
+class T212ExportJobStatus(str, enum.Enum):
+    PENDING = "pending"  # Export not requested yet
+    EXPORTING = "exporting"  # Export requested, waiting for the download link
+    DONE = "done"
+    FAILED = "failed"
+
+
+class T212ExportJob(BaseModel):
+    __tablename__ = "t212_export_job"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    account_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("bank_account.id", ondelete="CASCADE"),
+        index=True,
+    )
+    status: Mapped[T212ExportJobStatus] = mapped_column(String(16))
+    report_id: Mapped[Optional[int]] = mapped_column(nullable=True, default=None)
+    from_date: Mapped[dt.datetime] = mapped_column()
+    to_date: Mapped[dt.datetime] = mapped_column()
+    attempts: Mapped[int] = mapped_column(default=0)
+    next_poll_at: Mapped[dt.datetime] = mapped_column(default=dt.datetime.now)
+    error: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    created_at: Mapped[dt.datetime] = mapped_column(default=dt.datetime.now)
+    updated_at: Mapped[dt.datetime] = mapped_column(
+        default=dt.datetime.now, onupdate=dt.datetime.now
+    )
+
+    account: Mapped[BankAccount] = relationship(back_populates="export_jobs")
+
 
 class BudgetCategory(UserBaseModel):
     __tablename__ = "budget_category"
@@ -153,10 +233,14 @@ class BudgetCategory(UserBaseModel):
         back_populates="category", cascade="all, delete-orphan"
     )
 
+    name_text = Plaintext[str]("name")
+
+
 class BudgetSubCategoryType(str, enum.Enum):
     FIXED = "fixed"
     ACCUMULATED = "accumulated"
-    
+
+
 class BudgetSubCategory(BaseModel):
     __tablename__ = "budget_subcategory"
 
@@ -168,13 +252,14 @@ class BudgetSubCategory(BaseModel):
     )
     name: Mapped[bytes] = mapped_column(EncryptedDataType(64))
     amount: Mapped[bytes] = mapped_column(EncryptedDataType(64))  # float / Decimal
-    type: Mapped[BudgetSubCategoryType] = mapped_column(
-        String(16), nullable=False
-    )
+    type: Mapped[BudgetSubCategoryType] = mapped_column(String(16), nullable=False)
     category: Mapped[BudgetCategory] = relationship(
         back_populates="subcategories", single_parent=True
     )
 
+    name_text = Plaintext[str]("name")
+    amount_text = Plaintext[str]("amount")
+
 
 class BudgetAssignment(BaseModel):
     __tablename__ = "budget_monthly_assignment"
@@ -186,21 +271,25 @@ class BudgetAssignment(BaseModel):
         UUID(as_uuid=True), ForeignKey("budget_subcategory.id")
     )
     year: Mapped[int] = mapped_column(primary_key=True)
-    month: Mapped[Optional[int]] = mapped_column(
-        Integer, nullable=True, default=None
-    )
-    week: Mapped[Optional[int]] = mapped_column(
-        Integer, nullable=True, default=None
-    )
+    month: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, default=None)
+    week: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, default=None)
     amount: Mapped[bytes] = mapped_column(EncryptedDataType(64))  # float / Decimal
     subcategory: Mapped[BudgetSubCategory] = relationship(single_parent=True)
 
+
 class BankTransactionFilter(BaseModel):
     __tablename__ = "bank_transaction_rule"
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
     )
+    # NULL for filters from before user_id that couldn't be attributed
+    user_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("user.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
     description: Mapped[str] = mapped_column(String(64), nullable=True)
     subcategory_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("budget_subcategory.id"), nullable=True
@@ -208,7 +297,7 @@ class BankTransactionFilter(BaseModel):
 
     subcategory: Mapped[BudgetSubCategory] = relationship(single_parent=True)
     matches: Mapped[list[BankTransactionFilterMatch]] = relationship(
-        back_populates="filter", single_parent=True
+        back_populates="filter", single_parent=True, cascade="all, delete-orphan"
     )
 
 
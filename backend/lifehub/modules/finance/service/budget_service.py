@@ -1,3 +1,4 @@
+import datetime as dt
 import uuid
 from decimal import Decimal
 
@@ -9,8 +10,28 @@ from lifehub.core.security.encryption import EncryptionService
 from lifehub.core.user.schema import User
 
 from ..models import BudgetCategoryResponse, BudgetSubCategoryResponse
-from ..repository import BudgetCategoryRepository, BudgetSubCategoryRepository
+from ..repository import (
+    BudgetAssignmentRepository,
+    BudgetCategoryRepository,
+    BudgetSubCategoryRepository,
+    MonthlyCategorySummaryRepository,
+)
 from ..schema import BudgetCategory, BudgetSubCategory, BudgetSubCategoryType
+from .budget_status import (
+    AssignmentAmount,
+    BudgetStatus,
+    assigned_by_month,
+    budget_signature,
+    budget_status_cache,
+    compute_budget_statuses,
+)
+from .budget_tree import (
+    BudgetTree,
+    CategoryNode,
+    SubCategoryNode,
+    budget_trees,
+)
+from .rollover_service import RolloverService
 
 
 class BudgetServiceException(ServiceException):
@@ -20,6 +41,7 @@ class BudgetServiceException(ServiceException):
 
 class BudgetService(BaseUserService):
     _encryption_service: EncryptionService | None = None
+    _rollover_service: RolloverService | None = None
 
     def __init__(self, session: Session, user: User):
         super().__init__(session, user)
@@ -30,59 +52,170 @@ class BudgetService(BaseUserService):
             self._encryption_service = EncryptionService(self.session, self.user)
         return self._encryption_service
 
-    def _get_budget_status(
-        self, subcategory_id: uuid.UUID
-    ) -> tuple[float, float, float]:
+    @property
+    def rollover_service(self) -> RolloverService:
+        if self._rollover_service is None:
+            self._rollover_service = RolloverService(self.session, self.user)
+        return self._rollover_service
+
+    def _get_budget_tree(self) -> BudgetTree:
         """
-        Fetches the budgeted, spent, and available amounts for a specific subcategory.
+        The user's categories and subcategories with their names decrypted.
+        Loaded with one query per level and cached until they change.
         """
-        subcategory = BudgetSubCategoryRepository(self.session).get_by_id(
-            subcategory_id
+        tree = budget_trees.get(self.user.id)
+        if tree is not None:
+            return tree
+
+        categories = BudgetCategoryRepository(self.user, self.session).get_tree()
+        category_names = self.encryption_service.decrypt_many(
+            [category.name for category in categories]
+        )
+        subcategory_names = iter(
+            self.encryption_service.decrypt_many(
+                [
+                    subcategory.name
+                    for category in categories
+                    for subcategory in category.subcategories
+                ]
+            )
+        )
+        tree = tuple(
+            CategoryNode(
+                id=category.id,
+                name=category_name,
+                subcategories=tuple(
+                    SubCategoryNode(
+                        id=subcategory.id,
+                        category_id=category.id,
+                        name=next(subcategory_names),
+                        type=subcategory.type,
+                        amount=subcategory.amount,
+                    )
+                    for subcategory in category.subcategories
+                ),
+            )
+            for category, category_name in zip(categories, category_names)
         )
+        budget_trees.put(self.user.id, tree)
+        return tree
 
-        if subcategory is None:
-            raise BudgetServiceException(404, "Subcategory not found")
+    def _get_category_node(self, category_id: uuid.UUID) -> CategoryNode:
+        for category in self._get_budget_tree():
+            if category.id == category_id:
+                return category
+        raise BudgetServiceException(404, "Category not found")
 
-        # Fetch budgeted amount
-        budgeted = float(self.encryption_service.decrypt_data(subcategory.amount))
+    def _get_budget_statuses(self, tree: BudgetTree) -> dict[uuid.UUID, BudgetStatus]:
+        """
+        Computes the budgeted, spent, and available amounts of all the user's
+        subcategories for the current month.
+        Spending comes from the monthly category summaries and carried over
+        balances from the rollover checkpoints, so this is a fixed number of
+        queries however long the user's history is. The result is cached
+        until any of the rows it depends on changes.
+        """
+        today = dt.date.today()
+        month = (today.year, today.month)
+
+        subcategories = [
+            subcategory for category in tree for subcategory in category.subcategories
+        ]
+        subcategory_ids = [subcategory.id for subcategory in subcategories]
+        summaries = MonthlyCategorySummaryRepository(self.session).get_for_month(
+            subcategory_ids, *month
+        )
+        assignments = BudgetAssignmentRepository(self.session).get_between(
+            subcategory_ids, today.year, today.year
+        )
+        carried = self.rollover_service.get_carried(subcategories, month)
+
+        signature = budget_signature(subcategories, summaries, assignments, carried)
+        statuses = budget_status_cache.get(self.user.id, month, signature)
+        if statuses is not None:
+            return statuses
+
+        defaults = self.encryption_service.decrypt_many(
+            [subcategory.amount for subcategory in subcategories]
+        )
+        balances = self.encryption_service.decrypt_many(
+            [summary.balance for summary in summaries]
+        )
+        assigned = self.encryption_service.decrypt_many(
+            [assignment.amount for assignment in assignments]
+        )
+        statuses = compute_budget_statuses(
+            [
+                (subcategory.id, subcategory.type, Decimal(default))
+                for subcategory, default in zip(subcategories, defaults)
+            ],
+            {
+                summary.subcategory_id: -Decimal(balance)
+                for summary, balance in zip(summaries, balances)
+            },
+            assigned_by_month(
+                [
+                    AssignmentAmount(
+                        subcategory_id=assignment.subcategory_id,
+                        year=assignment.year,
+                        month=assignment.month,
+                        week=assignment.week,
+                        amount=Decimal(amount),
+                    )
+                    for assignment, amount in zip(assignments, assigned)
+                ],
+                month,
+            ),
+            carried,
+            month,
+        )
+        budget_status_cache.put(self.user.id, month, signature, statuses)
+        return statuses
+
+    def _build_subcategory_response(
+        self,
+        category: CategoryNode,
+        subcategory: SubCategoryNode,
+        statuses: dict[uuid.UUID, BudgetStatus],
+    ) -> BudgetSubCategoryResponse:
+        status = statuses[subcategory.id]
+        return BudgetSubCategoryResponse(
+            id=str(subcategory.id),
+            name=subcategory.name,
+            category_id=str(category.id),
+            category_name=category.name,
+            budgeted=status.budgeted,
+            spent=status.spent,
+            available=status.available,
+        )
 
-        spent = 0  # TODO: Get monthly spent
+    def _build_category_response(
+        self, category: CategoryNode, statuses: dict[uuid.UUID, BudgetStatus]
+    ) -> BudgetCategoryResponse:
+        return BudgetCategoryResponse(
+            id=str(category.id),
+            name=category.name,
+            subcategories=[
+                self._build_subcategory_response(category, subcategory, statuses)
+                for subcategory in category.subcategories
+            ],
+        )
 
-        # Calculate available amount
-        available = budgeted - spent
-        return round(budgeted, 2), round(spent, 2), round(available, 2)
+    def _get_subcategory(self, subcategory_id: uuid.UUID) -> BudgetSubCategory:
+        subcategory = BudgetSubCategoryRepository(self.session).get_by_id(
+            subcategory_id
+        )
+        if subcategory is None or subcategory.category.user_id != self.user.id:
+            raise BudgetServiceException(404, "Subcategory not found")
+        return subcategory
 
     def get_budget_categories(self) -> list[BudgetCategoryResponse]:
         """
         Fetches the budget categories and subcategories, dynamically calculating the budgeted, spent, and available amounts.
         """
-        categories = []
-        for category in self.user.budget_categories:
-            subcategories = []
-            for subcategory in category.subcategories:
-                budgeted, spent, available = self._get_budget_status(subcategory.id)
-
-                subcategories.append(
-                    BudgetSubCategoryResponse(
-                        id=str(subcategory.id),
-                        name=self.encryption_service.decrypt_data(subcategory.name),
-                        category_id=str(category.id),
-                        category_name=self.encryption_service.decrypt_data(
-                            category.name
-                        ),
-                        budgeted=budgeted,
-                        spent=spent,
-                        available=available,
-                    )
-                )
-            categories.append(
-                BudgetCategoryResponse(
-                    id=str(category.id),
-                    name=self.encryption_service.decrypt_data(category.name),
-                    subcategories=subcategories,
-                )
-            )
-        return categories
+        tree = self._get_budget_tree()
+        statuses = self._get_budget_statuses(tree)
+        return [self._build_category_response(category, statuses) for category in tree]
 
     def create_budget_category(self, name: str) -> BudgetCategoryResponse:
         """
@@ -93,10 +226,11 @@ class BudgetService(BaseUserService):
             name=self.encryption_service.encrypt_data(name),
         )
         self.user.budget_categories.append(category)
-        self.session.commit()
+        self.session.flush()
+        budget_trees.invalidate_on_commit(self.session, self.user.id)
         return BudgetCategoryResponse(
             id=str(category.id),
-            name=self.encryption_service.decrypt_data(category.name),
+            name=name,
             subcategories=[],
         )
 
@@ -104,32 +238,9 @@ class BudgetService(BaseUserService):
         """
         Fetches a budget category by ID, dynamically calculating the budgeted, spent, and available amounts for each subcategory.
         """
-        category = BudgetCategoryRepository(self.user, self.session).get_by_id(
-            category_id
-        )
-        if category is None:
-            raise BudgetServiceException(404, "Category not found")
-
-        subcategories = []
-        for subcategory in category.subcategories:
-            budgeted, spent, available = self._get_budget_status(subcategory.id)
-
-            subcategories.append(
-                BudgetSubCategoryResponse(
-                    id=str(subcategory.id),
-                    name=self.encryption_service.decrypt_data(subcategory.name),
-                    category_id=str(category.id),
-                    category_name=self.encryption_service.decrypt_data(category.name),
-                    budgeted=budgeted,
-                    spent=spent,
-                    available=available,
-                )
-            )
-
-        return BudgetCategoryResponse(
-            id=str(category.id),
-            name=self.encryption_service.decrypt_data(category.name),
-            subcategories=subcategories,
+        category = self._get_category_node(category_id)
+        return self._build_category_response(
+            category, self._get_budget_statuses(self._get_budget_tree())
         )
 
     def update_budget_category(
@@ -144,7 +255,7 @@ class BudgetService(BaseUserService):
         if category is None:
             raise BudgetServiceException(404, "Category not found")
         category.name = self.encryption_service.encrypt_data(name)
-        self.session.commit()
+        budget_trees.invalidate_on_commit(self.session, self.user.id)
         return BudgetCategoryResponse(id=str(category.id), name=name, subcategories=[])
 
     def delete_budget_category(self, category_id: uuid.UUID) -> None:
@@ -157,7 +268,7 @@ class BudgetService(BaseUserService):
         if category is None:
             raise BudgetServiceException(404, "Category not found")
         self.session.delete(category)
-        self.session.commit()
+        budget_trees.invalidate_on_commit(self.session, self.user.id)
 
     def get_budget_subcategories(
         self, category_id: uuid.UUID
@@ -165,31 +276,19 @@ class BudgetService(BaseUserService):
         """
         Fetches the subcategories of a budget category, dynamically calculating the budgeted, spent, and available amounts.
         """
-        category = BudgetCategoryRepository(self.user, self.session).get_by_id(
-            category_id
-        )
-        if category is None:
-            raise BudgetServiceException(404, "Category not found")
-
-        subcategories = []
-        for subcategory in category.subcategories:
-            budgeted, spent, available = self._get_budget_status(subcategory.id)
-
-            subcategories.append(
-                BudgetSubCategoryResponse(
-                    id=str(subcategory.id),
-                    name=self.encryption_service.decrypt_data(subcategory.name),
-                    category_id=str(category.id),
-                    category_name=self.encryption_service.decrypt_data(category.name),
-                    budgeted=budgeted,
-                    spent=spent,
-                    available=available,
-                )
-            )
-        return subcategories
+        category = self._get_category_node(category_id)
+        statuses = self._get_budget_statuses(self._get_budget_tree())
+        return [
+            self._build_subcategory_response(category, subcategory, statuses)
+            for subcategory in category.subcategories
+        ]
 
     def create_budget_subcategory(
-        self, category_id: uuid.UUID, name: str, amount: float, type: BudgetSubCategoryType
+        self,
+        category_id: uuid.UUID,
+        name: str,
+        amount: float,
+        type: BudgetSubCategoryType,
     ) -> BudgetSubCategoryResponse:
         """
         Creates a new budget subcategory with the specified budgeted amount.
@@ -207,23 +306,19 @@ class BudgetService(BaseUserService):
             type=type,
         )
         category.subcategories.append(subcategory)
-        self.session.commit()
-
-        # Fetch budgeted amount
-        budgeted = float(self.encryption_service.decrypt_data(subcategory.amount))
+        self.session.flush()
+        budget_trees.invalidate_on_commit(self.session, self.user.id)
 
         # Initially, there are no transactions, so spent is 0 and available equals the budgeted amount
-        spent = 0.0
-        available = budgeted - spent
-
+        budgeted = round(float(Decimal(amount)), 2)
         return BudgetSubCategoryResponse(
             id=str(subcategory.id),
-            name=self.encryption_service.decrypt_data(subcategory.name),
+            name=name,
             category_id=str(category.id),
             category_name=self.encryption_service.decrypt_data(category.name),
             budgeted=budgeted,
-            spent=spent,
-            available=available,
+            spent=0.0,
+            available=budgeted,
         )
 
     def update_budget_subcategory(
@@ -232,37 +327,26 @@ class BudgetService(BaseUserService):
         """
         Updates a budget subcategory by ID.
         """
-        subcategory = BudgetSubCategoryRepository(self.session).get_by_id(
-            subcategory_id
-        )
-        if subcategory is None:
-            raise BudgetServiceException(404, "Subcategory not found")
-        subcategory.name = self.encryption_service.encrypt_data(name)
-        subcategory.amount = self.encryption_service.encrypt_data(str(Decimal(amount)))
-        self.session.commit()
-
-        budgeted, spent, available = self._get_budget_status(subcategory.id)
-
-        return BudgetSubCategoryResponse(
-            id=str(subcategory.id),
-            name=self.encryption_service.decrypt_data(subcategory.name),
-            category_id=str(subcategory.category_id),
-            category_name=self.encryption_service.decrypt_data(
-                subcategory.category.name
-            ),
-            budgeted=budgeted,
-            spent=spent,
-            available=available,
+        subcategory = self._get_subcategory(subcategory_id)
+        self.encryption_service.bind_to_session()
+        subcategory.name_text = name
+        if Decimal(subcategory.amount_text) != Decimal(amount):
+            subcategory.amount_text = str(Decimal(amount))
+            # Months without assignments were budgeted with the old amount
+            self.rollover_service.invalidate_subcategory(subcategory.id)
+        budget_trees.invalidate_on_commit(self.session, self.user.id)
+
+        tree = self._get_budget_tree()
+        category = self._get_category_node(subcategory.category_id)
+        node = next(s for s in category.subcategories if s.id == subcategory.id)
+        return self._build_subcategory_response(
+            category, node, self._get_budget_statuses(tree)
         )
 
     def delete_budget_subcategory(self, subcategory_id: uuid.UUID) -> None:
         """
         Deletes a budget subcategory by ID.
         """
-        subcategory = BudgetSubCategoryRepository(self.session).get_by_id(
-            subcategory_id
-        )
-        if subcategory is None:
-            raise BudgetServiceException(404, "Subcategory not found")
+        subcategory = self._get_subcategory(subcategory_id)
         self.session.delete(subcategory)
-        self.session.commit()
+        budget_trees.invalidate_on_commit(self.session, self.user.id)
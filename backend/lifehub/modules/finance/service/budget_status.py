@@ -0,0 +1,202 @@
+import datetime as dt
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterable, Optional, Sequence
+
+from lifehub.modules.finance.schema import (
+    BudgetAssignment,
+    BudgetSubCategoryType,
+    MonthlyCategorySummary,
+)
+from lifehub.modules.finance.service.budget_tree import SubCategoryNode
+
+# (year, month)
+Month = tuple[int, int]
+
+
+@dataclass(frozen=True)
+class BudgetStatus:
+    budgeted: float
+    spent: float
+    available: float
+
+
+@dataclass(frozen=True)
+class AssignmentAmount:
+    """A decrypted BudgetAssignment."""
+
+    subcategory_id: uuid.UUID
+    year: int
+    month: Optional[int]
+    week: Optional[int]
+    amount: Decimal
+
+    def months(self) -> list[tuple[Month, Decimal]]:
+        """
+        The months the assignment budgets for, with the amount for each.
+        Weekly assignments count in the month of the week's Monday, and
+        yearly ones are spread evenly over the year.
+        """
+        if self.week is not None:
+            monday = dt.date.fromisocalendar(self.year, self.week, 1)
+            return [((monday.year, monday.month), self.amount)]
+        if self.month is not None:
+            return [((self.year, self.month), self.amount)]
+        return [((self.year, month), self.amount / 12) for month in range(1, 13)]
+
+
+def previous_month(month: Month) -> Month:
+    year, m = month
+    return (year, m - 1) if m > 1 else (year - 1, 12)
+
+
+def next_month(month: Month) -> Month:
+    year, m = month
+    return (year, m + 1) if m < 12 else (year + 1, 1)
+
+
+def assigned_by_month(
+    assignments: Iterable[AssignmentAmount], until: Month
+) -> dict[uuid.UUID, dict[Month, Decimal]]:
+    """
+    Total assigned to each subcategory per month, up to `until`.
+    """
+    assigned: defaultdict[uuid.UUID, defaultdict[Month, Decimal]] = defaultdict(
+        lambda: defaultdict(Decimal)
+    )
+    for assignment in assignments:
+        for assignment_month, amount in assignment.months():
+            if assignment_month <= until:
+                assigned[assignment.subcategory_id][assignment_month] += amount
+    return {subcategory_id: dict(months) for subcategory_id, months in assigned.items()}
+
+
+def roll_forward(
+    balance: Decimal,
+    start: Month,
+    end: Month,
+    default: Decimal,
+    budgets: dict[Month, Decimal],
+    spending: dict[Month, Decimal],
+) -> list[tuple[Month, Decimal]]:
+    """
+    Balance of an ACCUMULATED subcategory at the end of each month from
+    `start` to `end`, given its balance before `start`.
+    A month's budget is its assignments, or the default amount if none.
+    """
+    balances = []
+    month = start
+    while month <= end:
+        balance += budgets.get(month, default) - spending.get(month, Decimal(0))
+        balances.append((month, balance))
+        month = next_month(month)
+    return balances
+
+
+def compute_budget_statuses(
+    subcategories: Sequence[tuple[uuid.UUID, BudgetSubCategoryType, Decimal]],
+    spent: dict[uuid.UUID, Decimal],
+    assigned: dict[uuid.UUID, dict[Month, Decimal]],
+    carried: dict[uuid.UUID, Decimal],
+    month: Month,
+) -> dict[uuid.UUID, BudgetStatus]:
+    """
+    Budget status of each (subcategory_id, type, default amount) in `month`.
+
+    A month's budget is the sum of the subcategory's assignments for it, or
+    its default amount if there are none. Spent is the net outflow of the
+    subcategory's transactions in the month.
+    FIXED subcategories start every month afresh. ACCUMULATED ones also
+    have what they carried over from previous months, see RolloverService.
+    """
+    statuses = {}
+    for subcategory_id, type, default in subcategories:
+        budgeted = assigned.get(subcategory_id, {}).get(month, default)
+        month_spent = spent.get(subcategory_id, Decimal(0))
+        available = budgeted - month_spent
+        if type == BudgetSubCategoryType.ACCUMULATED:
+            available += carried.get(subcategory_id, Decimal(0))
+
+        statuses[subcategory_id] = BudgetStatus(
+            budgeted=round(float(budgeted), 2),
+            spent=round(float(month_spent), 2),
+            available=round(float(available), 2),
+        )
+    return statuses
+
+
+def budget_signature(
+    subcategories: Sequence[SubCategoryNode],
+    summaries: Sequence[MonthlyCategorySummary],
+    assignments: Sequence[BudgetAssignment],
+    carried: dict[uuid.UUID, Decimal],
+) -> bytes:
+    """
+    Identifies the rows a budget status was computed from.
+    Encrypted values get a fresh nonce whenever they are written, so any
+    change to an amount, including one made by another process, changes
+    the signature.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for subcategory in sorted(subcategories, key=lambda s: s.id):
+        digest.update(subcategory.id.bytes + subcategory.type.encode())
+        digest.update(subcategory.amount)
+    for summary in sorted(summaries, key=lambda s: s.subcategory_id):
+        digest.update(summary.subcategory_id.bytes)
+        digest.update(summary.balance)
+    for assignment in sorted(assignments, key=lambda a: a.id):
+        digest.update(assignment.id.bytes)
+        digest.update(
+            f"{assignment.year}-{assignment.month}-{assignment.week}".encode()
+        )
+        digest.update(assignment.amount)
+    for subcategory_id, balance in sorted(carried.items()):
+        digest.update(subcategory_id.bytes + str(balance).encode())
+    return digest.digest()
+
+
+class BudgetStatusCache:
+    """
+    Budget statuses of the most recently used users, per month.
+
+    Entries are keyed by the signature of the rows they were computed from,
+    so they are recomputed as soon as a transaction in the month, a
+    carried over balance or a budget changes.
+    """
+
+    def __init__(self, max_size: int = 1024) -> None:
+        self.max_size = max_size
+        self._entries: OrderedDict[
+            tuple[uuid.UUID, Month], tuple[bytes, dict[uuid.UUID, BudgetStatus]]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self, user_id: uuid.UUID, month: Month, signature: bytes
+    ) -> Optional[dict[uuid.UUID, BudgetStatus]]:
+        with self._lock:
+            entry = self._entries.get((user_id, month))
+            if entry is None or entry[0] != signature:
+                return None
+            self._entries.move_to_end((user_id, month))
+            return entry[1]
+
+    def put(
+        self,
+        user_id: uuid.UUID,
+        month: Month,
+        signature: bytes,
+        statuses: dict[uuid.UUID, BudgetStatus],
+    ) -> None:
+        with self._lock:
+            self._entries[(user_id, month)] = (signature, statuses)
+            self._entries.move_to_end((user_id, month))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+budget_status_cache = BudgetStatusCache()
@@ -0,0 +1,80 @@
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from lifehub.modules.finance.schema import BudgetSubCategoryType
+
+# session.info key of the users whose tree changed in the session's transaction
+PENDING_INVALIDATIONS = "budget_tree_invalidations"
+
+
+@dataclass(frozen=True)
+class SubCategoryNode:
+    id: uuid.UUID
+    category_id: uuid.UUID
+    name: str
+    type: BudgetSubCategoryType
+    amount: bytes  # Encrypted, see budget_signature
+
+
+@dataclass(frozen=True)
+class CategoryNode:
+    id: uuid.UUID
+    name: str
+    subcategories: tuple[SubCategoryNode, ...]
+
+
+BudgetTree = tuple[CategoryNode, ...]
+
+
+class BudgetTreeCache:
+    """
+    Decrypted budget trees of the most recently used users.
+
+    A user's tree must be invalidated whenever their categories or
+    subcategories change. invalidate_on_commit() also drops it once the
+    change is committed (or rolled back), so a tree loaded by a concurrent
+    request before then doesn't stay cached.
+    """
+
+    def __init__(self, max_size: int = 1024) -> None:
+        self.max_size = max_size
+        self._entries: OrderedDict[uuid.UUID, BudgetTree] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: uuid.UUID) -> Optional[BudgetTree]:
+        with self._lock:
+            tree = self._entries.get(user_id)
+            if tree is not None:
+                self._entries.move_to_end(user_id)
+            return tree
+
+    def put(self, user_id: uuid.UUID, tree: BudgetTree) -> None:
+        with self._lock:
+            self._entries[user_id] = tree
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def invalidate_on_commit(self, session: Session, user_id: uuid.UUID) -> None:
+        self.invalidate(user_id)
+        session.info.setdefault(PENDING_INVALIDATIONS, set()).add(user_id)
+
+
+budget_trees = BudgetTreeCache()
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_pending(session: Session, *args: Any) -> None:
+    for user_id in session.info.pop(PENDING_INVALIDATIONS, ()):
+        budget_trees.invalidate(user_id)
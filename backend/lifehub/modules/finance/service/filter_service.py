@@ -1,20 +1,38 @@
 import uuid
+from decimal import Decimal
+from typing import Any, Optional, Sequence
 
 from sqlalchemy.orm import Session
 
 from lifehub.core.common.base.service.user import BaseUserService
+from lifehub.core.common.database_service import session_scope
 from lifehub.core.common.exceptions import ServiceException
 from lifehub.core.security.encryption import EncryptionService
+from lifehub.core.user.repository.user import UserRepository
 from lifehub.core.user.schema import User
 from lifehub.modules.finance.models import (
     BankTransactionFilterResponse,
     CreateBankTransactionFilterRequest,
+    RecategorizationStatusResponse,
 )
 from lifehub.modules.finance.repository import (
     BankTransactionFilterRepository,
+    BankTransactionRepository,
     BudgetSubCategoryRepository,
 )
-from lifehub.modules.finance.schema import BankTransaction, BankTransactionFilter
+from lifehub.modules.finance.schema import (
+    BankTransactionFilter,
+    BankTransactionFilterMatch,
+)
+from lifehub.modules.finance.service.recategorization import RecategorizationJobs
+from lifehub.modules.finance.service.summary_service import (
+    SummaryDeltas,
+    SummaryService,
+)
+from lifehub.modules.finance.service.transaction_matcher import (
+    TransactionMatcher,
+    transaction_matchers,
+)
 
 
 class FilterServiceException(ServiceException):
@@ -24,6 +42,7 @@ class FilterServiceException(ServiceException):
 
 class FilterService(BaseUserService):
     _encryption_service: EncryptionService | None = None
+    _matcher: TransactionMatcher | None = None
 
     def __init__(self, session: Session, user: User):
         super().__init__(session, user)
@@ -34,17 +53,38 @@ class FilterService(BaseUserService):
             self._encryption_service = EncryptionService(self.session, self.user)
         return self._encryption_service
 
+    def _filter_response(
+        self, filter: BankTransactionFilter
+    ) -> BankTransactionFilterResponse:
+        return BankTransactionFilterResponse(
+            id=str(filter.id),
+            description=filter.description,
+            subcategory_id=str(filter.subcategory_id)
+            if filter.subcategory_id
+            else None,
+            matches=[match.match_string for match in filter.matches],
+        )
+
+    def _get_subcategory_id(self, subcategory_id: str) -> uuid.UUID:
+        """
+        Parses a subcategory ID, checking that the subcategory is the user's.
+        """
+        try:
+            parsed_id = uuid.UUID(subcategory_id)
+        except ValueError:
+            raise FilterServiceException(400, "Invalid subcategory ID")
+
+        subcategory = BudgetSubCategoryRepository(self.session).get_by_id(parsed_id)
+        if subcategory is None or subcategory.category.user_id != self.user.id:
+            raise FilterServiceException(404, "Subcategory not found")
+        return parsed_id
+
     def get_bank_transactions_filters(self) -> list[BankTransactionFilterResponse]:
         bank_transaction_filters_repo = BankTransactionFilterRepository(
             self.user, self.session
         )
         return [
-            BankTransactionFilterResponse(
-                id=str(filter.id),
-                description=filter.description,
-                subcategory_id=str(filter.subcategory_id),
-                matches=[match.match_string for match in filter.matches],
-            )
+            self._filter_response(filter)
             for filter in bank_transaction_filters_repo.get_all()
         ]
 
@@ -55,37 +95,23 @@ class FilterService(BaseUserService):
             self.user, self.session
         )
 
-        try:
-            subcategory_id = uuid.UUID(data.subcategory_id)
-        except ValueError:
+        if data.subcategory_id is None:
             raise FilterServiceException(400, "Invalid subcategory ID")
-
-        if (
-            BudgetSubCategoryRepository(self.user, self.session).get_by_id(
-                subcategory_id
-            )
-            is None
-        ):
-            raise FilterServiceException(404, "Subcategory not found")
+        subcategory_id = self._get_subcategory_id(data.subcategory_id)
 
         filter = BankTransactionFilter(
             user_id=self.user.id,
             description=data.description if data.description else None,
             subcategory_id=subcategory_id,
-            matches=[],
+            matches=[
+                BankTransactionFilterMatch(match_string=match)
+                for match in dict.fromkeys(data.matches or [])
+            ],
         )
 
         bank_transaction_filters_repo.add(filter)
-
-        self.session.commit()
-        return BankTransactionFilterResponse(
-            id=str(filter.id),
-            description=filter.description,
-            subcategory_id=str(filter.subcategory_id)
-            if filter.subcategory_id
-            else None,
-            matches=[match.match_string for match in filter.matches],
-        )
+        bank_transaction_filters_repo.flush()
+        return self._filter_response(filter)
 
     def update_bank_transactions_filter(
         self, filter_id: uuid.UUID, data: CreateBankTransactionFilterRequest
@@ -100,46 +126,150 @@ class FilterService(BaseUserService):
             data.description if data.description else filter.description
         )
         filter.subcategory_id = (
-            uuid.UUID(data.subcategory_id)
+            self._get_subcategory_id(data.subcategory_id)
             if data.subcategory_id
             else filter.subcategory_id
         )
+        if data.matches is not None:
+            filter.matches = [
+                BankTransactionFilterMatch(match_string=match)
+                for match in dict.fromkeys(data.matches)
+            ]
+            bank_transaction_filters_repo.flush()
 
-        self.session.commit()
+        return self._filter_response(filter)
 
-        return BankTransactionFilterResponse(
-            id=str(filter.id),
-            description=filter.description,
-            subcategory_id=str(filter.subcategory_id)
-            if filter.subcategory_id
-            else None,
-            matches=[match.match_string for match in filter.matches],
+    @property
+    def matcher(self) -> TransactionMatcher:
+        """
+        The user's filters compiled into a matcher, loaded once per service.
+        Compiled matchers are cached until the filters change
+        (see TransactionMatcherCache).
+        """
+        if self._matcher is None:
+            filters = BankTransactionFilterRepository(self.user, self.session).get_all()
+            self._matcher = transaction_matchers.get(self.user.id, filters)
+        return self._matcher
+
+    def categorize_rows(self, rows: Sequence[dict[str, Any]]) -> None:
+        """
+        Categorize new bank_transaction rows in place, before they are encrypted.
+        Sets subcategory_id and user_description from the matching filter.
+        """
+        for row in rows:
+            rule = self.matcher.match(row.get("description"), row.get("counterparty"))
+            row["subcategory_id"] = rule.subcategory_id if rule else None
+            row["user_description"] = rule.description if rule else None
+
+    def _categorization_updates(
+        self, transactions: Sequence[Any]
+    ) -> list[dict[str, Any]]:
+        """
+        Matches a batch of stored transactions (ORM rows or rows with the same
+        columns), returning the updates of the ones whose subcategory_id or
+        user_description change.
+        Filters without a description keep the transaction's user_description.
+        """
+        texts = self.encryption_service.decrypt_columns(
+            transactions, ["description", "counterparty", "user_description"]
         )
 
-    def apply_filters_to_transaction(self, transaction: BankTransaction) -> None:
+        changes = []
+        for transaction, text in zip(transactions, texts):
+            rule = self.matcher.match(text["description"], text["counterparty"])
+            if rule is None:
+                continue
+            description = rule.description or text["user_description"]
+            if (
+                rule.subcategory_id != transaction.subcategory_id
+                or description != text["user_description"]
+            ):
+                changes.append((transaction, rule))
+
+        # Move the amounts of recategorized transactions between the
+        # subcategories' monthly summaries
+        moved = [
+            (transaction, rule)
+            for transaction, rule in changes
+            if rule.subcategory_id != transaction.subcategory_id
+        ]
+        amounts = self.encryption_service.decrypt_many(
+            [transaction.amount for transaction, _ in moved]
+        )
+        deltas = SummaryDeltas()
+        for (transaction, rule), amount in zip(moved, amounts):
+            deltas.add_to_subcategory(
+                transaction.subcategory_id, transaction.date, -Decimal(amount)
+            )
+            deltas.add_to_subcategory(
+                rule.subcategory_id, transaction.date, Decimal(amount)
+            )
+        SummaryService(self.session, self.user).apply(deltas)
+
+        # Only descriptions that change are encrypted again
+        descriptions = self.encryption_service.encrypt_many(
+            [rule.description for _, rule in changes]
+        )
+        return [
+            {
+                "id": transaction.id,
+                "subcategory_id": rule.subcategory_id,
+                "user_description": description or transaction.user_description,
+            }
+            for (transaction, rule), description in zip(changes, descriptions)
+        ]
+
+    def recategorize_chunk(
+        self, after_id: Optional[uuid.UUID], chunk_size: int
+    ) -> tuple[Optional[uuid.UUID], int, int]:
         """
-        Apply user's filters to a given transaction. If any match rules of a filter are met,
-        update the transaction's subcategory_id and user_description.
+        Re-applies the filters to the user's next chunk of stored transactions,
+        in id order, after `after_id`.
+        Returns the id to continue after (None once done), and the number of
+        scanned and updated transactions.
         """
-        bank_transaction_filters_repo = BankTransactionFilterRepository(
-            self.user, self.session
+        bank_transaction_repo = BankTransactionRepository(self.session)
+        rows = bank_transaction_repo.get_categorization_chunk(
+            self.user, after_id, chunk_size
         )
-        filters = bank_transaction_filters_repo.get_all()
-
-        for filter in filters:
-            for match_rule in filter.matches:
-                if (
-                    match_rule.match_string.lower() in transaction.description.lower()
-                    if transaction.description
-                    else False
-                ) or (
-                    match_rule.match_string.lower() in transaction.counterparty.lower()
-                    if transaction.counterparty
-                    else False
-                ):
-                    # Update the transaction's subcategory_id and user_description
-                    transaction.subcategory_id = filter.subcategory_id
-                    transaction.user_description = filter.description
-                    break  # Stop checking more match rules for this filter
-
-        self.session.commit()
+        updates = self._categorization_updates(rows)
+        bank_transaction_repo.update_many(updates)
+        last_id = rows[-1].id if len(rows) == chunk_size else None
+        return last_id, len(rows), len(updates)
+
+    def count_transactions(self) -> int:
+        return BankTransactionRepository(self.session).count_for_user(self.user)
+
+    def start_recategorization(self) -> RecategorizationStatusResponse:
+        """
+        Starts re-applying the filters to all the user's stored transactions
+        in the background, see RecategorizationJobs.
+        """
+        return recategorization_jobs.start(self.user.id).to_response()
+
+    def get_recategorization_status(self) -> RecategorizationStatusResponse:
+        progress = recategorization_jobs.get(self.user.id)
+        if progress is None:
+            raise FilterServiceException(404, "No recategorization started")
+        return progress.to_response()
+
+
+def _count_transactions(user_id: uuid.UUID) -> int:
+    with session_scope() as session:
+        user = UserRepository(session).get_by_id(user_id)
+        if user is None:
+            return 0
+        return FilterService(session, user).count_transactions()
+
+
+def _recategorize_chunk(
+    user_id: uuid.UUID, after_id: Optional[uuid.UUID], chunk_size: int
+) -> tuple[Optional[uuid.UUID], int, int]:
+    with session_scope() as session:
+        user = UserRepository(session).get_by_id(user_id)
+        if user is None:
+            return None, 0, 0
+        return FilterService(session, user).recategorize_chunk(after_id, chunk_size)
+
+
+recategorization_jobs = RecategorizationJobs(_count_transactions, _recategorize_chunk)
@@ -1,10 +1,15 @@
 import datetime as dt
 import uuid
+from decimal import Decimal
 from typing import Optional
 
 from sqlalchemy.orm import Session
 
 from lifehub.config.constants import cfg
+from lifehub.core.common.base.pagination import (
+    InvalidCursorError,
+    PaginatedResponse,
+)
 from lifehub.core.common.base.service.user import BaseUserService
 from lifehub.core.common.exceptions import ServiceException
 from lifehub.core.provider.repository.provider import ProviderRepository
@@ -12,14 +17,23 @@ from lifehub.core.security.encryption import EncryptionService
 from lifehub.core.user.schema import User
 from lifehub.modules.finance.service.filter_service import FilterService
 from lifehub.modules.finance.service.gocardless_service import GoCardlessService
+from lifehub.modules.finance.service.institution_catalogue import (
+    institution_catalogue,
+)
+from lifehub.modules.finance.service.summary_service import (
+    SummaryDeltas,
+    SummaryService,
+)
 from lifehub.modules.finance.service.t212_service import Trading212Service
 
 from ..models import (
     BankBalanceResponse,
     BankInstitutionResponse,
+    BankMonthlySummaryResponse,
     BankTransactionResponse,
     CountryResponse,
     GetBankTransactionsRequest,
+    T212ExportJobResponse,
 )
 from ..repository import BankAccountRepository, BankTransactionRepository
 from ..schema import AccountBalance, BankAccount
@@ -35,6 +49,7 @@ class FinanceService(BaseUserService):
     _trading212_service: Trading212Service | None = None
     _gocardless_service: GoCardlessService | None = None
     _filter_service: FilterService | None = None
+    _summary_service: SummaryService | None = None
 
     def __init__(self, session: Session, user: User):
         super().__init__(session, user)
@@ -65,6 +80,12 @@ class FinanceService(BaseUserService):
             self._filter_service = FilterService(self.session, self.user)
         return self._filter_service
 
+    @property
+    def summary_service(self) -> SummaryService:
+        if self._summary_service is None:
+            self._summary_service = SummaryService(self.session, self.user)
+        return self._summary_service
+
     def get_countries(self) -> list[CountryResponse]:
         """Returns a list of supported countries."""
         return [
@@ -101,33 +122,30 @@ class FinanceService(BaseUserService):
             CountryResponse(name="United Kingdom", code="GB"),
         ]
 
-    def get_institutions(self, country: str = "PT") -> list[BankInstitutionResponse]:
+    def _check_country(self, country: str) -> None:
         """
-        Fetches the available institutions for bank connections for a specific country.
+        Rejects unsupported countries, so they aren't requested from the
+        provider or cached by the InstitutionCatalogue.
         """
-        res = []
-        # GoCardless
-        res.extend(self.gocardless_service.get_institutions(country))
-        # Trading212
-        res.append(
-            BankInstitutionResponse(
-                id="trading212", type="token", name="Trading212", logo=""
-            )
-        )
+        if country not in {c.code for c in self.get_countries()}:
+            raise FinanceServiceException(400, "Unsupported country")
 
-        res.sort(key=lambda x: x.name)
-        # Development
-        if cfg.ENVIRONMENT == "development":
-            res.append(
-                BankInstitutionResponse(
-                    id="SANDBOXFINANCE_SFIN0000",
-                    type="oauth",
-                    name="Sandbox Finance",
-                    logo="",
-                )
-            )
+    def get_institutions(self, country: str = "PT") -> bytes:
+        """
+        Returns the available institutions for bank connections for a specific
+        country, sorted by name and serialized as JSON (see InstitutionCatalogue).
+        """
+        self._check_country(country)
+        return institution_catalogue.get(country).body
 
-        return res
+    def search_institutions(
+        self, query: str, country: str = "PT", limit: int = 20
+    ) -> list[BankInstitutionResponse]:
+        """
+        Searches the institutions of a country by name.
+        """
+        self._check_country(country)
+        return institution_catalogue.search(country, query, limit)
 
     def get_bank_login(self, bank_id: str) -> str:
         return self.gocardless_service.get_bank_login(bank_id)
@@ -135,13 +153,23 @@ class FinanceService(BaseUserService):
     def confirm_bank_login(self, ref: str) -> None:
         self.gocardless_service.confirm_bank_login(ref)
 
-    def _sync_balance(self, account: BankAccount) -> BankBalanceResponse:
+    def get_account_provider(self, account: BankAccount) -> str:
         """
-        Fetches the latest balance from GoCardless bank accounts.
+        Returns the provider that syncs the account.
         """
-        balance = None
         institution_id = self.encryption_service.decrypt_data(account.institution_id)
         match institution_id:
+            case "trading212":
+                return "trading212"
+            case _:
+                return "gocardless"
+
+    def sync_balance(self, account: BankAccount) -> None:
+        """
+        Fetches the latest balance of the account from its provider.
+        """
+        balance = None
+        match self.get_account_provider(account):
             case "trading212":
                 balance = self.trading212_service.fetch_balance()
             case _:
@@ -153,52 +181,75 @@ class FinanceService(BaseUserService):
         encrypted_balance = self.encryption_service.encrypt_data(str(balance))
         account.balance.amount = encrypted_balance
         account.balance.last_synced = dt.datetime.now()
-        self.session.commit()
 
-        return BankBalanceResponse(
-            bank=institution_id, account_id=str(account.id), balance=balance
-        )
-
-    def get_bank_balances(self) -> list[BankBalanceResponse]:
-        """
-        Fetches the latest balances from the bank accounts.
-        """
-        bank_account_repo = BankAccountRepository(self.user, self.session)
-        balances: list[BankBalanceResponse] = []
-
-        for account in bank_account_repo.get_all():
-            if account.balance.synced_before(hours=6):
-                balances.append(self._sync_balance(account))
-            else:
-                balances.append(
-                    BankBalanceResponse(
-                        bank=self.encryption_service.decrypt_data(
-                            account.institution_id
-                        ),
-                        account_id=str(account.id),
-                        balance=float(
-                            self.encryption_service.decrypt_data(account.balance.amount)
-                        ),
-                    )
-                )
-        return balances
-
-    def _fetch_new_transactions(self, account: BankAccount) -> None:
+    def fetch_new_transactions(self, account: BankAccount) -> None:
         """
         Fetches the latest transactions from bank accounts based on their provider.
         """
-        institution_id = self.encryption_service.decrypt_data(account.institution_id)
-        match institution_id:
+        match self.get_account_provider(account):
             case "trading212":
                 self.trading212_service.fetch_new_transactions(account)
             case _:
                 self.gocardless_service.fetch_new_transactions(account)
 
+    def sync_account(self, account: BankAccount) -> None:
+        """
+        Syncs the transactions and balance of the account if they are due.
+        Called by the fetch daemon; API reads only use the stored data.
+        """
+        if account.synced_before(seconds=cfg.FETCH_TRANSACTIONS_INTERVAL):
+            if self.summary_service.needs_rebuild(account):
+                self.summary_service.rebuild(account)
+            self.fetch_new_transactions(account)
+        if account.balance.synced_before(seconds=cfg.FETCH_BALANCE_INTERVAL):
+            self.sync_balance(account)
+
+    def get_export_status(self, account_id: uuid.UUID) -> T212ExportJobResponse:
+        """
+        Returns the status of the latest Trading212 export of the account.
+        """
+        account = BankAccountRepository(self.user, self.session).get_by_id(account_id)
+        if account is None:
+            raise FinanceServiceException(404, "Bank account not found")
+
+        job = self.trading212_service.get_export_job(account)
+        if job is None:
+            raise FinanceServiceException(404, "Export not found")
+
+        return T212ExportJobResponse(
+            id=str(job.id),
+            account_id=str(job.account_id),
+            status=job.status,
+            from_date=job.from_date,
+            to_date=job.to_date,
+            attempts=job.attempts,
+            next_poll_at=job.next_poll_at,
+            error=job.error,
+            updated_at=job.updated_at,
+        )
+
+    def get_bank_balances(self) -> list[BankBalanceResponse]:
+        """
+        Returns the balances of the bank accounts, as last synced.
+        """
+        bank_account_repo = BankAccountRepository(self.user, self.session)
+
+        return [
+            BankBalanceResponse(
+                bank=self.encryption_service.decrypt_data(account.institution_id),
+                account_id=str(account.id),
+                balance=float(
+                    self.encryption_service.decrypt_data(account.balance.amount)
+                ),
+            )
+            for account in bank_account_repo.get_all()
+        ]
+
     def get_bank_transactions(
         self, request: GetBankTransactionsRequest
-    ) -> list[BankTransactionResponse]:
+    ) -> PaginatedResponse[BankTransactionResponse]:
         """
-        Fetches paginated transactions with optional filtering.
+        Fetches a page of transactions with optional filtering, newest first.
 
         Args:
             request: Pagination and filtering parameters
@@ -211,11 +262,6 @@ class FinanceService(BaseUserService):
 
         user_accounts = bank_account_repo.get_all()
 
-        # Sync transactions if needed
-        for account in user_accounts:
-            if account.synced_before(hours=6):
-                self._fetch_new_transactions(account)
-
         # request.start_date is YYYY-MM-DD
         # beginning of the month if not provided
         start_date = (
@@ -223,45 +269,57 @@ class FinanceService(BaseUserService):
             if request.start_date
             else dt.datetime(dt.datetime.now().year, dt.datetime.now().month, 1)
         )
+        # No upper bound if not provided, transactions aren't future dated.
+        # A bound of now() would change the count query, and so its count
+        # cache key, on every request.
         end_date = (
-            dt.datetime.fromisoformat(request.end_date)
-            if request.end_date
-            else dt.datetime.now()
+            dt.datetime.fromisoformat(request.end_date) if request.end_date else None
         )
         subcategory_id = (
             uuid.UUID(request.subcategory_id) if request.subcategory_id else None
         )
 
-        # Get paginated transactions from repository
-        transactions = bank_transaction_repo.get_filtered_transactions(
-            accounts=user_accounts,
-            start_date=start_date,
-            end_date=end_date,
-            subcategory_id=subcategory_id,
-            description=request.description,
-        )
+        try:
+            page = bank_transaction_repo.get_filtered_page(
+                request,
+                accounts=user_accounts,
+                start_date=start_date,
+                end_date=end_date,
+                subcategory_id=subcategory_id,
+                description=request.description,
+            )
+        except InvalidCursorError:
+            raise FinanceServiceException(400, "Invalid cursor")
 
-        # Convert DB models to response models
-        return [
+        # Only the transactions on the page are decrypted, in one batch per column
+        amounts = self.encryption_service.decrypt_many([t.amount for t in page.items])
+        texts = self.encryption_service.decrypt_columns(
+            page.items, ["user_description", "description", "counterparty"]
+        )
+        items = [
             BankTransactionResponse(
                 id=str(transaction.id),
                 account_id=str(transaction.account_id),
-                amount=float(self.encryption_service.decrypt_data(transaction.amount)),
+                amount=float(amount),
                 date=transaction.date,
-                description=self.encryption_service.decrypt_data(
-                    transaction.user_description
-                )
-                or self.encryption_service.decrypt_data(transaction.description),
-                counterparty=self.encryption_service.decrypt_data(
-                    transaction.counterparty
-                ),
+                description=text["user_description"] or text["description"],
+                counterparty=text["counterparty"],
                 subcategory_id=str(transaction.subcategory_id)
                 if transaction.subcategory_id
                 else None,
             )
-            for transaction in transactions
+            for transaction, amount, text in zip(page.items, amounts, texts)
         ]
 
+        return PaginatedResponse(items=items, pagination=page.pagination)
+
+    def get_summary(self, months: int) -> list[BankMonthlySummaryResponse]:
+        """
+        Returns the monthly income, expenses and subcategory balances of the
+        bank accounts for the last `months` months.
+        """
+        return self.summary_service.get_summary(months)
+
     def update_bank_transaction(
         self,
         account_id: uuid.UUID,
@@ -279,37 +337,38 @@ class FinanceService(BaseUserService):
         if bank_account is None:
             raise FinanceServiceException(404, "Bank account not found")
 
+        self.encryption_service.bind_to_session()
         bank_transaction_repo = BankTransactionRepository(self.session)
         db_t = bank_transaction_repo.get_by_id(bank_account, transaction_id)
 
         if db_t is None:
             raise FinanceServiceException(404, "Transaction not found")
+        old_amount = Decimal(db_t.amount_text)
+        old_subcategory_id = db_t.subcategory_id
         if user_description is not None:
-            db_t.user_description = self.encryption_service.encrypt_data(
-                user_description
-            )
+            db_t.user_description_text = user_description
         if subcategory_id is not None:
             db_t.subcategory_id = uuid.UUID(subcategory_id)
         if amount is not None:
-            db_t.amount = self.encryption_service.encrypt_data(str(amount))
-
-        self.session.commit()
+            db_t.amount_text = str(amount)
 
-        description = (
-            user_description
-            or self.encryption_service.decrypt_data(db_t.user_description)
-            or self.encryption_service.decrypt_data(db_t.description)
-        )
-        counterparty = self.encryption_service.decrypt_data(db_t.counterparty)
-        amount = amount or float(self.encryption_service.decrypt_data(db_t.amount))
+        new_amount = Decimal(db_t.amount_text)
+        if new_amount != old_amount or db_t.subcategory_id != old_subcategory_id:
+            deltas = SummaryDeltas()
+            deltas.add(
+                bank_account.id, old_subcategory_id, db_t.date, old_amount, sign=-1
+            )
+            deltas.add(bank_account.id, db_t.subcategory_id, db_t.date, new_amount)
+            self.summary_service.apply(deltas)
 
+        # Values set above are served from the session's plaintext cache
         return BankTransactionResponse(
             id=str(db_t.id),
             account_id=str(db_t.account.id),
-            amount=amount,
+            amount=float(db_t.amount_text),
             date=db_t.date,
-            description=description,
-            counterparty=counterparty,
+            description=db_t.user_description_text or db_t.description_text,
+            counterparty=db_t.counterparty_text,
             subcategory_id=str(db_t.subcategory_id) if db_t.subcategory_id else None,
         )
 
@@ -346,5 +405,3 @@ class FinanceService(BaseUserService):
                 last_synced=dt.datetime.now() - dt.timedelta(weeks=1),
             )
         )
-
-        self.session.commit()
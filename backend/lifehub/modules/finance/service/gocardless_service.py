@@ -1,5 +1,5 @@
 import datetime as dt
-from typing import Optional
+from typing import Any, Optional
 
 from sqlalchemy.orm import Session
 
@@ -9,7 +9,8 @@ from lifehub.core.security.encryption import EncryptionService
 from lifehub.core.user.schema import User
 from lifehub.modules.finance.models import BankInstitutionResponse
 from lifehub.modules.finance.repository import BankAccountRepository
-from lifehub.modules.finance.schema import AccountBalance, BankAccount, BankTransaction
+from lifehub.modules.finance.schema import AccountBalance, BankAccount
+from lifehub.modules.finance.service.ingestion_service import IngestionService
 from lifehub.providers.gocardless.api_client import GoCardlessAPIClient
 from lifehub.providers.gocardless.models import Transaction
 
@@ -21,6 +22,7 @@ class GoCardlessServiceException(ServiceException):
 
 class GoCardlessService(BaseUserService):
     _encryption_service: EncryptionService | None = None
+    _ingestion_service: IngestionService | None = None
     _gocardless_api: GoCardlessAPIClient | None = None
 
     def __init__(self, session: Session, user: User):
@@ -32,17 +34,24 @@ class GoCardlessService(BaseUserService):
             self._encryption_service = EncryptionService(self.session, self.user)
         return self._encryption_service
 
+    @property
+    def ingestion_service(self) -> IngestionService:
+        if self._ingestion_service is None:
+            self._ingestion_service = IngestionService(self.session, self.user)
+        return self._ingestion_service
+
     @property
     def gocardless_api(self) -> GoCardlessAPIClient:
         if self._gocardless_api is None:
-            self._gocardless_api = GoCardlessAPIClient(self.user, self.session)
+            self._gocardless_api = GoCardlessAPIClient.for_session(
+                self.user, self.session
+            )
         return self._gocardless_api
 
     def get_institutions(self, country: str) -> list[BankInstitutionResponse]:
         """
         Fetches a list of institutions available in the specified country.
         """
-        api = GoCardlessAPIClient(self.user, self.session)
         return [
             BankInstitutionResponse(
                 id=inst.id,
@@ -50,16 +59,14 @@ class GoCardlessService(BaseUserService):
                 name=inst.name,
                 logo=inst.logo,
             )
-            for inst in api.get_institutions(country)
+            for inst in self.gocardless_api.get_institutions(country)
         ]
 
     def get_bank_login(self, bank_id: str) -> str:
-        api = GoCardlessAPIClient(self.user, self.session)
-        return api.create_requisition(bank_id).link
+        return self.gocardless_api.create_requisition(bank_id).link
 
     def confirm_bank_login(self, ref: str) -> None:
-        api = GoCardlessAPIClient(self.user, self.session)
-        requisition = api.get_requisition(ref)
+        requisition = self.gocardless_api.get_requisition(ref)
         bank_account_repo = BankAccountRepository(self.user, self.session)
         for account_id in requisition.accounts:
             encrypted_account_id = self.encryption_service.encrypt_data(account_id)
@@ -82,26 +89,21 @@ class GoCardlessService(BaseUserService):
                 )
             )
 
-        self.session.commit()
-
     def fetch_balance(self, account: BankAccount) -> Optional[float]:
         """
         Fetches the latest balance from GoCardless.
         """
-        balance = (
-            GoCardlessAPIClient(self.user, self.session)
-            .get_account_balances(
-                self.encryption_service.decrypt_data(account.account_id)
-            )
-            .available_amount
-        )
+        balance = self.gocardless_api.get_account_balances(
+            self.encryption_service.decrypt_data(account.account_id)
+        ).available_amount
         return float(balance) if balance is not None else None
 
     def _parse_transactions(
         self, account: BankAccount, api_transactions: list[Transaction]
-    ) -> list[BankTransaction]:
+    ) -> list[dict[str, Any]]:
         """
-        Fetches the latest transactions from GoCardless bank accounts and applies any user filters.
+        Converts GoCardless transactions to bank_transaction rows, see
+        IngestionService.
         """
         transactions = []
 
@@ -131,27 +133,24 @@ class GoCardlessService(BaseUserService):
 
             counterparty = t.debtorName if t.debtorName else t.creditorName
 
-            encrypted_amount = self.encryption_service.encrypt_data(str(amount))
-            encrypted_description = self.encryption_service.encrypt_data(
-                description if description is not None else ""
+            transactions.append(
+                {
+                    "transaction_id": t.transactionId,
+                    "account_id": account.id,
+                    "date": date,
+                    "amount": str(amount),
+                    "description": description if description is not None else "",
+                    "counterparty": counterparty if counterparty is not None else "",
+                }
             )
-            encrypted_counterparty = self.encryption_service.encrypt_data(
-                counterparty if counterparty is not None else ""
-            )
-
-            new_t = BankTransaction(
-                transaction_id=t.transactionId,
-                account_id=account.id,
-                date=date,
-                amount=encrypted_amount,
-                description=encrypted_description,
-                counterparty=encrypted_counterparty,
-            )
-            transactions.append(new_t)
 
         return transactions
 
     def fetch_new_transactions(self, account: BankAccount) -> None:
+        """
+        Fetches transactions since the last sync.
+        The range overlaps the previous sync, already stored transactions are skipped.
+        """
         api_transactions = self.gocardless_api.get_account_transactions(
             self.encryption_service.decrypt_data(account.account_id),
             account.last_synced.strftime("%Y-%m-%d"),
@@ -159,5 +158,4 @@ class GoCardlessService(BaseUserService):
         transactions = self._parse_transactions(account, api_transactions.booked)
         account.last_synced = dt.datetime.now()
 
-        self.session.add_all(transactions)
-        self.session.commit()
+        self.ingestion_service.ingest_transactions(account, transactions)
@@ -0,0 +1,76 @@
+import itertools
+from typing import Any, Iterable
+
+from sqlalchemy.orm import Session
+
+from lifehub.config.constants import cfg
+from lifehub.core.common.base.service.user import BaseUserService
+from lifehub.core.security.encryption import EncryptionService
+from lifehub.core.user.schema import User
+from lifehub.modules.finance.repository import BankTransactionRepository
+from lifehub.modules.finance.schema import BankAccount
+from lifehub.modules.finance.service.filter_service import FilterService
+from lifehub.modules.finance.service.summary_service import SummaryService
+
+ENCRYPTED_FIELDS = ["amount", "description", "counterparty", "user_description"]
+
+
+class IngestionService(BaseUserService):
+    """
+    Stores the transactions fetched from the providers.
+    """
+
+    _encryption_service: EncryptionService | None = None
+    _filter_service: FilterService | None = None
+    _summary_service: SummaryService | None = None
+
+    def __init__(self, session: Session, user: User):
+        super().__init__(session, user)
+
+    @property
+    def encryption_service(self) -> EncryptionService:
+        if self._encryption_service is None:
+            self._encryption_service = EncryptionService(self.session, self.user)
+        return self._encryption_service
+
+    @property
+    def filter_service(self) -> FilterService:
+        if self._filter_service is None:
+            self._filter_service = FilterService(self.session, self.user)
+        return self._filter_service
+
+    @property
+    def summary_service(self) -> SummaryService:
+        if self._summary_service is None:
+            self._summary_service = SummaryService(self.session, self.user)
+        return self._summary_service
+
+    def ingest_transactions(
+        self, account: BankAccount, rows: Iterable[dict[str, Any]]
+    ) -> int:
+        """
+        Stores plaintext bank_transaction rows in batches of INGEST_BATCH_SIZE.
+        Transactions already stored for the account are skipped. New ones are
+        categorized, counted in the monthly summaries, encrypted and inserted.
+        Returns the number of new transactions.
+        """
+        bank_transaction_repo = BankTransactionRepository(self.session)
+        inserted = 0
+        for batch in itertools.batched(rows, cfg.INGEST_BATCH_SIZE):
+            existing = bank_transaction_repo.get_existing_transaction_ids(
+                account, [row["transaction_id"] for row in batch]
+            )
+            # Providers can list a transaction twice in the same range
+            new_rows = list(
+                {
+                    row["transaction_id"]: row
+                    for row in batch
+                    if row["transaction_id"] not in existing
+                }.values()
+            )
+            self.filter_service.categorize_rows(new_rows)
+            self.summary_service.add_transactions(new_rows)
+            self.encryption_service.encrypt_columns(new_rows, ENCRYPTED_FIELDS)
+            bank_transaction_repo.insert_many(new_rows)
+            inserted += len(new_rows)
+        return inserted
@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+from lifehub.config.constants import cfg
+from lifehub.core.common.database_service import session_scope
+from lifehub.core.user.repository.user import UserRepository
+from lifehub.modules.finance.models import BankInstitutionResponse
+from lifehub.modules.finance.service.gocardless_service import GoCardlessService
+
+
+@dataclass
+class CountryCatalogue:
+    institutions: list[BankInstitutionResponse]  # sorted by name
+    # The institutions serialized as a JSON list, served as is
+    body: bytes
+    # Case-folded names, for searches
+    search_names: list[str]
+    fetched_at: float
+
+
+class InstitutionCatalogue:
+    """
+    Process-wide cache of the institutions available in each country.
+
+    A country is fetched on its first request. Within `ttl` seconds the
+    cached catalogue is served as is. After that it is still served, but a
+    refresh runs in the background (once per country at a time). After `ttl`
+    plus `stale_ttl` seconds it is too stale, and the request waits for the
+    refresh.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], list[BankInstitutionResponse]],
+        ttl: int,
+        stale_ttl: int,
+    ) -> None:
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: dict[str, CountryCatalogue] = {}
+        self._refreshing: set[str] = set()
+        self._lock = threading.Lock()
+        # Serializes the fetches requests wait for
+        self._fetch_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="institutions"
+        )
+
+    @staticmethod
+    def _age(entry: CountryCatalogue) -> float:
+        return time.monotonic() - entry.fetched_at
+
+    def _refresh(self, country: str) -> CountryCatalogue:
+        institutions = sorted(self.fetch(country), key=lambda i: i.name)
+        entry = CountryCatalogue(
+            institutions=institutions,
+            body=json.dumps([asdict(i) for i in institutions]).encode(),
+            search_names=[i.name.casefold() for i in institutions],
+            fetched_at=time.monotonic(),
+        )
+        self._entries[country] = entry
+        return entry
+
+    def _refresh_in_background(self, country: str) -> None:
+        try:
+            self._refresh(country)
+        except Exception as e:
+            print(f"Failed to refresh institutions for {country}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(country)
+
+    def get(self, country: str) -> CountryCatalogue:
+        entry = self._entries.get(country)
+        if entry is None or self._age(entry) > self.ttl + self.stale_ttl:
+            with self._fetch_lock:
+                # Another request may have fetched it while this one waited
+                entry = self._entries.get(country)
+                if entry is None or self._age(entry) > self.ttl + self.stale_ttl:
+                    entry = self._refresh(country)
+            return entry
+
+        if self._age(entry) > self.ttl:
+            with self._lock:
+                if country not in self._refreshing:
+                    self._refreshing.add(country)
+                    self._executor.submit(self._refresh_in_background, country)
+        return entry
+
+    def search(
+        self, country: str, query: str, limit: int
+    ) -> list[BankInstitutionResponse]:
+        """
+        Returns the institutions whose name contains the query, the ones
+        starting with it first.
+        """
+        entry = self.get(country)
+        query = query.casefold().strip()
+        prefix = []
+        contains = []
+        for institution, name in zip(entry.institutions, entry.search_names):
+            if name.startswith(query):
+                prefix.append(institution)
+            elif query in name:
+                contains.append(institution)
+        return (prefix + contains)[:limit]
+
+
+def fetch_institutions(country: str) -> list[BankInstitutionResponse]:
+    """
+    Fetches the institutions of every provider for a country.
+    GoCardless is called with the admin token, in a session of its own so
+    background refreshes don't depend on a request.
+    """
+    with session_scope() as session:
+        admin = UserRepository(session).get_by_username(cfg.ADMIN_USERNAME)
+        if admin is None:
+            raise Exception(f"User {cfg.ADMIN_USERNAME} not found in the database")
+        res = GoCardlessService(session, admin).get_institutions(country)
+
+    res.append(
+        BankInstitutionResponse(
+            id="trading212", type="token", name="Trading212", logo=""
+        )
+    )
+    # Development
+    if cfg.ENVIRONMENT == "development":
+        res.append(
+            BankInstitutionResponse(
+                id="SANDBOXFINANCE_SFIN0000",
+                type="oauth",
+                name="Sandbox Finance",
+                logo="",
+            )
+        )
+    return res
+
+
+institution_catalogue = InstitutionCatalogue(
+    fetch_institutions, cfg.INSTITUTIONS_CACHE_TTL, cfg.INSTITUTIONS_STALE_TTL
+)
@@ -0,0 +1,102 @@
+import datetime as dt
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from lifehub.config.constants import cfg
+from lifehub.modules.finance.models import RecategorizationStatusResponse
+
+# (user_id, after_id, chunk_size) -> (next after_id or None, scanned, updated)
+RecategorizeChunk = Callable[
+    [uuid.UUID, Optional[uuid.UUID], int], tuple[Optional[uuid.UUID], int, int]
+]
+
+
+@dataclass
+class RecategorizationProgress:
+    status: str = "running"  # running, done or failed
+    total: int = 0
+    scanned: int = 0
+    updated: int = 0
+    error: Optional[str] = None
+    started_at: dt.datetime = field(default_factory=dt.datetime.now)
+    finished_at: Optional[dt.datetime] = None
+
+    def to_response(self) -> RecategorizationStatusResponse:
+        return RecategorizationStatusResponse(
+            status=self.status,
+            total=self.total,
+            scanned=self.scanned,
+            updated=self.updated,
+            error=self.error,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+        )
+
+
+class RecategorizationJobs:
+    """
+    Re-applies users' filters to their stored transactions in the background.
+
+    A job walks the user's transactions in chunks of INGEST_BATCH_SIZE, each
+    one in its own unit of work, so progress is committed as it goes and the
+    job doesn't hold a transaction open over the user's whole history.
+    Only one job runs per user. Starting a job while one is running makes
+    it start over once it finishes, so it ends up using the latest filters.
+    """
+
+    def __init__(
+        self, count: Callable[[uuid.UUID], int], recategorize_chunk: RecategorizeChunk
+    ) -> None:
+        self.count = count
+        self.recategorize_chunk = recategorize_chunk
+        self._jobs: dict[uuid.UUID, RecategorizationProgress] = {}
+        self._restart: set[uuid.UUID] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="recategorize"
+        )
+
+    def get(self, user_id: uuid.UUID) -> Optional[RecategorizationProgress]:
+        return self._jobs.get(user_id)
+
+    def start(self, user_id: uuid.UUID) -> RecategorizationProgress:
+        with self._lock:
+            progress = self._jobs.get(user_id)
+            if progress is not None and progress.status == "running":
+                self._restart.add(user_id)
+                return progress
+            progress = self._jobs[user_id] = RecategorizationProgress()
+        self._executor.submit(self._run, user_id, progress)
+        return progress
+
+    def _run(self, user_id: uuid.UUID, progress: RecategorizationProgress) -> None:
+        try:
+            while True:
+                progress.total = self.count(user_id)
+                after_id: Optional[uuid.UUID] = None
+                while True:
+                    after_id, scanned, updated = self.recategorize_chunk(
+                        user_id, after_id, cfg.INGEST_BATCH_SIZE
+                    )
+                    progress.scanned += scanned
+                    progress.updated += updated
+                    if after_id is None:
+                        break
+
+                with self._lock:
+                    if user_id not in self._restart:
+                        progress.status = "done"
+                        break
+                    self._restart.discard(user_id)
+                progress.scanned = 0
+        except Exception as e:
+            print(f"Failed to recategorize transactions of user {user_id}: {e}")
+            with self._lock:
+                self._restart.discard(user_id)
+                progress.status = "failed"
+                progress.error = str(e)
+        finally:
+            progress.finished_at = dt.datetime.now()
@@ -0,0 +1,200 @@
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from typing import Sequence
+
+from sqlalchemy.orm import Session
+
+from lifehub.core.common.base.service.user import BaseUserService
+from lifehub.core.security.encryption import EncryptionService
+from lifehub.core.user.schema import User
+from lifehub.modules.finance.repository import (
+    BudgetAssignmentRepository,
+    BudgetRolloverRepository,
+    MonthlyCategorySummaryRepository,
+)
+from lifehub.modules.finance.schema import BudgetSubCategoryType
+from lifehub.modules.finance.service.budget_status import (
+    AssignmentAmount,
+    Month,
+    assigned_by_month,
+    next_month,
+    previous_month,
+    roll_forward,
+)
+from lifehub.modules.finance.service.budget_tree import SubCategoryNode
+
+
+class RolloverService(BaseUserService):
+    """
+    Carries unspent (or overspent) budget of ACCUMULATED subcategories
+    forward from month to month.
+
+    The balance at the end of each month is stored as a BudgetRollover
+    checkpoint, so reading what a subcategory carries into a month is a
+    single row. Changing a month's transactions, assignments or the default
+    amount deletes the checkpoints from that month on (see invalidate), and
+    they are recomputed lazily from the latest remaining checkpoint.
+    """
+
+    _encryption_service: EncryptionService | None = None
+
+    def __init__(self, session: Session, user: User):
+        super().__init__(session, user)
+
+    @property
+    def encryption_service(self) -> EncryptionService:
+        if self._encryption_service is None:
+            self._encryption_service = EncryptionService(self.session, self.user)
+        return self._encryption_service
+
+    def get_carried(
+        self, subcategories: Sequence[SubCategoryNode], month: Month
+    ) -> dict[uuid.UUID, Decimal]:
+        """
+        Returns what each ACCUMULATED subcategory carries into `month`.
+        """
+        accumulated = [
+            subcategory
+            for subcategory in subcategories
+            if subcategory.type == BudgetSubCategoryType.ACCUMULATED
+        ]
+        previous = previous_month(month)
+        checkpoints = BudgetRolloverRepository(self.session).get_for_month(
+            [subcategory.id for subcategory in accumulated], *previous
+        )
+        balances = self.encryption_service.decrypt_many(
+            [checkpoint.balance for checkpoint in checkpoints]
+        )
+        carried = {
+            checkpoint.subcategory_id: Decimal(balance)
+            for checkpoint, balance in zip(checkpoints, balances)
+        }
+
+        missing = [
+            subcategory for subcategory in accumulated if subcategory.id not in carried
+        ]
+        if missing:
+            carried.update(self._replay(missing, previous))
+        return carried
+
+    def _replay(
+        self, subcategories: Sequence[SubCategoryNode], until: Month
+    ) -> dict[uuid.UUID, Decimal]:
+        """
+        Recomputes the checkpoints of the subcategories up to `until`, from
+        their latest checkpoint or their first month with transactions or
+        assignments, and returns their balance at the end of `until`.
+        """
+        subcategory_ids = [subcategory.id for subcategory in subcategories]
+        # Locking reads see the latest committed rows rather than the
+        # transaction's snapshot. Locking the summaries first waits for a
+        # concurrent ingestion, which changes them and then invalidates the
+        # checkpoints, so a checkpoint is never saved from stale summaries.
+        summaries = MonthlyCategorySummaryRepository(self.session).get_until_for_share(
+            subcategory_ids, *until
+        )
+        rollover_repo = BudgetRolloverRepository(self.session)
+        checkpoints = rollover_repo.get_latest_before_for_update(
+            subcategory_ids, *until
+        )
+        assignments = BudgetAssignmentRepository(self.session).get_between(
+            subcategory_ids, 1, until[0]
+        )
+
+        checkpoint_balances = self.encryption_service.decrypt_many(
+            [checkpoint.balance for checkpoint in checkpoints]
+        )
+        defaults = self.encryption_service.decrypt_many(
+            [subcategory.amount for subcategory in subcategories]
+        )
+        summary_balances = self.encryption_service.decrypt_many(
+            [summary.balance for summary in summaries]
+        )
+        assigned_amounts = self.encryption_service.decrypt_many(
+            [assignment.amount for assignment in assignments]
+        )
+
+        starts = {
+            checkpoint.subcategory_id: (
+                next_month((checkpoint.year, checkpoint.month)),
+                Decimal(balance),
+            )
+            for checkpoint, balance in zip(checkpoints, checkpoint_balances)
+        }
+        spending: defaultdict[uuid.UUID, dict[Month, Decimal]] = defaultdict(dict)
+        for summary, value in zip(summaries, summary_balances):
+            spending[summary.subcategory_id][(summary.year, summary.month)] = -Decimal(
+                value
+            )
+        budgets = assigned_by_month(
+            [
+                AssignmentAmount(
+                    subcategory_id=assignment.subcategory_id,
+                    year=assignment.year,
+                    month=assignment.month,
+                    week=assignment.week,
+                    amount=Decimal(amount),
+                )
+                for assignment, amount in zip(assignments, assigned_amounts)
+            ],
+            until,
+        )
+
+        carried: dict[uuid.UUID, Decimal] = {}
+        rolled: list[tuple[uuid.UUID, Month, Decimal]] = []
+        for subcategory, default in zip(subcategories, defaults):
+            subcategory_budgets = budgets.get(subcategory.id, {})
+            subcategory_spending = spending.get(subcategory.id, {})
+            start, balance = starts.get(subcategory.id, (None, Decimal(0)))
+            if start is None:
+                first = min([*subcategory_budgets, *subcategory_spending], default=None)
+                if first is None:
+                    # Nothing to carry before the first activity
+                    rolled.append((subcategory.id, until, balance))
+                    carried[subcategory.id] = balance
+                    continue
+                start = first
+
+            for month, balance in roll_forward(
+                balance,
+                start,
+                until,
+                Decimal(default),
+                subcategory_budgets,
+                subcategory_spending,
+            ):
+                rolled.append((subcategory.id, month, balance))
+            carried[subcategory.id] = balance
+
+        encrypted = self.encryption_service.encrypt_many(
+            [str(balance) for _, _, balance in rolled]
+        )
+        rollover_repo.upsert_many(
+            [
+                {
+                    "subcategory_id": subcategory_id,
+                    "year": year,
+                    "month": month,
+                    "balance": encrypted_balance,
+                }
+                for (subcategory_id, (year, month), _), encrypted_balance in zip(
+                    rolled, encrypted
+                )
+            ]
+        )
+        return carried
+
+    def invalidate(self, starts: dict[uuid.UUID, Month]) -> None:
+        """
+        Drops the checkpoints of each subcategory from the given month on,
+        after its transactions or assignments in that month changed.
+        """
+        BudgetRolloverRepository(self.session).delete_from(starts)
+
+    def invalidate_subcategory(self, subcategory_id: uuid.UUID) -> None:
+        """
+        Drops all the checkpoints of a subcategory, e.g. after its default
+        amount changed.
+        """
+        BudgetRolloverRepository(self.session).delete_for_subcategory(subcategory_id)
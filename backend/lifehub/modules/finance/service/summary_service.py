@@ -0,0 +1,292 @@
+import datetime as dt
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from lifehub.config.constants import cfg
+from lifehub.core.common.base.service.user import BaseUserService
+from lifehub.core.security.encryption import EncryptionService
+from lifehub.core.user.schema import User
+from lifehub.modules.finance.models import (
+    BankMonthlySummaryCategoryResponse,
+    BankMonthlySummaryResponse,
+)
+from lifehub.modules.finance.repository import (
+    BankAccountRepository,
+    BankTransactionRepository,
+    MonthlyCategorySummaryRepository,
+    MonthlySummaryRepository,
+)
+from lifehub.modules.finance.schema import BankAccount
+from lifehub.modules.finance.service.rollover_service import RolloverService
+
+# (account_id or subcategory_id, year, month)
+MonthKey = tuple[uuid.UUID, int, int]
+
+
+@dataclass
+class SummaryDeltas:
+    """
+    Changes to the monthly summaries, accumulated in plaintext so each
+    summary is decrypted and encrypted once however many transactions
+    change it.
+    """
+
+    # Per account and month: (income, expenses)
+    accounts: dict[MonthKey, tuple[Decimal, Decimal]] = field(default_factory=dict)
+    # Per subcategory and month: balance
+    subcategories: defaultdict[MonthKey, Decimal] = field(
+        default_factory=lambda: defaultdict(Decimal)
+    )
+
+    def add(
+        self,
+        account_id: uuid.UUID,
+        subcategory_id: Optional[uuid.UUID],
+        date: dt.datetime,
+        amount: Decimal,
+        sign: int = 1,
+    ) -> None:
+        """
+        Counts a transaction in its account's and subcategory's month.
+        sign=-1 removes a transaction that was counted before.
+        """
+        key = (account_id, date.year, date.month)
+        income, expenses = self.accounts.get(key, (Decimal(0), Decimal(0)))
+        if amount >= 0:
+            income += sign * amount
+        else:
+            expenses -= sign * amount
+        self.accounts[key] = (income, expenses)
+        self.add_to_subcategory(subcategory_id, date, sign * amount)
+
+    def add_to_subcategory(
+        self, subcategory_id: Optional[uuid.UUID], date: dt.datetime, amount: Decimal
+    ) -> None:
+        if subcategory_id is not None:
+            self.subcategories[(subcategory_id, date.year, date.month)] += amount
+
+
+class SummaryService(BaseUserService):
+    """
+    Maintains the monthly summaries of the user's accounts and subcategories.
+
+    MonthlySummary holds the income, expenses and balance of an account in
+    a month, and MonthlyCategorySummary the balance of a subcategory in a
+    month. They are updated with deltas as transactions are ingested, edited
+    or recategorized, so reading a month doesn't depend on its number of
+    transactions.
+    """
+
+    _encryption_service: EncryptionService | None = None
+
+    def __init__(self, session: Session, user: User):
+        super().__init__(session, user)
+
+    @property
+    def encryption_service(self) -> EncryptionService:
+        if self._encryption_service is None:
+            self._encryption_service = EncryptionService(self.session, self.user)
+        return self._encryption_service
+
+    def add_transactions(self, rows: Sequence[dict[str, Any]]) -> None:
+        """
+        Counts new bank_transaction rows, before they are encrypted.
+        """
+        deltas = SummaryDeltas()
+        for row in rows:
+            deltas.add(
+                row["account_id"],
+                row.get("subcategory_id"),
+                row["date"],
+                Decimal(row["amount"]),
+            )
+        self.apply(deltas)
+
+    def _decrypt_amounts(
+        self, summaries: Sequence[Any], fields: list[str]
+    ) -> list[dict[str, Decimal]]:
+        return [
+            {name: Decimal(value or 0) for name, value in values.items()}
+            for values in self.encryption_service.decrypt_columns(summaries, fields)
+        ]
+
+    def apply(self, deltas: SummaryDeltas) -> None:
+        """
+        Adds the deltas to the stored summaries.
+        Missing summaries are first inserted as zero, in key order, and the
+        summaries are then locked until the end of the transaction, so
+        concurrent updates of the same month neither overwrite each other
+        nor race to insert it. Inserting before locking also avoids the gap
+        locks that locking missing rows would take.
+        """
+        self._apply_accounts(deltas.accounts)
+        self._apply_subcategories(deltas.subcategories)
+
+    def _apply_accounts(self, deltas: dict[MonthKey, tuple[Decimal, Decimal]]) -> None:
+        if not deltas:
+            return
+        keys = sorted(deltas)
+        summary_repo = MonthlySummaryRepository(self.session)
+        zero = self.encryption_service.encrypt_data("0")
+        summary_repo.insert_missing(
+            [
+                {
+                    "account_id": account_id,
+                    "year": year,
+                    "month": month,
+                    "income": zero,
+                    "expenses": zero,
+                    "balance": zero,
+                }
+                for account_id, year, month in keys
+            ]
+        )
+        summaries = summary_repo.get_for_update(keys)
+        current = self._decrypt_amounts(summaries, ["income", "expenses"])
+
+        updated = []
+        for summary, values in zip(summaries, current):
+            income_delta, expenses_delta = deltas[
+                (summary.account_id, summary.year, summary.month)
+            ]
+            updated.append(
+                (
+                    summary,
+                    values["income"] + income_delta,
+                    values["expenses"] + expenses_delta,
+                )
+            )
+
+        encrypted = self.encryption_service.encrypt_many(
+            [
+                str(value)
+                for _, income, expenses in updated
+                for value in (income, expenses, income - expenses)
+            ]
+        )
+        for i, (summary, _, _) in enumerate(updated):
+            summary.income, summary.expenses, summary.balance = encrypted[
+                3 * i : 3 * i + 3
+            ]
+
+    def _apply_subcategories(self, deltas: dict[MonthKey, Decimal]) -> None:
+        if not deltas:
+            return
+        keys = sorted(deltas)
+        summary_repo = MonthlyCategorySummaryRepository(self.session)
+        zero = self.encryption_service.encrypt_data("0")
+        summary_repo.insert_missing(
+            [
+                {
+                    "subcategory_id": subcategory_id,
+                    "year": year,
+                    "month": month,
+                    "balance": zero,
+                }
+                for subcategory_id, year, month in keys
+            ]
+        )
+        summaries = summary_repo.get_for_update(keys)
+        current = self._decrypt_amounts(summaries, ["balance"])
+
+        encrypted = self.encryption_service.encrypt_many(
+            [
+                str(
+                    values["balance"]
+                    + deltas[(summary.subcategory_id, summary.year, summary.month)]
+                )
+                for summary, values in zip(summaries, current)
+            ]
+        )
+        for summary, balance in zip(summaries, encrypted):
+            summary.balance = balance
+
+        # Balances carried over from the changed months on are now stale.
+        # They are dropped after locking the summaries, in the same order
+        # RolloverService._replay locks them in.
+        starts: dict[uuid.UUID, tuple[int, int]] = {}
+        for subcategory_id, year, month in deltas:
+            starts[subcategory_id] = min(
+                starts.get(subcategory_id, (year, month)), (year, month)
+            )
+        RolloverService(self.session, self.user).invalidate(starts)
+
+    def needs_rebuild(self, account: BankAccount) -> bool:
+        """
+        Whether the account has transactions that were never summarized,
+        e.g. ones stored before summaries were maintained.
+        """
+        return not account.monthly_summaries and BankTransactionRepository(
+            self.session
+        ).has_transactions(account)
+
+    def rebuild(self, account: BankAccount) -> None:
+        """
+        Summarizes the account's transactions that were never summarized
+        (see needs_rebuild). Only the account's summaries and its
+        transactions' subcategory months are touched, so syncs of the
+        user's other accounts can run at the same time.
+        """
+        deltas = SummaryDeltas()
+        for rows in BankTransactionRepository(self.session).get_summary_rows(
+            [account], cfg.INGEST_BATCH_SIZE
+        ):
+            amounts = self.encryption_service.decrypt_many([row.amount for row in rows])
+            for row, amount in zip(rows, amounts):
+                deltas.add(
+                    row.account_id, row.subcategory_id, row.date, Decimal(amount)
+                )
+        self.apply(deltas)
+
+    def get_summary(self, months: int) -> list[BankMonthlySummaryResponse]:
+        """
+        Returns the income, expenses and subcategory balances of the user's
+        accounts for the last `months` months, oldest first.
+        """
+        today = dt.date.today()
+        start = today.year * 12 + today.month - 1 - (months - 1)
+        year, month = divmod(start, 12)
+        month += 1
+
+        accounts = BankAccountRepository(self.user, self.session).get_all()
+        account_summaries = MonthlySummaryRepository(self.session).get_since(
+            accounts, year, month
+        )
+        category_summaries = MonthlyCategorySummaryRepository(self.session).get_since(
+            self.user, year, month
+        )
+        account_values = self._decrypt_amounts(
+            account_summaries, ["income", "expenses"]
+        )
+        category_values = self._decrypt_amounts(category_summaries, ["balance"])
+
+        responses = {}
+        for i in range(months):
+            y, m = divmod(start + i, 12)
+            responses[(y, m + 1)] = BankMonthlySummaryResponse(
+                year=y, month=m + 1, income=0, expenses=0, balance=0, categories=[]
+            )
+
+        for summary, values in zip(account_summaries, account_values):
+            response = responses.get((summary.year, summary.month))
+            if response is not None:
+                response.income += float(values["income"])
+                response.expenses += float(values["expenses"])
+                response.balance += float(values["income"] - values["expenses"])
+
+        for category_summary, values in zip(category_summaries, category_values):
+            response = responses.get((category_summary.year, category_summary.month))
+            if response is not None:
+                response.categories.append(
+                    BankMonthlySummaryCategoryResponse(
+                        subcategory_id=str(category_summary.subcategory_id),
+                        balance=float(values["balance"]),
+                    )
+                )
+
+        return list(responses.values())
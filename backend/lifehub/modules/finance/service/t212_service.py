@@ -1,13 +1,12 @@
 import csv
 import datetime as dt
-import time
-from io import StringIO
-from typing import Any
+import io
+from typing import Any, Iterable, Iterator
 
-import requests
 from sqlalchemy.orm import Session
 
 from lifehub.core.common.base.api_client import APIException
+from lifehub.core.common.base.http_transport import transport
 from lifehub.core.common.base.service.user import BaseUserService
 from lifehub.core.common.exceptions import ServiceException
 from lifehub.core.security.encryption import EncryptionService
@@ -15,7 +14,17 @@ from lifehub.core.user.schema import User
 from lifehub.providers.trading212.api_client import Trading212APIClient
 
 from ..models import T212ExportTransaction
-from ..schema import BankAccount, BankTransaction
+from ..repository import T212ExportJobRepository
+from ..schema import BankAccount, T212ExportJob, T212ExportJobStatus
+from .ingestion_service import IngestionService
+
+# Trading212 exports usually take a few minutes to be generated
+EXPORT_POLL_BASE_DELAY = 30  # seconds
+EXPORT_POLL_MAX_DELAY = 600
+EXPORT_MAX_ATTEMPTS = 10
+# A new export is only requested once the backoff after a failed one is over
+EXPORT_RETRY_BASE_DELAY = 15 * 60
+EXPORT_RETRY_MAX_DELAY = 24 * 3600
 
 
 class Trading212ServiceException(ServiceException):
@@ -25,6 +34,7 @@ class Trading212ServiceException(ServiceException):
 
 class Trading212Service(BaseUserService):
     _encryption_service: EncryptionService | None = None
+    _ingestion_service: IngestionService | None = None
     _t212_api: Trading212APIClient | None = None
 
     def __init__(self, session: Session, user: User):
@@ -36,89 +46,83 @@ class Trading212Service(BaseUserService):
             self._encryption_service = EncryptionService(self.session, self.user)
         return self._encryption_service
 
+    @property
+    def ingestion_service(self) -> IngestionService:
+        if self._ingestion_service is None:
+            self._ingestion_service = IngestionService(self.session, self.user)
+        return self._ingestion_service
+
     @property
     def t212_api(self) -> Trading212APIClient:
         if self._t212_api is None:
-            self._t212_api = Trading212APIClient(self.user, self.session)
+            self._t212_api = Trading212APIClient.for_session(self.user, self.session)
         return self._t212_api
 
     def fetch_balance(self) -> float:
         """
         Fetches the latest balance from Trading212.
         """
-        return Trading212APIClient(self.user, self.session).get_account_cash().free
-
-    def _parse_transactions(
-        self, account: BankAccount, t212_transactions: list[T212ExportTransaction]
-    ) -> list[BankTransaction]:
-        transactions = []
-
-        for t in t212_transactions:
-            description = None
-            counterparty = None
-            amount = t.total  # Set separately to handle deposits
-
-            match t.action:
-                case "Deposit":
-                    description = f"{t.action} ({t.notes})"
-                case "Card debit":
-                    description = (
-                        f"{t.merchant_name} ({t.notes})" if t.notes else t.merchant_name
-                    )
-                    counterparty = t.merchant_name
-                case "Card credit":
-                    description = (
-                        f"{t.merchant_name} ({t.notes})" if t.notes else t.merchant_name
-                    )
-                    counterparty = t.merchant_name
-                case "Spending cashback":
-                    description = t.action
-                case "Interest on cash":
-                    description = t.action
-                case "Lending interest":
-                    description = t.notes
-                case "Market buy":
-                    amount = -amount
-                    description = f"{t.action} ({t.ticker})"
-                    counterparty = f"{t.name} ({t.ticker})"
-                case "Market sell":
-                    description = f"{t.action} ({t.ticker})"
-                    counterparty = f"{t.name} ({t.ticker})"
-                case "Dividend (Dividend)":
-                    description = t.action
-                    counterparty = f"{t.name} ({t.ticker})"
-                case _:
-                    pass
-
-            encrypted_description = self.encryption_service.encrypt_data(
-                description if description is not None else ""
-            )
-            encrypted_counterparty = self.encryption_service.encrypt_data(
-                counterparty if counterparty is not None else ""
-            )
-            encrypted_amount = self.encryption_service.encrypt_data(str(amount))
-
-            new_t = BankTransaction(
-                transaction_id=t.id,
-                account_id=account.id,
-                date=dt.datetime.fromisoformat(t.time),
-                amount=encrypted_amount,
-                description=encrypted_description,
-                counterparty=encrypted_counterparty,
-            )
-
-            transactions.append(new_t)
+        return self.t212_api.get_account_cash().free
 
-        return transactions
-
-    def _read_export_csv(self, csv_data: str) -> list[T212ExportTransaction]:
+    def _parse_transaction(
+        self, account: BankAccount, t: T212ExportTransaction
+    ) -> dict[str, Any]:
         """
-        Normalizes the CSV data from Trading212 export to a list of T212ExportTransaction.
+        Converts an exported transaction to a bank_transaction row.
+        The row is encrypted with the rest of its batch.
         """
-        text_io = StringIO(csv_data)
-        csv_reader = csv.DictReader(text_io)
-
-        exported_transactions = []
+        description = None
+        counterparty = None
+        amount = t.total  # Set separately to handle deposits
+
+        match t.action:
+            case "Deposit":
+                description = f"{t.action} ({t.notes})"
+            case "Card debit":
+                description = (
+                    f"{t.merchant_name} ({t.notes})" if t.notes else t.merchant_name
+                )
+                counterparty = t.merchant_name
+            case "Card credit":
+                description = (
+                    f"{t.merchant_name} ({t.notes})" if t.notes else t.merchant_name
+                )
+                counterparty = t.merchant_name
+            case "Spending cashback":
+                description = t.action
+            case "Interest on cash":
+                description = t.action
+            case "Lending interest":
+                description = t.notes
+            case "Market buy":
+                amount = -amount
+                description = f"{t.action} ({t.ticker})"
+                counterparty = f"{t.name} ({t.ticker})"
+            case "Market sell":
+                description = f"{t.action} ({t.ticker})"
+                counterparty = f"{t.name} ({t.ticker})"
+            case "Dividend (Dividend)":
+                description = t.action
+                counterparty = f"{t.name} ({t.ticker})"
+            case _:
+                pass
+
+        return {
+            "transaction_id": t.id,
+            "account_id": account.id,
+            "date": dt.datetime.fromisoformat(t.time),
+            "amount": str(amount),
+            "description": description if description is not None else "",
+            "counterparty": counterparty if counterparty is not None else "",
+        }
+
+    def _read_export_csv(
+        self, csv_file: Iterable[str]
+    ) -> Iterator[T212ExportTransaction]:
+        """
+        Normalizes the CSV data from Trading212 export to T212ExportTransaction, one row at a time.
+        """
+        csv_reader = csv.DictReader(csv_file)
 
         row: dict[str, Any]
         for row in csv_reader:
@@ -126,80 +130,160 @@ class Trading212Service(BaseUserService):
             for key, value in row.items():
                 if value == "":
                     row[key] = None
-            exported_transactions.append(T212ExportTransaction(**row))
+            yield T212ExportTransaction(**row)
 
-        return exported_transactions
-
-    def _get_export_url(self, from_date: dt.datetime, to_date: dt.datetime) -> str:
-        export_res = self.t212_api.export_csv(
-            include_dividends=True,
-            include_interest=True,
-            include_orders=True,
-            include_transactions=True,
+    def get_export_job(self, account: BankAccount) -> T212ExportJob | None:
+        """
+        Returns the latest export job of the account.
+        """
+        return T212ExportJobRepository(self.session).get_latest(account)
+
+    def _create_export_job(
+        self, account: BankAccount, from_date: dt.datetime, to_date: dt.datetime
+    ) -> T212ExportJob:
+        job = T212ExportJob(
+            account_id=account.id,
+            status=T212ExportJobStatus.PENDING,
             from_date=from_date,
             to_date=to_date,
+            next_poll_at=dt.datetime.now(),
         )
+        T212ExportJobRepository(self.session).add(job)
+        return job
 
-        report_id = export_res.reportId
+    def _schedule_retry(self, job: T212ExportJob) -> None:
+        """
+        Schedules the next step of the job with capped exponential backoff.
+        """
+        job.attempts += 1
+        if job.attempts > EXPORT_MAX_ATTEMPTS:
+            self._fail_export_job(job, "Timed out waiting for the export")
+            return
+        delay = min(
+            EXPORT_POLL_BASE_DELAY * 2 ** (job.attempts - 1), EXPORT_POLL_MAX_DELAY
+        )
+        job.next_poll_at = dt.datetime.now() + dt.timedelta(seconds=delay)
 
+    def _fail_export_job(self, job: T212ExportJob, error: str) -> None:
+        """
+        Fails the job and sets when the next export may be requested, with
+        capped exponential backoff over the account's consecutive failures.
+        """
+        job.status = T212ExportJobStatus.FAILED
+        job.error = error[:255]
+        # The delay is capped well before 8 failures in a row
+        failures = T212ExportJobRepository(self.session).count_consecutive_failures(
+            job.account, limit=8
+        )
+        delay = min(
+            EXPORT_RETRY_BASE_DELAY * 2 ** (failures - 1), EXPORT_RETRY_MAX_DELAY
+        )
+        job.next_poll_at = dt.datetime.now() + dt.timedelta(seconds=delay)
+
+    def _request_export(self, job: T212ExportJob) -> None:
         try:
-            time.sleep(10)  # Wait for the export to be generated
-            exports_res = self.t212_api.get_exports()
+            export_res = self.t212_api.export_csv(
+                include_dividends=True,
+                include_interest=True,
+                include_orders=True,
+                include_transactions=True,
+                from_date=job.from_date,
+                to_date=job.to_date,
+            )
         except APIException as e:
-            if e.status_code == 429:
-                time.sleep(60)
-                exports_res = self.t212_api.get_exports()
-            else:
+            if e.status_code != 429:
                 raise e
+            self._schedule_retry(job)
+            return
 
-        # Get the report with reportId = report_id
-        dl_link = next(
-            (r.downloadLink for r in exports_res if r.reportId == report_id), None
-        )
-
-        if not dl_link:
-            # Try up to 5 times
-            for _ in range(5):
-                time.sleep(60)
-                exports_res = self.t212_api.get_exports()
-                dl_link = next(
-                    (r.downloadLink for r in exports_res if r.reportId == report_id),
-                    None,
-                )
-                if dl_link:
-                    break
-
-        if not dl_link:
-            raise Trading212ServiceException(500, "Export not found")
+        job.report_id = export_res.reportId
+        job.status = T212ExportJobStatus.EXPORTING
+        job.attempts = 0
+        self._schedule_retry(job)
 
-        return dl_link
-
-    def _get_exported_transactions(
-        self, to_date: dt.datetime, from_date: dt.datetime
-    ) -> list[T212ExportTransaction]:
-        dl_link = self._get_export_url(from_date, to_date)
-        file_res = requests.get(dl_link, stream=True)
-        return self._read_export_csv(file_res.text)
+    def _poll_export(self, account: BankAccount, job: T212ExportJob) -> None:
+        try:
+            exports_res = self.t212_api.get_exports()
+        except APIException as e:
+            if e.status_code != 429:
+                raise e
+            self._schedule_retry(job)
+            return
+
+        export = next((r for r in exports_res if r.reportId == job.report_id), None)
+        if export is None:
+            self._fail_export_job(job, "Export not found")
+        elif export.status in ("Failed", "Canceled"):
+            self._fail_export_job(job, f"Export {export.status.lower()}")
+        elif export.downloadLink is None:
+            self._schedule_retry(job)
+        else:
+            self._ingest_export(account, export.downloadLink)
+            account.last_synced = job.to_date
+            job.status = T212ExportJobStatus.DONE
+
+    def _advance_export_job(self, account: BankAccount, job: T212ExportJob) -> None:
+        """
+        Runs the next step of the job if it's due.
+        Each step is a single API call, so the job can be resumed after a restart.
+        """
+        if job.next_poll_at > dt.datetime.now():
+            return
+        match job.status:
+            case T212ExportJobStatus.PENDING:
+                self._request_export(job)
+            case T212ExportJobStatus.EXPORTING:
+                self._poll_export(account, job)
+
+    def _ingest_export(self, account: BankAccount, dl_link: str) -> None:
+        """
+        Streams the export into the database.
+        The CSV is downloaded, parsed, encrypted and inserted in batches of
+        INGEST_BATCH_SIZE rows, so memory use doesn't depend on the export size.
+        """
+        with transport.request("GET", dl_link, stream=True) as file_res:
+            file_res.raise_for_status()
+            file_res.raw.decode_content = True
+            # The raw urllib3 response is read in chunks as the CSV is parsed
+            csv_file = io.TextIOWrapper(
+                file_res.raw,  # type: ignore
+                encoding="utf-8-sig",
+                newline="",
+            )
+            rows = (
+                self._parse_transaction(account, t)
+                for t in self._read_export_csv(csv_file)
+            )
+            self.ingestion_service.ingest_transactions(account, rows)
 
     def fetch_new_transactions(self, account: BankAccount) -> None:
-        exported_transactions = self._get_exported_transactions(
-            dt.datetime.now(), account.last_synced
-        )
-
-        transactions = self._parse_transactions(account, exported_transactions)
-        account.last_synced = dt.datetime.now()
-
-        self.session.add_all(transactions)
-        self.session.commit()
+        """
+        Advances the account's export job, creating one if needed.
+        Called repeatedly by the fetch daemon until the export is ingested.
+        """
+        export_job_repo = T212ExportJobRepository(self.session)
+        job = export_job_repo.get_active(account)
+        if job is None:
+            latest = export_job_repo.get_latest(account)
+            if (
+                latest is not None
+                and latest.status == T212ExportJobStatus.FAILED
+                and latest.next_poll_at > dt.datetime.now()
+            ):
+                # Still backing off after a failed export, see _fail_export_job
+                return
+            job = self._create_export_job(
+                account, account.last_synced, dt.datetime.now()
+            )
+        self._advance_export_job(account, job)
 
     def fetch_all_transactions(self, account: BankAccount) -> None:
         # TODO: Eventually this might also be used to get transactions older than a year
-        exported_transactions = self._get_exported_transactions(
-            dt.datetime.now(), dt.datetime.now() - dt.timedelta(weeks=52)
-        )
-
-        transactions = self._parse_transactions(account, exported_transactions)
-        account.last_synced = dt.datetime.now()
-
-        self.session.add_all(transactions)
-        self.session.commit()
+        job = T212ExportJobRepository(self.session).get_active(account)
+        if job is None:
+            job = self._create_export_job(
+                account,
+                dt.datetime.now() - dt.timedelta(weeks=52),
+                dt.datetime.now(),
+            )
+        self._advance_export_job(account, job)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import threading
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Generic, Hashable, Iterable, Optional, Sequence, TypeVar
+
+from lifehub.modules.finance.schema import BankTransactionFilter
+
+T = TypeVar("T")
+
+# Joins the searched fields, so a match can't span two of them
+FIELD_SEPARATOR = "\x00"
+
+
+class AhoCorasick(Generic[T]):
+    """
+    Multi-pattern substring matcher.
+
+    Patterns are compiled into a trie with failure links, so a text is
+    searched for all patterns at once in a single pass. Each pattern has a
+    value and a priority; best() returns the value of the highest priority
+    pattern found in the text.
+    """
+
+    def __init__(self, patterns: Iterable[tuple[str, int, T]]) -> None:
+        # State 0 is the root
+        self._goto: list[dict[str, int]] = [{}]
+        # Best (priority, value) of the patterns ending at each state
+        self._best: list[Optional[tuple[int, T]]] = [None]
+
+        for pattern, priority, value in patterns:
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._best.append(None)
+                state = next_state
+            best = self._best[state]
+            if best is None or priority > best[0]:
+                self._best[state] = (priority, value)
+
+        # Failure links, in breadth-first order so a state's link is
+        # always computed before the links of its children
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                # A state also matches every pattern ending at its failure link
+                inherited = self._best[self._fail[child]]
+                best = self._best[child]
+                if inherited is not None and (best is None or inherited[0] > best[0]):
+                    self._best[child] = inherited
+
+    def best(self, text: str) -> Optional[T]:
+        goto = self._goto
+        fail = self._fail
+        best: Optional[tuple[int, T]] = None
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            found = self._best[state]
+            if found is not None and (best is None or found[0] > best[0]):
+                best = found
+        return best[1] if best is not None else None
+
+
+@dataclass(frozen=True)
+class FilterRule:
+    filter_id: uuid.UUID
+    subcategory_id: Optional[uuid.UUID]
+    description: Optional[str]
+
+
+class TransactionMatcher:
+    """
+    Compiled form of a user's transaction filters.
+
+    A transaction matches a filter if any of the filter's match strings is
+    contained (case-insensitively) in its description or counterparty.
+    If several filters match, the one with the longest matching string wins.
+    """
+
+    def __init__(self, filters: Sequence[BankTransactionFilter]) -> None:
+        patterns = []
+        for filter in filters:
+            rule = FilterRule(filter.id, filter.subcategory_id, filter.description)
+            for match in filter.matches:
+                pattern = match.match_string.casefold()
+                patterns.append((pattern, len(pattern), rule))
+        self._automaton = AhoCorasick(patterns)
+
+    def match(
+        self, description: Optional[str], counterparty: Optional[str]
+    ) -> Optional[FilterRule]:
+        text = FIELD_SEPARATOR.join(
+            field.casefold() for field in (description, counterparty) if field
+        )
+        return self._automaton.best(text)
+
+
+def filters_signature(filters: Sequence[BankTransactionFilter]) -> Hashable:
+    """Identifies the filters a matcher was compiled from."""
+    return tuple(
+        sorted(
+            (
+                filter.id,
+                filter.subcategory_id,
+                filter.description,
+                tuple(sorted(match.match_string for match in filter.matches)),
+            )
+            for filter in filters
+        )
+    )
+
+
+class TransactionMatcherCache:
+    """
+    Compiled matchers of the most recently used users.
+
+    Entries are keyed by the signature of the filters they were compiled
+    from, so a matcher is recompiled whenever the user's filters change,
+    including changes made by another process.
+    """
+
+    def __init__(self, max_size: int = 256) -> None:
+        self.max_size = max_size
+        self._entries: OrderedDict[uuid.UUID, tuple[Hashable, TransactionMatcher]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(
+        self, user_id: uuid.UUID, filters: Sequence[BankTransactionFilter]
+    ) -> TransactionMatcher:
+        signature = filters_signature(filters)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+
+        matcher = TransactionMatcher(filters)
+        with self._lock:
+            self._entries[user_id] = (signature, matcher)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return matcher
+
+
+transaction_matchers = TransactionMatcherCache()
@@ -11,35 +11,35 @@ router = APIRouter(
 
 
 @router.get("/tasks")
-async def get_tasks(
+def get_tasks(
     routine_service: RoutineServiceDep, show_completed: bool = False
 ) -> list[TaskListResponse]:
     return routine_service.get_tasks(show_completed)
 
 
 @router.patch("/tasks/{tasklist_id}/{task_id}/toggle")
-async def toggle_task(
+def toggle_task(
     routine_service: RoutineServiceDep, tasklist_id: str, task_id: str
 ) -> TaskResponse:
     return routine_service.toggle_task(tasklist_id, task_id)
 
 
 @router.delete("/tasks/{tasklist_id}/{task_id}")
-async def delete_task(
+def delete_task(
     routine_service: RoutineServiceDep, tasklist_id: str, task_id: str
 ) -> None:
     return routine_service.delete_task(tasklist_id, task_id)
 
 
 @router.get("/events/calendars")
-async def get_calendars(
+def get_calendars(
     routine_service: RoutineServiceDep,
 ) -> list[CalendarResponse]:
     return routine_service.get_calendars()
 
 
 @router.get("/events")
-async def get_events(
+def get_events(
     routine_service: RoutineServiceDep,
     limit: int = 20,
 ) -> list[EventResponse]:
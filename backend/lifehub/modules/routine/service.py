@@ -1,9 +1,13 @@
 import datetime as dt
+import heapq
+import itertools
 
 import pytz
 from sqlalchemy.orm import Session
 
 import lifehub.providers.google_tasks.models as gt_models
+from lifehub.config.constants import cfg
+from lifehub.core.common.base.fan_out import fan_out
 from lifehub.core.common.base.service.user import BaseUserService
 from lifehub.core.common.exceptions import ServiceException
 from lifehub.core.user.schema import User
@@ -24,7 +28,7 @@ class RoutineService(BaseUserService):
         super().__init__(session, user)
 
     def get_calendars(self) -> list[CalendarResponse]:
-        calendars: list[Calendar] = GoogleCalendarAPIClient(
+        calendars: list[Calendar] = GoogleCalendarAPIClient.for_session(
             self.user, self.session
         ).get_calendars()
         return [
@@ -36,7 +40,8 @@ class RoutineService(BaseUserService):
             for c in calendars
         ]
 
-    def _get_event_time_dt(self, event_time: EventTime, timezone: str) -> dt.datetime:
+    @staticmethod
+    def _get_event_time_dt(event_time: EventTime, timezone: str) -> dt.datetime:
         if event_time.date_time:
             return event_time.date_time
         if event_time.date:
@@ -45,63 +50,121 @@ class RoutineService(BaseUserService):
             return tz_date
         raise RoutineServiceException(400, "Event start time not found")
 
+    @staticmethod
+    def _get_calendar_events(
+        api_client: GoogleCalendarAPIClient,
+        calendar: CalendarResponse,
+        limit: int,
+    ) -> list[EventResponse]:
+        return [
+            EventResponse(
+                id=e.id,
+                title=e.summary,
+                start=RoutineService._get_event_time_dt(e.start, calendar.timezone),
+                end=RoutineService._get_event_time_dt(e.end, calendar.timezone),
+                location=e.location,
+            )
+            for e in api_client.get_events(calendar.id, limit)
+        ]
+
     def get_events(self, limit: int = 20) -> list[EventResponse]:
+        """
+        Returns the next `limit` events across all the user's calendars.
+        Calendars are fetched concurrently, and a calendar that fails or
+        times out is left out instead of failing the whole response.
+        """
         calendars = self.get_calendars()
-        events = []
-        for calendar in calendars:
-            events.extend(
-                [
-                    EventResponse(
-                        id=e.id,
-                        title=e.summary,
-                        start=self._get_event_time_dt(e.start, calendar.timezone),
-                        end=self._get_event_time_dt(e.end, calendar.timezone),
-                        location=e.location,
-                    )
-                    for e in GoogleCalendarAPIClient(
-                        self.user, self.session
-                    ).get_events(calendar.id, limit)
-                ]
+        # The fetching threads only make HTTP calls, see APIClient.detached
+        api_client = GoogleCalendarAPIClient.for_session(
+            self.user, self.session
+        ).detached()
+
+        # Each calendar's events are ordered by start time
+        calendar_events = []
+        for calendar, result in fan_out(
+            lambda calendar: self._get_calendar_events(api_client, calendar, limit),
+            calendars,
+            cfg.ROUTINE_FETCH_CONCURRENCY,
+            cfg.ROUTINE_FETCH_TIMEOUT,
+        ):
+            if isinstance(result, BaseException):
+                print(f"Failed to fetch events of calendar {calendar.id}: {result}")
+                continue
+            calendar_events.append(result)
+
+        if calendars and not calendar_events:
+            raise RoutineServiceException(502, "Failed to fetch events")
+        return list(
+            itertools.islice(
+                heapq.merge(*calendar_events, key=lambda e: e.start), limit
             )
-        return sorted(events, key=lambda e: e.start)[:limit]
+        )
 
     def get_task(self, tasklist_id: str, task_id: str) -> TaskResponse:
-        api_client = GoogleTasksAPIClient(self.user, self.session)
+        api_client = GoogleTasksAPIClient.for_session(self.user, self.session)
         task = api_client.get_task(tasklist_id, task_id)
         return TaskResponse(
             id=task.id, title=task.title, due=task.due, completed=task.completed
         )
 
     def delete_task(self, tasklist_id: str, task_id: str) -> None:
-        api_client = GoogleTasksAPIClient(self.user, self.session)
+        api_client = GoogleTasksAPIClient.for_session(self.user, self.session)
         api_client.delete_task(tasklist_id, task_id)
 
-    def get_tasks(self, show_completed: bool = False) -> list[TaskListResponse]:
-        api_client = GoogleTasksAPIClient(self.user, self.session)
-
-        tasklists = []
-
-        for tasklist in api_client.list_tasklists():
-            tasklists.append(
-                TaskListResponse(id=tasklist.id, title=tasklist.title, tasks=[])
-            )
-
-            for task in api_client.list_tasks(
-                tasklist.id, show_completed=show_completed
-            ):
-                tasklists[-1].tasks.append(
-                    TaskResponse(
-                        id=task.id,
-                        title=task.title,
-                        due=task.due,
-                        completed=task.completed,
-                    )
+    @staticmethod
+    def _get_tasklist(
+        api_client: GoogleTasksAPIClient,
+        tasklist: gt_models.TaskListResponse,
+        show_completed: bool,
+    ) -> TaskListResponse:
+        return TaskListResponse(
+            id=tasklist.id,
+            title=tasklist.title,
+            tasks=[
+                TaskResponse(
+                    id=task.id,
+                    title=task.title,
+                    due=task.due,
+                    completed=task.completed,
+                )
+                for task in api_client.iter_tasks(
+                    tasklist.id, show_completed=show_completed
                 )
+            ],
+        )
 
-        return tasklists
+    def get_tasks(self, show_completed: bool = False) -> list[TaskListResponse]:
+        """
+        Returns the user's task lists with their tasks, in order.
+        Failing to list the task lists fails the request. Their tasks are
+        fetched concurrently, and a list whose tasks can't be fetched is
+        left out.
+        """
+        api_client = GoogleTasksAPIClient.for_session(self.user, self.session)
+        tasklists = list(api_client.iter_tasklists())
+        # The fetching threads only make HTTP calls, see APIClient.detached
+        detached_client = api_client.detached()
+
+        fetched: dict[int, TaskListResponse] = {}
+        for index, result in fan_out(
+            lambda index: self._get_tasklist(
+                detached_client, tasklists[index], show_completed
+            ),
+            range(len(tasklists)),
+            cfg.ROUTINE_FETCH_CONCURRENCY,
+            cfg.ROUTINE_FETCH_TIMEOUT,
+        ):
+            if isinstance(result, BaseException):
+                print(f"Failed to fetch tasks of list {tasklists[index].id}: {result}")
+                continue
+            fetched[index] = result
+
+        if tasklists and not fetched:
+            raise RoutineServiceException(502, "Failed to fetch tasks")
+        return [fetched[index] for index in sorted(fetched)]
 
     def toggle_task(self, tasklist_id: str, task_id: str) -> TaskResponse:
-        api_client = GoogleTasksAPIClient(self.user, self.session)
+        api_client = GoogleTasksAPIClient.for_session(self.user, self.session)
         task = api_client.get_task(tasklist_id, task_id)
         updated_task = api_client.update_task(
             tasklist_id,
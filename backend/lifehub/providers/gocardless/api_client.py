@@ -5,7 +5,8 @@ from sqlalchemy.orm import Session
 
 from lifehub.config.constants import cfg
 from lifehub.core.common.base.api_client import APIClient, AuthType, auth_override
-from lifehub.core.provider.repository.provider_token import ProviderTokenRepository
+from lifehub.core.common.base.retry import RetryPolicy
+from lifehub.core.common.base.token_refresh import RefreshedToken
 from lifehub.core.user.schema import User
 
 from .models import (
@@ -32,17 +33,20 @@ class GoCardlessAPIClient(APIClient):
     provider_name = "gocardless"
     base_url = "https://bankaccountdata.gocardless.com/api/v2"
     auth_type = AuthType.OAUTH
+    # Transaction listings can take a while for banks with long histories
+    timeout = (5, 60)
+    # Rate limits are per day, so a 429 fails fast instead of waiting
+    retry_policy = RetryPolicy(max_attempts=3, deadline=90)
 
     def __init__(self, user: User, session: Session) -> None:
         super().__init__(user, session, cfg.ADMIN_USERNAME)
 
-    def _refresh_token(self, tokenRepo: ProviderTokenRepository) -> None:
+    def _refresh_token(self) -> RefreshedToken:
         res = self.refresh_token()
-        self.token.token = self.encryption_service.encrypt_data(res.access)
-        self.token.expires_at = dt.datetime.now() + dt.timedelta(
-            seconds=res.access_expires
+        return RefreshedToken(
+            token=self.encryption_service.encrypt_data(res.access),
+            expires_at=dt.datetime.now() + dt.timedelta(seconds=res.access_expires),
         )
-        tokenRepo.update(self.token)
 
     @auth_override(AuthType.BASIC)
     def get_token(self) -> SpectacularJWTObtainResponse:
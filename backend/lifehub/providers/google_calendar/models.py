@@ -187,3 +187,4 @@ class CalendarEventsRequest:
     timeMin: str
     timeMax: str
     maxResults: int
+    orderBy: str = "startTime"
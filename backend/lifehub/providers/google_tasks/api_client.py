@@ -1,4 +1,4 @@
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
 from sqlalchemy.orm import Session
 
@@ -13,6 +13,9 @@ from .models import (
     TaskUpdateRequest,
 )
 
+# Largest page the Tasks API returns
+MAX_PAGE_SIZE = 100
+
 
 class GoogleTasksAPIClient(APIClient):
     provider_name = "google_tasks"
@@ -33,6 +36,22 @@ class GoogleTasksAPIClient(APIClient):
         task_lists = self._get("users/@me/lists", params=params).get("items", [])
         return [TaskListResponse(**item) for item in task_lists]
 
+    def iter_tasklists(
+        self, page_size: int = MAX_PAGE_SIZE
+    ) -> Iterator[TaskListResponse]:
+        """
+        Yields all the user's task lists, following nextPageToken.
+        """
+        page_token: Optional[str] = None
+        while True:
+            params = ListTasklistsRequest(maxResults=page_size, pageToken=page_token)
+            res = self._get("users/@me/lists", params=params)
+            for item in res.get("items", []):
+                yield TaskListResponse(**item)
+            page_token = res.get("nextPageToken")
+            if not page_token:
+                return
+
     def delete_task(
         self,
         tasklist_id: str,
@@ -80,6 +99,31 @@ class GoogleTasksAPIClient(APIClient):
         res = self._get(f"lists/{tasklist_id}/tasks", params).get("items", [])
         return [TaskResponse(**item) for item in res]
 
+    def iter_tasks(
+        self,
+        tasklist_id: str,
+        show_completed: bool = True,
+        show_hidden: bool = False,
+        page_size: int = MAX_PAGE_SIZE,
+    ) -> Iterator[TaskResponse]:
+        """
+        Yields all the tasks of a task list, following nextPageToken.
+        """
+        page_token: Optional[str] = None
+        while True:
+            params = ListTasksRequest(
+                maxResults=page_size,
+                pageToken=page_token,
+                showCompleted=show_completed,
+                showHidden=show_hidden,
+            )
+            res = self._get(f"lists/{tasklist_id}/tasks", params)
+            for item in res.get("items", []):
+                yield TaskResponse(**item)
+            page_token = res.get("nextPageToken")
+            if not page_token:
+                return
+
     def update_task(
         self,
         tasklist_id: str,
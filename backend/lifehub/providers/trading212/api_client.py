@@ -5,6 +5,7 @@ from urllib.parse import parse_qs, urlparse
 from sqlalchemy.orm import Session
 
 from lifehub.core.common.base.api_client import APIClient, APIException, AuthType
+from lifehub.core.common.base.retry import RetryPolicy
 from lifehub.core.user.schema import User
 
 from .models import (
@@ -26,6 +27,8 @@ class Trading212APIClient(APIClient):
     provider_name = "trading212"
     base_url = "https://live.trading212.com/api/v0"
     auth_type = AuthType.TOKEN_HEADERS
+    # Per-endpoint rate limits reset within a minute
+    retry_policy = RetryPolicy(max_delay=30, deadline=60)
 
     def __init__(self, user: User, session: Session) -> None:
         super().__init__(user, session)
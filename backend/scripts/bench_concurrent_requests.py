@@ -0,0 +1,126 @@
+"""
+Checks that concurrent API requests waiting on a slow provider overlap.
+
+Serves a route that calls a slow local stub provider through an APIClient,
+as a plain def handler (run in the threadpool) and as an async def one
+(run on the event loop), and sends N concurrent requests to each. The
+def route should take about one provider call in total, not N:
+
+    python scripts/bench_concurrent_requests.py --requests 10 --delay 0.5
+"""
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+import requests
+import uvicorn
+from fastapi import FastAPI
+
+from lifehub.core.common.base.api_client import APIClient, AuthType
+
+
+class SlowProvider(BaseHTTPRequestHandler):
+    delay = 0.5
+
+    def do_GET(self) -> None:
+        time.sleep(self.delay)
+        body = json.dumps({"ok": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class StubAPIClient(APIClient):
+    provider_name = "stub"
+    auth_type = AuthType.HEADERS
+
+    def __init__(self, base_url: str, pool_maxsize: int) -> None:
+        # No provider or token to load, only the request path is exercised
+        self.base_url = base_url
+        self.pool_maxsize = pool_maxsize
+
+    def slow(self) -> Any:
+        return self._get("slow")
+
+    def _error_msg(self, res: requests.Response) -> str:
+        return res.text
+
+    def _test(self) -> None:
+        self.slow()
+
+
+def create_app(client: StubAPIClient) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/def")
+    def sync_route() -> Any:
+        return client.slow()
+
+    @app.get("/async")
+    async def async_route() -> Any:
+        return client.slow()
+
+    return app
+
+
+def start_in_thread(target: Callable[[], object]) -> None:
+    threading.Thread(target=target, daemon=True).start()
+
+
+def time_concurrent(url: str, count: int) -> float:
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        start = time.perf_counter()
+        responses = list(executor.map(lambda _: requests.get(url), range(count)))
+        elapsed = time.perf_counter() - start
+    for response in responses:
+        response.raise_for_status()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=0.5)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    SlowProvider.delay = args.delay
+    provider = ThreadingHTTPServer(("127.0.0.1", 0), SlowProvider)
+    start_in_thread(provider.serve_forever)
+    client = StubAPIClient(
+        f"http://127.0.0.1:{provider.server_address[1]}", args.requests
+    )
+
+    server = uvicorn.Server(
+        uvicorn.Config(create_app(client), port=args.port, log_level="warning")
+    )
+    start_in_thread(server.run)
+    while not server.started:
+        time.sleep(0.05)
+
+    try:
+        api_url = f"http://127.0.0.1:{args.port}"
+        sync_elapsed = time_concurrent(f"{api_url}/def", args.requests)
+        async_elapsed = time_concurrent(f"{api_url}/async", args.requests)
+    finally:
+        server.should_exit = True
+        provider.shutdown()
+
+    print(f"{args.requests} concurrent requests, provider delay {args.delay}s")
+    print(f"def route:       {sync_elapsed:.2f}s")
+    print(f"async def route: {async_elapsed:.2f}s")
+    assert sync_elapsed < 2 * args.delay, "def route requests didn't overlap"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Microbenchmark of EncryptionService's batch helpers against the per-value
+calls they replace.
+
+Runs on a fixed random key, so it needs neither Vault nor a database:
+
+    python scripts/bench_encryption.py --count 20000 --repeat 5
+"""
+
+import argparse
+import timeit
+from typing import Any, Callable
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from lifehub.core.security.encryption import EncryptionService
+
+FIELDS = ["description", "counterparty", "user_description", "amount"]
+
+
+def make_service() -> EncryptionService:
+    # Skips the session and user: the cipher is all the helpers use
+    service = EncryptionService.__new__(EncryptionService)
+    service._aesgcm = AESGCM(AESGCM.generate_key(256))
+    return service
+
+
+def best_of(fn: Callable[[], Any], repeat: int) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def report(name: str, single: float, batch: float, count: int) -> None:
+    print(
+        f"{name:<16} {single / count * 1e6:8.2f} us/value"
+        f" {batch / count * 1e6:8.2f} us/value"
+        f" {single / batch:6.2f}x"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    service = make_service()
+    values = [f"Card debit {i} (Lisboa PT)" for i in range(args.count)]
+    encrypted = service.encrypt_many(values)
+    rows: list[dict[str, Any]] = [
+        {field: value for field in FIELDS} for value in values[: args.count // 4]
+    ]
+
+    def encrypt_rows_one_by_one() -> None:
+        for row in [dict(row) for row in rows]:
+            for field in FIELDS:
+                row[field] = service.encrypt_data(row[field])
+
+    def encrypt_rows_by_column() -> None:
+        service.encrypt_columns([dict(row) for row in rows], FIELDS)
+
+    print(f"{args.count} values, best of {args.repeat}")
+    print(f"{'':<16} {'per value':>16} {'batch':>16} {'speedup':>7}")
+    report(
+        "encrypt",
+        best_of(lambda: [service.encrypt_data(v) for v in values], args.repeat),
+        best_of(lambda: service.encrypt_many(values), args.repeat),
+        args.count,
+    )
+    report(
+        "decrypt",
+        best_of(lambda: [service.decrypt_data(v) for v in encrypted], args.repeat),
+        best_of(lambda: service.decrypt_many(encrypted), args.repeat),
+        args.count,
+    )
+    report(
+        "encrypt_columns",
+        best_of(encrypt_rows_one_by_one, args.repeat),
+        best_of(encrypt_rows_by_column, args.repeat),
+        len(rows) * len(FIELDS),
+    )
+
+    assert list(service.decrypt_many(encrypted)) == values
+
+
+if __name__ == "__main__":
+    main()
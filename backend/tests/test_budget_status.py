@@ -0,0 +1,105 @@
+import uuid
+from decimal import Decimal
+
+from lifehub.modules.finance.schema import BudgetSubCategoryType
+from lifehub.modules.finance.service.budget_status import (
+    AssignmentAmount,
+    BudgetStatus,
+    assigned_by_month,
+    compute_budget_statuses,
+    next_month,
+    previous_month,
+    roll_forward,
+)
+
+
+def assignment(
+    year: int, month: int | None, week: int | None, amount: str
+) -> AssignmentAmount:
+    return AssignmentAmount(
+        subcategory_id=uuid.UUID(int=1),
+        year=year,
+        month=month,
+        week=week,
+        amount=Decimal(amount),
+    )
+
+
+def test_month_arithmetic_wraps_years() -> None:
+    assert next_month((2024, 12)) == (2025, 1)
+    assert next_month((2024, 5)) == (2024, 6)
+    assert previous_month((2025, 1)) == (2024, 12)
+    assert previous_month((2024, 6)) == (2024, 5)
+
+
+def test_monthly_assignment_months() -> None:
+    assert assignment(2024, 3, None, "50").months() == [((2024, 3), Decimal("50"))]
+
+
+def test_weekly_assignment_counts_in_month_of_monday() -> None:
+    # ISO week 1 of 2025 starts on Monday 2024-12-30
+    assert assignment(2025, None, 1, "20").months() == [((2024, 12), Decimal("20"))]
+
+
+def test_yearly_assignment_spreads_over_year() -> None:
+    months = assignment(2024, None, None, "120").months()
+    assert [month for month, _ in months] == [(2024, m) for m in range(1, 13)]
+    assert all(amount == Decimal("10") for _, amount in months)
+
+
+def test_assigned_by_month_sums_and_stops_at_until() -> None:
+    assigned = assigned_by_month(
+        [
+            assignment(2024, 3, None, "50"),
+            assignment(2024, 3, None, "25"),
+            assignment(2024, None, None, "120"),
+        ],
+        (2024, 4),
+    )
+    assert assigned == {
+        uuid.UUID(int=1): {
+            (2024, 1): Decimal("10"),
+            (2024, 2): Decimal("10"),
+            (2024, 3): Decimal("85"),
+            (2024, 4): Decimal("10"),
+        }
+    }
+
+
+def test_roll_forward_uses_default_without_assignments() -> None:
+    balances = roll_forward(
+        Decimal("5"),
+        (2024, 11),
+        (2025, 2),
+        Decimal("100"),
+        budgets={(2024, 12): Decimal("40")},
+        spending={(2024, 11): Decimal("130"), (2025, 1): Decimal("20")},
+    )
+    assert balances == [
+        ((2024, 11), Decimal("-25")),
+        ((2024, 12), Decimal("15")),
+        ((2025, 1), Decimal("95")),
+        ((2025, 2), Decimal("195")),
+    ]
+
+
+def test_roll_forward_empty_range() -> None:
+    assert roll_forward(Decimal(0), (2024, 2), (2024, 1), Decimal(1), {}, {}) == []
+
+
+def test_compute_budget_statuses_carries_only_accumulated() -> None:
+    fixed, accumulated = uuid.UUID(int=1), uuid.UUID(int=2)
+    statuses = compute_budget_statuses(
+        [
+            (fixed, BudgetSubCategoryType.FIXED, Decimal("100")),
+            (accumulated, BudgetSubCategoryType.ACCUMULATED, Decimal("100")),
+        ],
+        spent={fixed: Decimal("30.125"), accumulated: Decimal("30")},
+        assigned={accumulated: {(2024, 5): Decimal("50")}},
+        carried={fixed: Decimal("999"), accumulated: Decimal("20")},
+        month=(2024, 5),
+    )
+    assert statuses == {
+        fixed: BudgetStatus(budgeted=100.0, spent=30.12, available=69.88),
+        accumulated: BudgetStatus(budgeted=50.0, spent=30.0, available=40.0),
+    }
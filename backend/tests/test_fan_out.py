@@ -0,0 +1,50 @@
+import threading
+import time
+
+from lifehub.core.common.base.fan_out import fan_out
+
+
+def test_fan_out_yields_in_completion_order() -> None:
+    delays = {"slow": 0.3, "medium": 0.15, "fast": 0}
+    results = list(
+        fan_out(
+            lambda item: time.sleep(delays[item]) or item.upper(),
+            list(delays),
+            max_workers=3,
+            timeout=5,
+        )
+    )
+    assert results == [("fast", "FAST"), ("medium", "MEDIUM"), ("slow", "SLOW")]
+
+
+def test_fan_out_yields_exceptions_instead_of_raising() -> None:
+    def call(item: int) -> int:
+        if item == 2:
+            raise ValueError("bad item")
+        return item * 10
+
+    results = dict(fan_out(call, [1, 2, 3], max_workers=2, timeout=5))
+    assert results[1] == 10 and results[3] == 30
+    assert isinstance(results[2], ValueError)
+
+
+def test_fan_out_abandons_calls_after_timeout() -> None:
+    release = threading.Event()
+
+    def call(item: str) -> str:
+        if item == "stuck":
+            release.wait(5)
+        return item
+
+    start = time.perf_counter()
+    results = dict(fan_out(call, ["ok", "stuck"], max_workers=2, timeout=0.2))
+    elapsed = time.perf_counter() - start
+    release.set()
+
+    assert results["ok"] == "ok"
+    assert isinstance(results["stuck"], TimeoutError)
+    assert elapsed < 1
+
+
+def test_fan_out_without_items() -> None:
+    assert list(fan_out(str, [], max_workers=4, timeout=1)) == []
@@ -0,0 +1,126 @@
+import base64
+import datetime as dt
+import decimal
+import json
+import uuid
+from typing import Any
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select
+from sqlalchemy.dialects import mysql
+
+from lifehub.core.common.base.pagination import (
+    InvalidCursorError,
+    PaginatedRequest,
+    PaginationInfo,
+    decode_cursor,
+    encode_cursor,
+    paginate_query,
+)
+
+transactions = Table(
+    "transactions",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("date", DateTime),
+    Column("description", String(64)),
+)
+
+
+class RecordingSession:
+    """Records the statements executed, returning no rows."""
+
+    def __init__(self) -> None:
+        self.statements: list[Any] = []
+
+    def execute(self, statement: Any) -> "RecordingSession":
+        self.statements.append(statement)
+        return self
+
+    def all(self) -> list[Any]:
+        return []
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        [dt.datetime(2026, 10, 18, 14, 26, 8, 517330), uuid.uuid4()],
+        [dt.datetime(2026, 1, 1, tzinfo=dt.timezone.utc), uuid.uuid4()],
+        [dt.date(2026, 2, 28), 42],
+        [decimal.Decimal("-12.50"), 1.25, "Café"],
+        [],
+    ],
+)
+def test_cursor_round_trip(values: list[Any]) -> None:
+    decoded = decode_cursor(encode_cursor(values))
+    assert decoded == values
+    assert [type(value) for value in decoded] == [type(value) for value in values]
+
+
+def test_cursor_is_url_safe() -> None:
+    cursor = encode_cursor(["?/+&=" * 10, dt.datetime(2026, 10, 18)])
+    assert set(cursor) <= set(
+        "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_="
+    )
+
+
+def test_bool_is_encoded_as_int() -> None:
+    assert decode_cursor(encode_cursor([True])) == [1]
+
+
+def encoded(payload: Any) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        encoded({"datetime": "2026-10-18"}),
+        encoded([["datetime", "yesterday"]]),
+        encoded([["uuid", "42"]]),
+        encoded([["decimal", "twelve"]]),
+        encoded([["pickle", "x"]]),
+        encoded([["int"]]),
+    ],
+)
+def test_invalid_cursor(cursor: str) -> None:
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def test_pagination_info_with_total() -> None:
+    info = PaginationInfo.from_request(PaginatedRequest(page=2, page_size=10), 25)
+    assert info.total_pages == 3
+    assert info.has_next
+    assert info.has_prev
+
+
+def test_pagination_info_with_cursor_and_no_total() -> None:
+    request = PaginatedRequest(page_size=10, cursor=encode_cursor([1]))
+    info = PaginationInfo.from_request(request, None, has_next=False)
+    assert info.total_items is None
+    assert info.total_pages is None
+    assert not info.has_next
+    assert info.has_prev
+
+
+@pytest.mark.parametrize("cursor", [None, encode_cursor([dt.datetime(2026, 1, 1), 7])])
+def test_keyset_replaces_existing_order(cursor: str | None) -> None:
+    session = RecordingSession()
+    query = select(transactions.c.description).order_by(
+        transactions.c.description.asc()
+    )
+    items, info = paginate_query(
+        session,  # type: ignore[arg-type]
+        query,
+        PaginatedRequest(cursor=cursor, include_total=False),
+        keyset=[transactions.c.date, transactions.c.id],
+        descending=True,
+    )
+
+    assert items == [] and info.next_cursor is None
+    (statement,) = session.statements
+    sql = str(statement.compile(dialect=mysql.dialect()))
+    order_by = sql.split("ORDER BY")[1].split("LIMIT")[0].strip()
+    assert order_by == "transactions.date DESC, transactions.id DESC"
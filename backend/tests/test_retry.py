@@ -0,0 +1,102 @@
+import datetime as dt
+import time
+from email.utils import format_datetime
+from typing import Any, Optional
+
+import pytest
+import requests
+
+from lifehub.core.common.base.retry import RetryBudget, RetryPolicy, parse_retry_after
+
+
+def response(status_code: int, retry_after: Optional[str] = None) -> requests.Response:
+    res = requests.Response()
+    res.status_code = status_code
+    if retry_after is not None:
+        res.headers["Retry-After"] = retry_after
+    return res
+
+
+def policy(**kwargs: Any) -> RetryPolicy:
+    # A budget of its own, so tests don't spend the process-wide one
+    return RetryPolicy(budget=RetryBudget(), **kwargs)
+
+
+def far_deadline() -> float:
+    return time.monotonic() + 3600
+
+
+def test_parse_retry_after_seconds() -> None:
+    assert parse_retry_after(response(429, "7")) == 7
+    assert parse_retry_after(response(429, "1.5")) == 1.5
+
+
+def test_parse_retry_after_clamps_negative_seconds() -> None:
+    assert parse_retry_after(response(429, "-3")) == 0
+
+
+def test_parse_retry_after_http_date() -> None:
+    retry_at = dt.datetime.now(dt.timezone.utc) + dt.timedelta(seconds=30)
+    wait = parse_retry_after(response(503, format_datetime(retry_at, usegmt=True)))
+    assert wait is not None
+    assert 28 <= wait <= 30
+
+
+def test_parse_retry_after_past_http_date() -> None:
+    retry_at = dt.datetime.now(dt.timezone.utc) - dt.timedelta(minutes=5)
+    assert parse_retry_after(response(503, format_datetime(retry_at, usegmt=True))) == 0
+
+
+@pytest.mark.parametrize("value", [None, "soon", ""])
+def test_parse_retry_after_missing_or_invalid(value: Optional[str]) -> None:
+    assert parse_retry_after(response(503, value)) is None
+
+
+def test_next_wait_uses_retry_after() -> None:
+    wait = policy().next_wait("GET", response(429, "2"), 1, 0.5, far_deadline())
+    assert wait == 2
+
+
+def test_next_wait_backoff_is_jittered_within_bounds() -> None:
+    retry_policy = policy(base_delay=0.5, max_delay=10)
+    for previous_delay in (0.5, 1, 4, 8):
+        wait = retry_policy.next_wait("GET", None, 1, previous_delay, far_deadline())
+        assert wait is not None
+        assert 0.5 <= wait <= min(10, previous_delay * 3)
+
+
+@pytest.mark.parametrize("method", ["POST", "PATCH"])
+def test_next_wait_doesnt_retry_non_idempotent_methods(method: str) -> None:
+    assert policy().next_wait(method, response(503), 1, 0.5, far_deadline()) is None
+
+
+@pytest.mark.parametrize("status_code", [400, 401, 404, 501])
+def test_next_wait_doesnt_retry_client_errors(status_code: int) -> None:
+    res = response(status_code)
+    assert policy().next_wait("GET", res, 1, 0.5, far_deadline()) is None
+
+
+def test_next_wait_gives_up_after_max_attempts() -> None:
+    retry_policy = policy(max_attempts=3)
+    assert retry_policy.next_wait("GET", None, 2, 0.5, far_deadline()) is not None
+    assert retry_policy.next_wait("GET", None, 3, 0.5, far_deadline()) is None
+
+
+def test_next_wait_gives_up_past_deadline() -> None:
+    deadline = time.monotonic() + 1
+    assert policy().next_wait("GET", response(429, "5"), 1, 0.5, deadline) is None
+
+
+def test_next_wait_gives_up_when_budget_is_exhausted() -> None:
+    retry_policy = RetryPolicy(budget=RetryBudget(min_per_second=0, max_tokens=1))
+    assert retry_policy.next_wait("GET", None, 1, 0.5, far_deadline()) is not None
+    assert retry_policy.next_wait("GET", None, 1, 0.5, far_deadline()) is None
+
+
+def test_retry_budget_refills_with_requests() -> None:
+    budget = RetryBudget(ratio=0.5, min_per_second=0, max_tokens=1)
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    budget.record_request()
+    budget.record_request()
+    assert budget.try_spend()
@@ -0,0 +1,138 @@
+import random
+import uuid
+from typing import Optional, Sequence
+
+import pytest
+
+from lifehub.modules.finance.schema import (
+    BankTransactionFilter,
+    BankTransactionFilterMatch,
+)
+from lifehub.modules.finance.service.transaction_matcher import (
+    AhoCorasick,
+    FilterRule,
+    TransactionMatcher,
+    filters_signature,
+)
+
+
+def make_filter(
+    *matches: str, description: Optional[str] = None
+) -> BankTransactionFilter:
+    return BankTransactionFilter(
+        id=uuid.uuid4(),
+        subcategory_id=uuid.uuid4(),
+        description=description,
+        matches=[BankTransactionFilterMatch(match_string=match) for match in matches],
+    )
+
+
+def substring_matches(
+    filters: Sequence[BankTransactionFilter],
+    description: Optional[str],
+    counterparty: Optional[str],
+) -> list[tuple[BankTransactionFilter, str]]:
+    """
+    The (filter, match string) pairs found by the substring loop the
+    matcher replaced.
+    """
+    found = []
+    for filter in filters:
+        for match in filter.matches:
+            needle = match.match_string.lower()
+            if (description and needle in description.lower()) or (
+                counterparty and needle in counterparty.lower()
+            ):
+                found.append((filter, match.match_string))
+    return found
+
+
+def random_text(rng: random.Random, alphabet: str, max_length: int) -> str:
+    return "".join(rng.choices(alphabet, k=rng.randint(0, max_length)))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_aho_corasick_matches_substring_search(seed: int) -> None:
+    rng = random.Random(seed)
+    # A small alphabet makes patterns overlap and share prefixes and suffixes
+    patterns = list({random_text(rng, "abc", 5) for _ in range(30)} - {""})
+    rng.shuffle(patterns)
+    # Distinct priorities, so the best pattern is unambiguous
+    automaton = AhoCorasick(
+        (pattern, priority, pattern) for priority, pattern in enumerate(patterns)
+    )
+
+    for _ in range(50):
+        text = random_text(rng, "abcd", 30)
+        contained = [
+            (priority, pattern)
+            for priority, pattern in enumerate(patterns)
+            if pattern in text
+        ]
+        expected = max(contained)[1] if contained else None
+        assert automaton.best(text) == expected
+
+
+def test_aho_corasick_ignores_empty_patterns() -> None:
+    automaton = AhoCorasick([("", 10, "empty"), ("b", 1, "b")])
+    assert automaton.best("abc") == "b"
+    assert automaton.best("xyz") is None
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matcher_agrees_with_substring_loop(seed: int) -> None:
+    rng = random.Random(seed)
+    filters = [
+        make_filter(*{random_text(rng, "abcAB", 4) or "a" for _ in range(3)})
+        for _ in range(8)
+    ]
+    matcher = TransactionMatcher(filters)
+
+    for _ in range(50):
+        description = random_text(rng, "abcdAB ", 20) or None
+        counterparty = random_text(rng, "abcdAB ", 10) or None
+        found = substring_matches(filters, description, counterparty)
+        rule = matcher.match(description, counterparty)
+
+        if not found:
+            assert rule is None
+            continue
+        assert rule is not None
+        # The filter with the longest matching string wins
+        longest = max(len(match) for _, match in found)
+        assert rule.filter_id in {
+            filter.id for filter, match in found if len(match) == longest
+        }
+
+
+def test_matcher_rule_carries_filter_assignment() -> None:
+    filter = make_filter("continente", description="Groceries")
+    rule = TransactionMatcher([filter]).match("COMPRA CONTINENTE LISBOA", None)
+    assert rule == FilterRule(filter.id, filter.subcategory_id, "Groceries")
+
+
+def test_matcher_matches_counterparty() -> None:
+    filter = make_filter("uber")
+    rule = TransactionMatcher([filter]).match("Card payment", "Uber BV")
+    assert rule is not None and rule.filter_id == filter.id
+
+
+def test_matcher_prefers_longest_match() -> None:
+    generic = make_filter("pingo")
+    specific = make_filter("pingo doce")
+    matcher = TransactionMatcher([specific, generic])
+    rule = matcher.match("PINGO DOCE ALVALADE", None)
+    assert rule is not None and rule.filter_id == specific.id
+
+
+def test_match_doesnt_span_description_and_counterparty() -> None:
+    matcher = TransactionMatcher([make_filter("ab")])
+    assert matcher.match("xa", "bx") is None
+
+
+def test_filters_signature_changes_with_match_strings() -> None:
+    filter = make_filter("a", "b")
+    signature = filters_signature([filter])
+    assert filters_signature([filter]) == signature
+    filter.matches.append(BankTransactionFilterMatch(match_string="c"))
+    assert filters_signature([filter]) != signature
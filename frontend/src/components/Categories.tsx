@@ -1,7 +1,11 @@
 import { SubCategoryCard } from "~/components/SubCategoryCard";
 import { Divider, Group, Text, Stack, Space } from "@mantine/core";
 import { AddSubCategoryModal } from "~/components/modals/AddSubCategoryModal";
-import { useCategories, useTransactions } from "~/hooks/useFinanceQueries";
+import {
+  findMonthSummary,
+  useCategories,
+  useMonthlySummaries,
+} from "~/hooks/useFinanceQueries";
 import { useContext } from "react";
 import { TimeRangeContext } from "~/context/finance";
 
@@ -9,18 +13,15 @@ export function Categories() {
   const subcatBalances: Record<string, number> = {};
 
   const { timeRange } = useContext(TimeRangeContext);
-  const transactions = useTransactions(timeRange)?.data || [];
+  const summaries = useMonthlySummaries()?.data || [];
   const categories = useCategories()?.data || [];
 
-  // Calculate balances for each subcategory
-  transactions.forEach((transaction) => {
-    if (transaction.subcategory_id) {
-      if (!subcatBalances[transaction.subcategory_id]) {
-        subcatBalances[transaction.subcategory_id] = 0;
-      }
-      subcatBalances[transaction.subcategory_id] -= transaction.amount;
-    }
-  });
+  // Spent in each subcategory this month
+  findMonthSummary(summaries, timeRange.startDate)?.categories.forEach(
+    (summary) => {
+      subcatBalances[summary.subcategory_id] = -summary.balance;
+    },
+  );
 
   return (
     <Stack p={4} gap="md">
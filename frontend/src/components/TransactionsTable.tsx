@@ -1,6 +1,7 @@
 import { useState } from "react";
 import cx from "clsx";
 import {
+  Button,
   ScrollArea,
   Table,
   Text,
@@ -43,6 +44,10 @@ type TransactionsTableProps = {
 export function TransactionsTable({
   transactions,
   categories,
+  isFetchingNextPage,
+  hasNextPage,
+  fetchNextPage,
+  isInfinite,
 }: TransactionsTableProps) {
   const [scrolled, setScrolled] = useState(false);
   const [searchTerm, setSearchTerm] = useState("");
@@ -168,6 +173,16 @@ export function TransactionsTable({
         <Text size="sm" c="dimmed">
           Showing {transactions.length} transactions
         </Text>
+        {isInfinite && hasNextPage && (
+          <Button
+            variant="subtle"
+            size="xs"
+            loading={isFetchingNextPage}
+            onClick={() => fetchNextPage?.()}
+          >
+            Load more
+          </Button>
+        )}
       </Group>
     </div>
   );
@@ -4,27 +4,25 @@ import { IncomeCard } from "./IncomeCard";
 import { ExpensesCard } from "./ExpensesCard";
 import { TimeRangeContext } from "~/context/finance";
 import { useContext } from "react";
-import { useBalances, useTransactions } from "~/hooks/useFinanceQueries";
+import {
+  findMonthSummary,
+  useBalances,
+  useMonthlySummaries,
+} from "~/hooks/useFinanceQueries";
 
 export function FinancialSummary() {
   const { timeRange } = useContext(TimeRangeContext);
-  const transactions = useTransactions(timeRange)?.data || [];
+  const summaries = useMonthlySummaries()?.data || [];
   const balances = useBalances()?.data || [];
+  const monthSummary = findMonthSummary(summaries, timeRange.startDate);
 
   const totalBalance = balances.reduce(
     (acc, balance) => acc + balance.balance,
     0,
   );
-  const monthlyBalance = transactions.reduce(
-    (acc, transaction) => acc + transaction.amount,
-    0,
-  );
-  const income = transactions
-    .filter((transaction) => transaction.amount > 0)
-    .reduce((acc, transaction) => acc + transaction.amount, 0);
-  const expenses = transactions
-    .filter((transaction) => transaction.amount < 0)
-    .reduce((acc, transaction) => acc + transaction.amount, 0);
+  const monthlyBalance = monthSummary?.balance ?? 0;
+  const income = monthSummary?.income ?? 0;
+  const expenses = -(monthSummary?.expenses ?? 0);
 
   return (
     <Grid mb="xl">
@@ -10,83 +10,49 @@ import {
 import { Card, Stack, Title, Text, Group, Divider } from "@mantine/core";
 import { useContext } from "react";
 import { TimeRangeContext } from "~/context/finance";
-import { useBalances, useTransactions } from "~/hooks/useFinanceQueries";
+import {
+  findMonthSummary,
+  useBalances,
+  useMonthlySummaries,
+} from "~/hooks/useFinanceQueries";
+import type { MonthlySummary } from "~/hooks/useFinanceQueries";
 import { IconArrowUpRight, IconArrowDownRight } from "@tabler/icons-react";
 
 export const MonthlySummaryCard = () => {
   const { timeRange } = useContext(TimeRangeContext);
-  const transactions = useTransactions(timeRange)?.data || [];
+  const summaries = useMonthlySummaries()?.data || [];
   const balances = useBalances()?.data || [];
+  const monthSummary = findMonthSummary(summaries, timeRange.startDate);
 
   const totalBalance =
     balances.reduce((acc, balance) => acc + balance.balance, 0) - 4000;
 
-  const expenses = transactions
-    .filter((transaction) => transaction.amount < 0)
-    .reduce((acc, transaction) => acc + transaction.amount, 0);
+  const expenses = -(monthSummary?.expenses ?? 0);
 
-  const income = transactions
-    .filter((transaction) => transaction.amount > 0)
-    .reduce((acc, transaction) => acc + transaction.amount, 0);
+  const income = monthSummary?.income ?? 0;
 
   const netChange = income + expenses;
   const changePercentage =
     totalBalance !== 0 ? (netChange / (totalBalance + netChange)) * 100 : 0;
 
-  const getBalanceEvolutionData = (currentTotalBalance, monthTransactions) => {
-    const today = new Date();
-    today.setHours(0, 0, 0, 0);
-
-    const firstDayOfMonth = new Date(today.getFullYear(), today.getMonth(), 1);
-    firstDayOfMonth.setHours(0, 0, 0, 0);
-
-    const dailyNetChanges = monthTransactions.reduce((acc, tx) => {
-      const txDate = new Date(tx.date);
-      txDate.setHours(0, 0, 0, 0);
-      const dateKey = txDate.toISOString().split("T")[0];
-      acc[dateKey] = (acc[dateKey] || 0) + tx.amount;
-      return acc;
-    }, {});
-
+  const getBalanceEvolutionData = (
+    currentTotalBalance: number,
+    monthlySummaries: MonthlySummary[],
+  ) => {
+    // Walk back from the current balance, undoing each month's net change
     const chartData = [];
     let runningBalance = currentTotalBalance;
 
-    for (
-      let d = new Date(today);
-      d >= firstDayOfMonth;
-      d.setDate(d.getDate() - 1)
-    ) {
-      const dateKey = d.toISOString().split("T")[0];
-      const netChangeForDay = dailyNetChanges[dateKey] || 0;
-
-      if (d.toDateString() === today.toDateString()) {
-        chartData.unshift({
-          date: d.toLocaleDateString("en-GB", {
-            day: "2-digit",
-            month: "short",
-          }),
-          balance: runningBalance,
-        });
-      } else {
-        runningBalance -= netChangeForDay;
-        chartData.unshift({
-          date: d.toLocaleDateString("en-GB", {
-            day: "2-digit",
-            month: "short",
-          }),
-          balance: runningBalance,
-        });
-      }
-    }
-
-    if (chartData.length === 0 && currentTotalBalance !== undefined) {
-      chartData.push({
-        date: today.toLocaleDateString("en-GB", {
-          day: "2-digit",
+    for (const summary of [...monthlySummaries].reverse()) {
+      const monthStart = new Date(summary.year, summary.month - 1);
+      chartData.unshift({
+        date: monthStart.toLocaleDateString("en-GB", {
           month: "short",
+          year: "2-digit",
         }),
-        balance: currentTotalBalance,
+        balance: runningBalance,
       });
+      runningBalance -= summary.balance;
     }
 
     return chartData;
@@ -94,7 +60,7 @@ export const MonthlySummaryCard = () => {
 
   const balanceEvolutionData = getBalanceEvolutionData(
     totalBalance,
-    transactions,
+    summaries,
   );
 
   const formatBalance = (value: number, name: string, props: any) => {
@@ -1,4 +1,10 @@
-import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
+import {
+  useInfiniteQuery,
+  useMutation,
+  useQuery,
+  useQueryClient,
+} from "@tanstack/react-query";
+import type { InfiniteData } from "@tanstack/react-query";
 import { api } from "~/lib/query";
 
 // Types
@@ -16,10 +22,11 @@ export type Transaction = {
 export type PaginationInfo = {
   page: number;
   page_size: number;
-  total_items: number;
-  total_pages: number;
+  total_items: number | null;
+  total_pages: number | null;
   has_next: boolean;
   has_prev: boolean;
+  next_cursor: string | null;
 };
 
 export type PaginatedResponse<T> = {
@@ -33,8 +40,11 @@ export type CategoryMonthlySummary = {
 };
 
 export type MonthlySummary = {
+  year: number;
+  month: number;
   income: number;
   expenses: number;
+  balance: number;
   categories: CategoryMonthlySummary[];
 };
 
@@ -91,23 +101,61 @@ export const financeKeys = {
   banksByCountry: (country: string) =>
     [...financeKeys.banks(), country] as const,
   countries: () => [...financeKeys.all, "countries"] as const,
+  summaries: () => [...financeKeys.all, "summary"] as const,
+  summary: (months: number) => [...financeKeys.summaries(), months] as const,
 };
 
+const TRANSACTIONS_PAGE_SIZE = 50;
+
 // Query hooks
+
+// Loads one page of transactions, newest first; call fetchNextPage for more
 export const useTransactions = (timeRange: TimeRange) => {
-  return useQuery({
+  return useInfiniteQuery({
     queryKey: financeKeys.transactions(timeRange),
-    queryFn: async () => {
-      // Use the paginated endpoint with query parameters
-      const { data } = await api.get<Transaction[]>(
-        `/finance/bank/transactions?start_date=${timeRange.startDate}&end_date=${timeRange.endDate}`,
+    queryFn: async ({ pageParam }) => {
+      const { data } = await api.get<PaginatedResponse<Transaction>>(
+        "/finance/bank/transactions",
+        {
+          params: {
+            start_date: timeRange.startDate,
+            end_date: timeRange.endDate,
+            page_size: TRANSACTIONS_PAGE_SIZE,
+            cursor: pageParam ?? undefined,
+          },
+        },
       );
+      return data;
+    },
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.pagination.next_cursor,
+  });
+};
 
+// Income, expenses and subcategory balances of the last `months` months
+export const useMonthlySummaries = (months: number = 12) => {
+  return useQuery({
+    queryKey: financeKeys.summary(months),
+    queryFn: async () => {
+      const { data } = await api.get<MonthlySummary[]>("/finance/summary", {
+        params: { months },
+      });
       return data;
     },
   });
 };
 
+// The summary of the month a YYYY-MM-DD date falls in
+export const findMonthSummary = (
+  summaries: MonthlySummary[],
+  date: string,
+) => {
+  const [year, month] = date.split("-").map(Number);
+  return summaries.find(
+    (summary) => summary.year === year && summary.month === month,
+  );
+};
+
 export const useCategories = () => {
   return useQuery({
     queryKey: financeKeys.categories(),
@@ -294,25 +342,29 @@ export const useEditTransaction = () => {
       return data;
     },
     onSuccess: (updatedTransaction) => {
-      // Update the transaction in the regular query cache
-      queryClient.setQueryData(
-        financeKeys.transactions(),
-        (oldData: PaginatedResponse<Transaction> | undefined) => {
+      // Update the transaction in the loaded pages of every time range
+      queryClient.setQueriesData<InfiniteData<PaginatedResponse<Transaction>>>(
+        { queryKey: [...financeKeys.all, "transactions"] },
+        (oldData) => {
           if (!oldData) return oldData;
 
           return {
             ...oldData,
-            items: oldData.items.map((transaction) =>
-              transaction.id === updatedTransaction.id
-                ? updatedTransaction
-                : transaction,
-            ),
+            pages: oldData.pages.map((page) => ({
+              ...page,
+              items: page.items.map((transaction) =>
+                transaction.id === updatedTransaction.id
+                  ? updatedTransaction
+                  : transaction,
+              ),
+            })),
           };
         },
       );
 
-      // Only invalidate categories to update the amounts
+      // Only invalidate categories and summaries to update the amounts
       queryClient.invalidateQueries({ queryKey: financeKeys.categories() });
+      queryClient.invalidateQueries({ queryKey: financeKeys.summaries() });
     },
   });
 };
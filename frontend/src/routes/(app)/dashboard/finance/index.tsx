@@ -96,7 +96,11 @@ export default function FinancePage() {
                 <Skeleton height={600} />
               ) : (
                 <TransactionsTable
-                  transactions={transactionsQuery.data || []}
+                  transactions={
+                    transactionsQuery.data?.pages.flatMap(
+                      (page) => page.items,
+                    ) || []
+                  }
                   categories={
                     categoriesQuery.data
                       ? categoriesQuery.data.flatMap(
@@ -107,6 +111,9 @@ export default function FinancePage() {
                   }
                   isInfinite={true}
                   isLoading={transactionsQuery.isLoading}
+                  hasNextPage={transactionsQuery.hasNextPage}
+                  fetchNextPage={transactionsQuery.fetchNextPage}
+                  isFetchingNextPage={transactionsQuery.isFetchingNextPage}
                 />
               )}
             </Card>